@@ -0,0 +1,248 @@
+"""
+Batch runner that solves many diet scenarios in parallel.
+
+A scenario overrides part of the base configuration from main.py: nutrient bounds by
+nutrient key (e.g. {'calories': {'min': 18000}}) and order constraints by their key
+(e.g. {'min_order_value': 50, 'total_weeks': 12}). The catalog is compiled once into
+the memory-mapped catalog cache and every worker process maps that same file, so the
+catalog arrays are shared through the page cache instead of being copied into each
+task. The workers draw their solver threads from one shared CPU budget, so a scenario
+waits for threads instead of oversubscribing the cores, and every finished scenario is
+appended to the result CSV right away.
+
+Usage:
+    python batch_runner.py scenarios.json --output batch_results.csv --workers 4
+
+scenarios.json holds a list of scenarios, or {"grid": {key: [values, ...]}} for every
+combination of the listed values, or both under "scenarios" and "grid".
+"""
+
+import argparse
+import contextlib
+import csv
+import io
+import itertools
+import json
+import multiprocessing as mp
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from cpu_budget import CpuBudget
+from diet_optimizer import DietOptimizer
+from feasibility import FeasibilityChecker
+from food_data_manager import DEFAULT_WEEKLY_LIMIT, FoodDataManager
+
+RESULT_COLUMNS = [
+    'scenario', 'status', 'total_cost', 'item_cost', 'delivery_cost', 'deliveries',
+    'solve_time', 'solver_threads', 'thread_wait_time', 'error'
+]
+
+_catalog = None  # Food catalog of the worker process, mapped from the catalog cache
+_cpu_budget = None  # CPU budget shared by the worker processes
+
+
+def scenario_grid(axes):
+    """
+    Expand value lists into one scenario per combination.
+
+    Args:
+        axes (dict): Scenario key -> list of values
+
+    Returns:
+        list: Scenario dicts
+    """
+    keys = list(axes)
+    return [dict(zip(keys, values)) for values in itertools.product(*(axes[key] for key in keys))]
+
+
+def scenario_name(scenario):
+    """Return the scenario's 'name', or one built from its settings."""
+    if 'name' in scenario:
+        return str(scenario['name'])
+    return ','.join(f"{key}={value}" for key, value in scenario.items())
+
+
+def apply_scenario(nutritional_constraints, order_constraints, scenario):
+    """
+    Apply a scenario's overrides to copies of the base constraints.
+
+    Returns:
+        tuple: (nutritional_constraints, order_constraints) of the scenario
+    """
+    nutrients = {key: dict(bounds) for key, bounds in nutritional_constraints.items()}
+    orders = dict(order_constraints)
+    for key, value in scenario.items():
+        if key == 'name':
+            continue
+        if key in nutrients:
+            nutrients[key].update(value)
+        else:
+            orders[key] = value
+    return nutrients, orders
+
+
+def _parameter_values(scenario, nutrients):
+    """Result columns of a scenario's settings, with one column per overridden nutrient bound."""
+    values = {}
+    for key, value in scenario.items():
+        if key in nutrients:
+            values.update({f"{key}_{bound}": bound_value for bound, bound_value in value.items()})
+        elif key != 'name':
+            values[key] = value if not isinstance(value, (dict, list)) else json.dumps(value)
+    return values
+
+
+def _init_worker(csv_path, default_weekly_limit, cpu_budget):
+    """Map the compiled catalog once per worker process and keep the shared CPU budget."""
+    global _catalog, _cpu_budget
+    _cpu_budget = cpu_budget
+    with contextlib.redirect_stdout(io.StringIO()):
+        _catalog = FoodDataManager(
+            csv_path, use_cache=True, default_weekly_limit=default_weekly_limit
+        ).get_food_items()
+
+
+def _solve_scenario(name, nutritional_constraints, order_constraints):
+    """Solve one scenario in a worker and summarize the outcome as a result row."""
+    row = {'scenario': name, 'solver_threads': order_constraints.get('solver_threads')}
+    start_time = time.time()
+    try:
+        checker = FeasibilityChecker(_catalog, nutritional_constraints, order_constraints)
+        if not checker.check():
+            row.update({'status': 'infeasible', 'error': checker.describe(), 'solve_time': time.time() - start_time})
+            return row
+        order_constraints = dict(order_constraints, cpu_budget=_cpu_budget, job_name=name)
+        with contextlib.redirect_stdout(io.StringIO()):
+            optimizer = DietOptimizer(_catalog, nutritional_constraints, order_constraints)
+            solved = optimizer.solve()
+            costs = optimizer.get_results()['cost_breakdown'] if solved else None
+        if optimizer.thread_allotments:
+            row['thread_wait_time'] = sum(job['wait_time'] for job in optimizer.thread_allotments)
+        row['status'] = 'solved' if solved else 'no solution'
+        if costs is not None:
+            row.update({
+                'total_cost': costs['total'],
+                'item_cost': sum(week['items'] for week in costs['weekly']),
+                'delivery_cost': sum(week['delivery'] for week in costs['weekly']),
+                'deliveries': sum(week['delivery'] > 0 for week in costs['weekly'])
+            })
+    except Exception as e:
+        row.update({'status': 'error', 'error': f"{type(e).__name__}: {e}"})
+    row['solve_time'] = time.time() - start_time
+    return row
+
+
+class BatchRunner:
+    """Solve scenarios in a process pool that shares the catalog and a thread budget."""
+
+    def __init__(self, csv_path, nutritional_constraints, order_constraints, workers=None,
+                 total_threads=None, default_weekly_limit=DEFAULT_WEEKLY_LIMIT):
+        """
+        Args:
+            csv_path (str): Path of the food catalog CSV
+            nutritional_constraints (dict): Base nutritional constraints
+            order_constraints (dict): Base order constraints
+            workers (int): Worker processes; defaults to one per scenario up to the thread budget
+            total_threads (int): Solver threads shared by all workers; defaults to every core
+            default_weekly_limit (float): Weekly serving limit of items without one in the catalog
+        """
+        self.csv_path = csv_path
+        self.nutritional_constraints = nutritional_constraints
+        self.order_constraints = order_constraints
+        self.total_threads = total_threads or mp.cpu_count()
+        self.workers = workers
+        self.default_weekly_limit = default_weekly_limit
+
+    def run(self, scenarios, output_path):
+        """
+        Solve the scenarios and stream one result row per scenario to a CSV file.
+
+        Args:
+            scenarios (list): Scenario dicts of configuration overrides
+            output_path (str): Result CSV, overwritten
+
+        Returns:
+            pd.DataFrame: The result rows, in scenario order
+        """
+        # Compile the catalog cache once so the workers only map it
+        FoodDataManager(self.csv_path, use_cache=True, default_weekly_limit=self.default_weekly_limit)
+
+        workers = min(self.workers or self.total_threads, len(scenarios), self.total_threads)
+        threads = max(1, self.total_threads // max(workers, 1))
+        cpu_budget = CpuBudget(self.total_threads)
+        print(f"Solving {len(scenarios)} scenarios with {workers} workers and a budget of "
+              f"{self.total_threads} solver threads, {threads} per solve")
+
+        names = [scenario_name(scenario) for scenario in scenarios]
+        parameters = [_parameter_values(scenario, self.nutritional_constraints) for scenario in scenarios]
+        parameter_columns = list(dict.fromkeys(key for values in parameters for key in values))
+        columns = ['scenario'] + parameter_columns + RESULT_COLUMNS[1:]
+        start_time = time.time()
+        with open(output_path, 'w', newline='') as f, ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(self.csv_path, self.default_weekly_limit, cpu_budget)
+        ) as executor:
+            writer = csv.DictWriter(f, fieldnames=columns)
+            writer.writeheader()
+            futures = {}
+            for name, scenario, values in zip(names, scenarios, parameters):
+                nutrients, orders = apply_scenario(self.nutritional_constraints, self.order_constraints, scenario)
+                orders.update({
+                    'solver_threads': threads,
+                    'solver_show_progress': False,
+                    'solver_progress_callback': None,
+                    'solver_progress_log': None
+                })
+                futures[executor.submit(_solve_scenario, name, nutrients, orders)] = values
+            for done, future in enumerate(as_completed(futures), start=1):
+                row = dict(futures[future], **future.result())
+                writer.writerow(row)
+                f.flush()
+                cost = f"${row['total_cost']:.2f}" if row.get('total_cost') is not None else row['status']
+                print(f"[{done}/{len(scenarios)}] {row['scenario']}: {cost} ({row['solve_time']:.1f}s)")
+
+        print(f"Batch finished in {time.time() - start_time:.1f}s; results in {output_path}")
+        results = pd.read_csv(output_path)
+        order = {name: k for k, name in enumerate(names)}
+        return results.sort_values('scenario', key=lambda column: column.map(order)).reset_index(drop=True)
+
+
+def load_scenarios(path):
+    """Read scenarios from a JSON file; see the module docstring for the format."""
+    with open(path) as f:
+        spec = json.load(f)
+    if isinstance(spec, list):
+        return spec
+    return list(spec.get('scenarios', [])) + scenario_grid(spec.get('grid', {}))
+
+
+def main():
+    import main as config
+
+    parser = argparse.ArgumentParser(description="Solve diet scenarios in parallel")
+    parser.add_argument('scenarios', help="JSON file of scenarios")
+    parser.add_argument('--output', default='batch_results.csv', help="Result CSV file")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes")
+    parser.add_argument('--threads', type=int, default=None, help="Solver threads shared by all workers")
+    args = parser.parse_args()
+
+    food_manager = FoodDataManager(
+        config.FOOD_CATALOG_PATH, use_cache=True, default_weekly_limit=config.DEFAULT_WEEKLY_LIMIT
+    )
+    nutritional_constraints, order_constraints, _ = config.update_constraints(food_manager)
+    runner = BatchRunner(
+        config.FOOD_CATALOG_PATH,
+        nutritional_constraints,
+        order_constraints,
+        workers=args.workers,
+        total_threads=args.threads,
+        default_weekly_limit=config.DEFAULT_WEEKLY_LIMIT
+    )
+    runner.run(load_scenarios(args.scenarios), args.output)
+
+
+if __name__ == '__main__':
+    main()
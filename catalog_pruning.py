@@ -0,0 +1,139 @@
+"""
+Pre-solve pruning of catalog items that a cheapest plan does not need.
+
+An item is never useful if it cannot be eaten at all (a weekly limit below one
+serving, or a perishable package larger than the weekly limit) or if it adds none of
+the nutrients with a minimum. Item i is dominated by item j if both have the same
+perishability, j gives at least as much of every nutrient with a minimum and no more
+of every nutrient with a maximum, costs no more per serving, allows at least as many
+servings per week and its package size divides that of i, so any order of i can be
+bought as whole packages of j. Dominance is pairwise: when the plan also needs j up to
+its weekly limit, or buys i only to reach the minimum order value, dropping i can cost
+a little, so pruning is optional.
+
+Pairs are compared in vectorized blocks of rows so memory stays bounded for large
+catalogs.
+"""
+
+import numpy as np
+
+from food_data_manager import FoodCatalog
+from model_builder import catalog_arrays, constrained_nutrients, nutrient_bounds
+
+
+class CatalogPruner:
+    """Find never-useful and dominated items and drop them from the catalog."""
+
+    def __init__(self, food_items, nutritional_constraints, max_block_elements=20_000_000):
+        """
+        Args:
+            food_items (FoodCatalog or dict): Food items and their attributes
+            nutritional_constraints (dict): Dictionary of nutritional constraints
+            max_block_elements (int): Largest number of pairwise nutrient comparisons
+                held in memory at once
+        """
+        self.food_items = FoodCatalog.from_items(food_items)
+        self.nutrients = constrained_nutrients(self.food_items, nutritional_constraints)
+        self.catalog = catalog_arrays(self.food_items, self.nutrients)
+        mins, maxs = nutrient_bounds(nutritional_constraints, self.nutrients)
+        self.lower = mins > 0  # Nutrients where more is never worse
+        self.upper = np.isfinite(maxs)  # Nutrients where less is never worse
+        self.max_block_elements = max_block_elements
+        self.dropped = {}  # Item key -> reason it was dropped
+
+    def prune(self):
+        """
+        Drop never-useful and dominated items.
+
+        Returns:
+            FoodCatalog: Catalog of the remaining items, in their original order
+        """
+        keys = self.catalog['keys']
+        reasons = self._never_useful()
+        dominator = self._dominators(candidates=np.array([reason is None for reason in reasons]))
+        for i in np.flatnonzero(dominator >= 0):
+            reasons[i] = f"dominated by {keys[dominator[i]]}"
+
+        self.dropped = {keys[i]: reason for i, reason in enumerate(reasons) if reason is not None}
+        print(f"Catalog pruning dropped {len(self.dropped)} of {len(keys)} items")
+        return self.food_items.subset(np.array([reason is None for reason in reasons], dtype=bool))
+
+    def _never_useful(self):
+        """Return the reason each item can never help a plan, or None."""
+        c = self.catalog
+        reasons = [None] * len(c['keys'])
+        unusable_perishable = c['perishable'] & (c['package_size'] > c['weekly_limit'])
+        no_nutrients = ~(c['nutrients'][:, self.lower] > 0).any(axis=1) if self.lower.any() else np.zeros(len(reasons), bool)
+        for i in np.flatnonzero(no_nutrients):
+            reasons[i] = "adds none of the nutrients with a minimum"
+        for i in np.flatnonzero(unusable_perishable):
+            reasons[i] = (f"perishable package of {c['package_size'][i]:g} servings exceeds the "
+                          f"weekly limit of {c['weekly_limit'][i]:g}")
+        for i in np.flatnonzero(c['weekly_limit'] < 1):
+            reasons[i] = "weekly limit below one serving"
+        return reasons
+
+    def _dominators(self, candidates):
+        """
+        Find a dominating item for every item.
+
+        Only candidate items are compared, so a dominator is always an item that
+        stays in the catalog. Ties between identical items keep the first one.
+
+        Returns:
+            np.ndarray: Index of the cheapest dominating item per item, or -1
+        """
+        c = self.catalog
+        n_items = len(c['keys'])
+        dominator = np.full(n_items, -1)
+        pool = np.flatnonzero(candidates)
+        if len(pool) == 0:
+            return dominator
+
+        # Sorted by cost, a row's dominators are among the items up to its cost
+        pool = pool[np.argsort(c['cost'][pool], kind='stable')]
+        nutrients = c['nutrients'][pool]
+        more = nutrients[:, self.lower]
+        less = nutrients[:, self.upper]
+        cost = c['cost'][pool]
+        size = c['package_size'][pool]
+        limit = c['weekly_limit'][pool]
+        perishable = c['perishable'][pool]
+        position = pool  # Catalog order breaks ties between identical items
+
+        n_nutrients = max(more.shape[1] + less.shape[1], 1)
+        block = max(1, self.max_block_elements // (len(pool) * n_nutrients))
+        for start in range(0, len(pool), block):
+            rows = np.arange(start, min(start + block, len(pool)))
+            cols = slice(0, np.searchsorted(cost, cost[rows[-1]], side='right'))
+            # [row item i, column item j]: does j dominate i?
+            more_i, more_j = more[rows, None, :], more[None, cols, :]
+            less_i, less_j = less[rows, None, :], less[None, cols, :]
+            weak = (
+                (more_j >= more_i).all(axis=2)
+                & (less_j <= less_i).all(axis=2)
+                & (cost[None, cols] <= cost[rows, None])
+                & (limit[None, cols] >= limit[rows, None])
+                & (perishable[None, cols] == perishable[rows, None])
+                & np.isclose(np.mod(size[rows, None], size[None, cols]), 0)
+            )
+            strict = (
+                (more_j > more_i).any(axis=2)
+                | (less_j < less_i).any(axis=2)
+                | (cost[None, cols] < cost[rows, None])
+                | (limit[None, cols] > limit[rows, None])
+                | (size[None, cols] < size[rows, None])
+                | (position[None, cols] < position[rows, None])
+            )
+            dominates = weak & strict
+            dominates[np.arange(len(rows)), rows] = False
+
+            dominated = dominates.any(axis=1)
+            cheapest = np.where(dominates, cost[None, cols], np.inf).argmin(axis=1)
+            dominator[pool[rows[dominated]]] = pool[cheapest[dominated]]
+        return dominator
+
+    def report(self):
+        """Print the dropped items and the reason for each."""
+        for key, reason in self.dropped.items():
+            print(f"  {key}: {reason}")
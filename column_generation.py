@@ -0,0 +1,208 @@
+"""
+Column generation over the food catalog for very large catalogs.
+
+The model only ever contains a working set of items. The LP relaxation of that
+restricted model is solved, and every other catalog item is priced with its duals:
+a serving of item k eaten in week w and bought in week v has reduced cost
+
+    cost[k] * (1 - min_order_dual[v]) - nutrients[k] @ nutrient_duals[w]
+
+where v is w for perishables and any week up to w + 1 for non-perishables, and
+non-perishables eaten in the last week need no purchase. Adding an item at zero keeps
+the restricted solution feasible, and only an item with a negative reduced cost can
+improve the LP. The most negative items are added, and once no item prices out the
+integer model is solved over the final working set. The LP over the working set then equals the LP over the
+whole catalog, but the integer solve is restricted to the working set.
+"""
+
+import time
+import numpy as np
+import pulp
+
+from diet_optimizer import DietOptimizer
+from food_data_manager import FoodCatalog
+from highs_backend import HighsBackend, highs_available
+from model_builder import ITEM_FAMILIES, catalog_arrays, constrained_nutrients, nutrient_bounds
+
+
+class ColumnGenerationOptimizer(DietOptimizer):
+    """DietOptimizer that grows a working set of catalog items by pricing with LP duals."""
+
+    def __init__(self, food_items, nutritional_constraints, order_constraints):
+        """
+        Initialize the optimizer with a small working set of items.
+
+        Besides the DietOptimizer settings, order_constraints may contain
+        'cg_initial_items_per_nutrient' (best items per dollar of each nutrient with a
+        minimum in the first working set), 'cg_columns_per_iteration' (most items
+        added per pricing round) and 'cg_max_iterations'.
+
+        Args:
+            food_items (FoodCatalog or dict): Full catalog of food items
+            nutritional_constraints (dict): Dictionary of nutritional constraints
+            order_constraints (dict): Dictionary of order constraints
+        """
+        if not highs_available():
+            raise ImportError("highspy is required for column generation")
+        if order_constraints.get('cyclic_inventory') or order_constraints.get('initial_inventory'):
+            raise ValueError("Column generation does not support cyclic or initial inventory")
+        self.full_catalog = FoodCatalog.from_items(food_items)
+        self.initial_items = order_constraints.get('cg_initial_items_per_nutrient', 5)
+        self.columns_per_iteration = order_constraints.get('cg_columns_per_iteration', 20)
+        self.max_iterations = order_constraints.get('cg_max_iterations', 50)
+        self.iterations = []  # Summary of each pricing round
+        self.generated_items = 0  # Items added by pricing
+        self.generated_columns = 0  # Model columns those items contributed
+        self.lp_bound = None  # LP relaxation value over the whole catalog
+
+        nutrients = constrained_nutrients(self.full_catalog, nutritional_constraints)
+        self.full_arrays = catalog_arrays(self.full_catalog, nutrients)
+        c = self.full_arrays
+        self.usable = (c['weekly_limit'] >= 1) & ~(c['perishable'] & (c['package_size'] > c['weekly_limit']))
+        self.working = self._initial_working_set(nutritional_constraints, nutrients, self.initial_items)
+        super().__init__(
+            self.full_catalog.subset(self.working),
+            nutritional_constraints,
+            dict(order_constraints, model_builder='matrix', solver_backend='highs')
+        )
+
+    def _initial_working_set(self, nutritional_constraints, nutrients, per_nutrient):
+        """Pick the usable items with the most of each minimum-bounded nutrient per dollar."""
+        c = self.full_arrays
+        mins, _ = nutrient_bounds(nutritional_constraints, nutrients)
+        per_dollar = c['nutrients'] / np.maximum(c['cost'], 1e-9)[:, None]
+        per_dollar[~self.usable] = -np.inf
+        working = np.zeros(len(c['keys']), dtype=bool)
+        for j in np.flatnonzero(mins > 0):
+            best = np.argsort(-per_dollar[:, j], kind='stable')[:per_nutrient]
+            working[best[np.isfinite(per_dollar[best, j])]] = True
+        return working
+
+    def _set_working_set(self, working):
+        """Rebuild the model over a new working set."""
+        self.working = working
+        self.food_items = self.full_catalog.subset(working)
+        self.catalog = catalog_arrays(self.food_items, self.nutrients)
+        self._build_model()
+
+    def _fingerprint_catalog(self):
+        """Identify the model by the full catalog rather than the working set."""
+        return self.full_arrays
+
+    def _include_items(self, keys):
+        """Add the given catalog items to the working set."""
+        wanted = np.isin(np.asarray(self.full_arrays['keys'], dtype=object), list(keys))
+        if (wanted & ~self.working).any():
+            self._set_working_set(self.working | wanted)
+
+    def _run_solver(self, start=None):
+        """Generate columns with the LP relaxation, then solve the integer model on the working set."""
+        per_nutrient = self.initial_items
+        start_keys = list(self.catalog['keys'])
+        self.iterations = []
+        start_time = time.time()
+        # The pricing LPs hold one allotment, released before the integer solve takes its own
+        with self._solver_threads() as threads:
+            backend = HighsBackend(time_limit=self.order_constraints.get('solver_time_limit', 900), threads=threads)
+            for iteration in range(self.max_iterations):
+                result = backend.solve_relaxation(self.matrices)
+                if not result.is_optimal:
+                    # Too few items for the nutrient bounds: widen the starting selection
+                    per_nutrient *= 2
+                    wider = self.working | self._initial_working_set(self.nutritional_constraints, self.nutrients, per_nutrient)
+                    if (wider == self.working).all():
+                        print("Column generation: the restricted LP has no feasible solution")
+                        return pulp.LpStatusInfeasible
+                    self._set_working_set(wider)
+                    continue
+
+                reduced_cost = self._reduced_costs(result.row_dual)
+                candidates = np.flatnonzero(~self.working & self.usable & (reduced_cost < -1e-7))
+                added = candidates[np.argsort(reduced_cost[candidates], kind='stable')][:self.columns_per_iteration]
+                self.iterations.append({
+                    'iteration': iteration + 1,
+                    'lp_objective': result.objective,
+                    'items': int(self.working.sum()),
+                    'added': len(added),
+                    'best_reduced_cost': float(reduced_cost[candidates].min()) if len(candidates) else 0.0
+                })
+                if self.show_progress:
+                    print(f"Column generation round {iteration + 1}: LP ${result.objective:.2f} "
+                          f"over {self.working.sum()} items, {len(added)} items priced in")
+                if len(added) == 0:
+                    self.lp_bound = result.objective
+                    break
+                self.generated_items += len(added)
+                self.generated_columns += len(added) * len(ITEM_FAMILIES) * len(self.weeks)
+                working = self.working.copy()
+                working[added] = True
+                self._set_working_set(working)
+            else:
+                print(f"Column generation stopped after {self.max_iterations} rounds with items still pricing out")
+
+        print(f"Column generation: {self.generated_items} items ({self.generated_columns} columns) generated, "
+              f"working set {self.working.sum()} of {len(self.full_catalog)} items "
+              f"in {time.time() - start_time:.1f}s")
+        self.progress.update('column_generation', bound=self.lp_bound)
+
+        # The start plan, if any, was built for the first working set; a heuristic
+        # plan is rebuilt for the final one, a cached plan is carried over
+        if self.warm_start and self.cache_hit != 'warm start':
+            start = self._run_warm_start()
+        elif start is not None:
+            start = self._extend_plan(start, start_keys)
+        return super()._run_solver(start)
+
+    def _extend_plan(self, plan, keys):
+        """Map a plan over the given item keys onto the current working set."""
+        index = {key: k for k, key in enumerate(self.catalog['keys'])}
+        positions = [index[key] for key in keys]
+        extended = {'order_week': plan['order_week']}
+        for family in ITEM_FAMILIES:
+            extended[family] = np.zeros((len(self.weeks), len(index)))
+            extended[family][:, positions] = plan[family]
+        return extended
+
+    def _reduced_costs(self, row_dual):
+        """
+        Price every catalog item with the duals of the restricted LP.
+
+        Returns:
+            np.ndarray: Most negative reduced cost of a serving per item
+        """
+        c = self.full_arrays
+        n_weeks = len(self.weeks)
+        blocks = self.matrices.row_blocks
+        nutrient_duals = row_dual[blocks['nutrition']].reshape(n_weeks, len(self.nutrients))
+        min_order_duals = row_dual[blocks['min_order']]
+
+        # Value of the nutrients of one serving eaten in each week (items x weeks)
+        value = c['nutrients'] @ nutrient_duals.T
+        # Best purchase week: the same week for perishables, any week up to w + 1 otherwise
+        best_until = np.maximum.accumulate(min_order_duals)
+        purchase_dual = np.where(
+            c['perishable'][:, None],
+            min_order_duals[None, :],
+            best_until[np.minimum(np.arange(n_weeks) + 1, n_weeks - 1)][None, :]
+        )
+        buy = c['cost'][:, None] * (1 - purchase_dual)
+        # Non-perishables eaten in the last week are not drawn from any inventory row
+        buy[~c['perishable'], n_weeks - 1] = 0.0
+        return (buy - value).min(axis=1)
+
+    def column_generation_report(self):
+        """
+        Summarize the column generation.
+
+        Returns:
+            dict: Pricing rounds, generated items and columns, working set size and
+                the LP bound over the whole catalog
+        """
+        return {
+            'iterations': self.iterations,
+            'generated_items': self.generated_items,
+            'generated_columns': self.generated_columns,
+            'working_set_items': int(self.working.sum()),
+            'catalog_items': len(self.full_catalog),
+            'lp_bound': self.lp_bound
+        }
@@ -0,0 +1,77 @@
+"""
+Shared CPU budget for concurrent solves.
+
+Every solve asks the budget for its solver threads before it starts and hands them
+back when it finishes. Requests are served first come, first served: a solve waits
+until it is at the head of the queue and enough threads are free, so concurrent
+solves never use more threads than the budget holds in total. The budget is built on
+multiprocessing primitives, so it can be shared by threads of one process and by
+worker processes that receive it when they are started.
+"""
+
+import contextlib
+import multiprocessing as mp
+import time
+
+
+class CpuBudget:
+    """Pool of solver threads handed out to solves in arrival order."""
+
+    def __init__(self, total_threads=None):
+        """
+        Args:
+            total_threads (int): Threads to hand out; defaults to every core
+        """
+        self.total_threads = total_threads or mp.cpu_count()
+        self._condition = mp.Condition()
+        self._free = mp.Value('i', self.total_threads, lock=False)
+        self._next_ticket = mp.Value('i', 0, lock=False)
+        self._serving = mp.Value('i', 0, lock=False)
+        self.jobs = []  # Allotments of this process: name, threads, wait and run time
+
+    @contextlib.contextmanager
+    def allot(self, requested=None, name=None):
+        """
+        Wait for an allotment of threads and hold it for the duration of the block.
+
+        Args:
+            requested (int): Threads wanted, capped at the budget; defaults to all of them
+            name (str): Job name for the report
+
+        Yields:
+            dict: This allotment's record with its 'name', 'threads', 'wait_time' and
+                'run_time', which is filled in when the block ends
+        """
+        threads = max(1, min(requested or self.total_threads, self.total_threads))
+        start_time = time.time()
+        with self._condition:
+            ticket = self._next_ticket.value
+            self._next_ticket.value += 1
+            while self._serving.value != ticket or self._free.value < threads:
+                self._condition.wait()
+            self._free.value -= threads
+            self._serving.value += 1
+            self._condition.notify_all()
+        granted = time.time()
+        job = {'name': name, 'threads': threads, 'wait_time': granted - start_time, 'run_time': None}
+        self.jobs.append(job)
+        try:
+            yield job
+        finally:
+            job['run_time'] = time.time() - granted
+            with self._condition:
+                self._free.value += threads
+                self._condition.notify_all()
+
+    @property
+    def free_threads(self):
+        with self._condition:
+            return self._free.value
+
+    def report(self):
+        """Print the wait and run time of every allotment made in this process."""
+        print(f"CPU budget of {self.total_threads} threads:")
+        for job in self.jobs:
+            run_time = f"{job['run_time']:.1f}s" if job['run_time'] is not None else "running"
+            print(f"  {job['name'] or 'solve'}: {job['threads']} threads, "
+                  f"waited {job['wait_time']:.1f}s, ran {run_time}")
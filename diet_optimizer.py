@@ -3,102 +3,223 @@ Diet optimization model using PuLP to minimize total cost while meeting nutritio
 Optimized for Apple Silicon with parallel processing.
 """
 
+import hashlib
+import json
 import pulp
 import pandas as pd
 import numpy as np
 import platform
 import multiprocessing as mp
-from concurrent.futures import ThreadPoolExecutor
 import os
-import time
-import sys
+import tempfile
+import contextlib
+from collections.abc import Mapping
 from datetime import datetime, timedelta
 
+from model_builder import (
+    ORDER_LINK_M, build_model_matrices, catalog_arrays, constrained_nutrients, derive_bounds, nutrient_bounds
+)
+from food_data_manager import FoodCatalog
+from highs_backend import HighsBackend, highs_available
+from ledger import InventoryLedger
+from solution_cache import SolutionCache, model_fingerprint
+from solver_progress import ProgressTracker, ConsoleProgressReporter, CbcLogFollower
+from stop_policies import StopController, CbcInterrupter, live_cbc_log_available
+from warm_start import WarmStartHeuristic
+
+# Numeric money columns of the formatted results
+CURRENCY_COLUMNS = ['Cost per Serving', 'Item Costs', 'Delivery Fee', 'Total Cost']
+
+
+def format_currency(df, columns=CURRENCY_COLUMNS):
+    """
+    Format money columns as dollar strings for display or export.
+    
+    Args:
+        df (pd.DataFrame): Formatted results table with numeric money columns
+        columns (list): Names of the money columns to format when present
+    
+    Returns:
+        pd.DataFrame: Copy of df with '$x.xx' strings in the money columns
+    """
+    formatted = df.copy()
+    for column in columns:
+        if column in formatted:
+            formatted[column] = formatted[column].map('${:.2f}'.format)
+    return formatted
+
+
+class LazyResults(Mapping):
+    """Read-only mapping whose values are computed on first access and then cached."""
+    
+    def __init__(self, factories):
+        """
+        Args:
+            factories (dict): Key -> function without arguments computing the value
+        """
+        self._factories = dict(factories)
+        self._values = {}
+    
+    def __getitem__(self, key):
+        if key not in self._values:
+            self._values[key] = self._factories[key]()
+        return self._values[key]
+    
+    def __iter__(self):
+        return iter(self._factories)
+    
+    def __len__(self):
+        return len(self._factories)
+
+
 class DietOptimizer:
     def __init__(self, food_items, nutritional_constraints, order_constraints):
         """
         Initialize the diet optimizer with custom constraints.
         
         Args:
-            food_items (dict): Dictionary of food items and their attributes
+            food_items (FoodCatalog or dict): Food items and their attributes
             nutritional_constraints (dict): Dictionary of nutritional constraints
             order_constraints (dict): Dictionary of order constraints
         """
-        self.food_items = food_items
+        self.food_items = food_items = FoodCatalog.from_items(food_items)
         self.nutritional_constraints = nutritional_constraints
         self.order_constraints = order_constraints
         self._has_solved = False  # Flag to track if we've already solved
         self._solution_status = None  # Store the solution status
         self.show_progress = order_constraints.get('solver_show_progress', True)
+        self.model_builder = order_constraints.get('model_builder', 'pulp')
+        # Substitute out variables implied by the package-size and perishable equalities
+        self.reduced_formulation = order_constraints.get('reduced_formulation', False)
+        self.bounds = None  # Derived per (week, item) upper bounds of the PuLP model
+        self.nutrients = constrained_nutrients(food_items, nutritional_constraints)
+        self.catalog = catalog_arrays(food_items, self.nutrients)  # Item attributes by position
+        self.nutrient_totals = {}  # (week, nutrient) -> bounded total variable of the PuLP model
+        self.matrices = None  # Sparse model when using the matrix builder
+        self._solution_vector = None  # Primal values from the HiGHS solve
+        self._solution_arrays = None  # Cached dense solution arrays
+        self._results = None  # Cached lazy results views
+        self._ledger = None  # Cached inventory ledger
+        self.progress = None  # Solver-reported progress of the last solve
+        self.stop_controller = None  # Early-termination policies of the last solve
+        self.stopped_by = None  # Description of the stop policy that stopped the solve, if any
+        self.stop_timing = None  # Solve times at which a stop policy fired and the solver stopped
+        self._lp_lower_bound = None  # Cached LP relaxation bound
+        self.warm_start = order_constraints.get('solver_warm_start', False)
+        self.solve_mode = order_constraints.get('solve_mode', 'mip')  # 'mip' or 'heuristic'
+        cache_dir = order_constraints.get('solution_cache_dir')
+        self.solution_cache = SolutionCache(
+            cache_dir, max_bytes=order_constraints.get('solution_cache_max_mb', 100) * 1024 ** 2
+        ) if cache_dir else None
+        self.cache_hit = None  # 'exact' or 'warm start' if the last solve used a cached plan
+        self.start_plan = None  # Optional weeks x items arrays per variable family to start the MIP from
+        self.replanned_through = None  # Last executed week locked in by replan, if any
         
-        # Set up parallel processing
-        self.num_cores = mp.cpu_count()
+        # Set up parallel processing; with a shared CPU budget the solver threads are
+        # allotted from it when the solve starts
+        self.cpu_budget = order_constraints.get('cpu_budget')
+        self.thread_allotments = []  # Threads, wait and run time of each budgeted solve
+        self.num_cores = order_constraints.get('solver_threads') or (
+            self.cpu_budget.total_threads if self.cpu_budget is not None else mp.cpu_count()
+        )
         
         # Configure solver based on architecture
-        if platform.processor() == 'arm':
-            # For Apple Silicon, use HiGHS solver
-            try:
-                # Import highspy only when needed
-                import highspy
-                self.solver = pulp.PULP_CBC_CMD(
-                    msg=False,  # Disable verbose progress messages
-                    timeLimit=order_constraints.get('solver_time_limit', 900),
-                    threads=self.num_cores,
-                    gapRel=order_constraints.get('solver_mip_gap', 0.05),
-                    options=['highs']  # Use HiGHS as the underlying solver
-                )
-                print("Using CBC with HiGHS backend optimized for Apple Silicon")
-            except Exception as e:
-                print(f"Warning: Could not initialize HiGHS solver ({e}). Using standard CBC.")
-                self.solver = pulp.PULP_CBC_CMD(
-                    msg=False,  # Disable verbose progress messages
-                    timeLimit=order_constraints.get('solver_time_limit', 900),
-                    threads=self.num_cores,
-                    gapRel=order_constraints.get('solver_mip_gap', 0.05)
-                )
+        # For Apple Silicon, default to the in-process HiGHS solver
+        default_backend = 'highs' if platform.processor() == 'arm' and highs_available() else 'cbc'
+        self.solver_backend = order_constraints.get('solver_backend') or default_backend
+        if self.solver_backend == 'highs' and not highs_available():
+            print("Warning: highspy is not installed. Using standard CBC.")
+            self.solver_backend = 'cbc'
+        
+        if self.solver_backend == 'highs' or self.model_builder == 'matrix':
+            # HiGHS solves the sparse matrix model directly, without model files
+            self.solver_backend = 'highs'
+            self.model_builder = 'matrix'
+            self.solver = HighsBackend(
+                time_limit=order_constraints.get('solver_time_limit', 900),
+                mip_gap=order_constraints.get('solver_mip_gap', 0.05),
+                threads=self.num_cores
+            )
+            print("Using in-process HiGHS solver")
+        elif platform.processor() == 'arm':
+            self.solver = pulp.PULP_CBC_CMD(
+                msg=False,  # Disable verbose progress messages
+                timeLimit=order_constraints.get('solver_time_limit', 900),
+                threads=self.num_cores,
+                gapRel=order_constraints.get('solver_mip_gap', 0.05)
+            )
         else:
             # For Intel processors
             self.solver = pulp.PULP_CBC_CMD(
                 msg=False,  # Disable verbose progress messages
                 timeLimit=order_constraints.get('solver_time_limit', 300),
-                threads=True,
+                threads=self.num_cores,
                 gapRel=order_constraints.get('solver_mip_gap', 0.01)
             )
         
-        self.model = pulp.LpProblem("Diet_Optimization", pulp.LpMinimize)
         self.weeks = range(order_constraints['total_weeks'])
-        self.items = food_items.keys()
+        self._build_model()
+        
+        # Configure solver parameters for better performance
+        print(f"Configuring solver to use {self.num_cores} cores...")
         
-        # Decision Variables
+        # Additional solver configuration for better convergence
+        if self.model is not None:
+            self.model.setSolver(self.solver)
+    
+    def _build_model(self):
+        """Build the model for the current food items with the configured builder."""
+        self.items = self.food_items.keys()
+        if self.model_builder == 'matrix':
+            # Assemble the whole model as sparse coefficient matrices
+            print("Building sparse optimization model...")
+            self.model = None
+            self.matrices = build_model_matrices(self.food_items, self.nutritional_constraints, self.order_constraints)
+        else:
+            self._build_pulp_model()
+    
+    def model_digest(self):
+        """
+        Hash the built model: its variables, bounds, objective and rows in order.
+        
+        Identical inputs build identical models, so two builds with the same digest
+        give the solver byte-identical input.
+        
+        Returns:
+            str: SHA-256 hex digest
+        """
+        digest = hashlib.sha256()
+        if self.matrices is not None:
+            m = self.matrices
+            for array in (m.A.indptr, m.A.indices, m.A.data, m.row_lower, m.row_upper,
+                          m.cost, m.col_lower, m.col_upper, m.integrality):
+                digest.update(np.ascontiguousarray(array).tobytes())
+        else:
+            digest.update(json.dumps(self.model.to_dict(), sort_keys=True).encode())
+        return digest.hexdigest()
+    
+    def _build_pulp_model(self):
+        """Build the model one PuLP expression at a time."""
+        self.model = pulp.LpProblem("Diet_Optimization", pulp.LpMinimize)
+        
+        # Decision Variables, created in a fixed order so the model is the same every build
         print("Creating decision variables...")
-        with ThreadPoolExecutor(max_workers=self.num_cores) as executor:
-            futures = [
-                executor.submit(self._create_order_variables),
-                executor.submit(self._create_eat_variables),
-                executor.submit(self._create_order_week_variables),
-                executor.submit(self._create_inventory_variables),
-                executor.submit(self._create_package_variables)
-            ]
-            
-            self.order_vars = futures[0].result()
-            self.eat_vars = futures[1].result()
-            self.order_week = futures[2].result()
-            self.inventory = futures[3].result()
-            self.package_vars = futures[4].result()
+        self.order_vars = self._create_order_variables()
+        self.eat_vars = self._create_eat_variables()
+        self.order_week = self._create_order_week_variables()
+        self.inventory = self._create_inventory_variables()
+        self.package_vars = self._create_package_variables()
+        
+        if self.reduced_formulation:
+            self._substitute_implied_variables()
+        if self.order_constraints.get('derived_bounds', True):
+            self._apply_derived_bounds()
+        self._apply_serving_limits()
         
         # Set up the model
         print("Setting up optimization model...")
         self._setup_objective_function()
         self._setup_constraints()
-        
-        # Configure solver parameters for better performance
-        print(f"Configuring solver to use {self.num_cores} cores...")
-        os.environ['OMP_NUM_THREADS'] = str(self.num_cores)
-        os.environ['MKL_NUM_THREADS'] = str(self.num_cores)
-        os.environ['OPENBLAS_NUM_THREADS'] = str(self.num_cores)
-        
-        # Additional solver configuration for better convergence
-        self.model.setSolver(self.solver)
     
     def _create_order_variables(self):
         """Create variables for ordering food items each week."""
@@ -144,13 +265,36 @@ class DietOptimizer:
             cat='Integer'
         )
     
+    def _substitute_implied_variables(self):
+        """Replace orders, and perishable eat and inventory, with package expressions."""
+        size, perishable = self.catalog['package_size'], self.catalog['perishable']
+        for w in self.weeks:
+            for k, i in enumerate(self.items):
+                order = self.package_vars[w, i] * size[k]
+                self.order_vars[w, i] = order
+                if perishable[k]:
+                    self.eat_vars[w, i] = order
+                    self.inventory[w, i] = order
+    
+    def _apply_derived_bounds(self):
+        """Set the derived order, package and inventory bounds as variable upper bounds."""
+        self.bounds = derive_bounds(self.catalog, self.order_constraints)
+        families = {'order': self.order_vars, 'packages': self.package_vars, 'inventory': self.inventory}
+        for name, variables in families.items():
+            for w in self.weeks:
+                for k, i in enumerate(self.items):
+                    # Substituted variables are bounded through the packages
+                    if isinstance(variables[w, i], pulp.LpVariable):
+                        variables[w, i].upBound = self.bounds[name][w, k]
+    
     def _setup_objective_function(self):
         """Set up the objective function to minimize total cost."""
         # Cost of food items
+        cost = self.catalog['cost']
         item_costs = pulp.lpSum(
-            self.order_vars[w, i] * self.food_items[i]['cost']
+            self.order_vars[w, i] * cost[k]
             for w in self.weeks
-            for i in self.items
+            for k, i in enumerate(self.items)
         )
         
         # Delivery fees
@@ -162,211 +306,221 @@ class DietOptimizer:
         self.model += item_costs + delivery_costs
     
     def _setup_constraints(self):
-        """Set up all constraints for the optimization model."""
-        # Set up constraints in parallel
-        with ThreadPoolExecutor(max_workers=self.num_cores) as executor:
-            futures = [
-                executor.submit(self._add_inventory_constraints),
-                executor.submit(self._add_nutritional_constraints),
-                executor.submit(self._add_order_constraints),
-                executor.submit(self._add_serving_limit_constraints),
-                executor.submit(self._add_perishable_constraints),
-                executor.submit(self._add_package_size_constraints)
-            ]
-            # Wait for all constraints to be added
-            for future in futures:
-                future.result()
-    
-    def _add_inventory_constraints(self):
-        """Add constraints for inventory tracking and balance."""
-        # Initial inventory is zero
-        for i in self.items:
-            self.model += self.inventory[0, i] == self.order_vars[0, i]
-        
-        # Inventory balance constraints
-        for w in self.weeks[1:]:
-            for i in self.items:
-                if self.food_items[i]['perishable']:
+        """
+        Add all constraints to the model, one family at a time in a fixed order.
+        
+        Each family is generated as a block of named rows without touching the model
+        and the blocks are added in the row order of the sparse model, so identical
+        inputs give identical models.
+        """
+        nutrition_rows, self.nutrient_totals = self._nutrition_rows()
+        row_blocks = [self._inventory_rows(), nutrition_rows, self._min_order_rows(), self._order_link_rows()]
+        if not self.reduced_formulation:
+            # Both families hold by construction in the reduced formulation
+            row_blocks += [self._perishable_rows(), self._package_size_rows()]
+        for rows in row_blocks:
+            for name, constraint in rows:
+                self.model.addConstraint(constraint, name)
+    
+    def _inventory_rows(self):
+        """Rows for inventory tracking and balance."""
+        # Initial inventory is the non-perishable stock carried in (zero by default),
+        # or the stock left at the end of the horizon for a repeating cycle
+        initial_inventory = self.order_constraints.get('initial_inventory') or {}
+        cyclic = self.order_constraints.get('cyclic_inventory', False)
+        last = self.weeks[-1]
+        perishable = self.catalog['perishable']
+        rows = []
+        for w in self.weeks:
+            for k, i in enumerate(self.items):
+                name = f"inventory_{w}_{k}"
+                if perishable[k]:
                     # Perishable items: new inventory is just what was ordered
-                    self.model += self.inventory[w, i] == self.order_vars[w, i]
-                else:
+                    if not self.reduced_formulation:
+                        rows.append((name, self.inventory[w, i] == self.order_vars[w, i]))
+                elif w > 0 or cyclic:
                     # Non-perishable items: previous inventory + orders - consumption
-                    self.model += (self.inventory[w, i] == 
-                                 self.inventory[w-1, i] + 
-                                 self.order_vars[w, i] - 
-                                 self.eat_vars[w-1, i])
+                    previous = w - 1 if w > 0 else last
+                    rows.append((name, self.inventory[w, i] ==
+                                 self.inventory[previous, i] +
+                                 self.order_vars[w, i] -
+                                 self.eat_vars[previous, i]))
+                else:
+                    rows.append((name, self.inventory[0, i] == initial_inventory.get(i, 0) + self.order_vars[0, i]))
         
         # No final inventory constraint - cost minimization will handle waste
+        return rows
     
-    def _add_nutritional_constraints(self):
-        """Add weekly nutritional requirement constraints."""
-        for w in self.weeks:
-            # Calories
-            self.model += pulp.lpSum(
-                self.eat_vars[w, i] * self.food_items[i]['calories']
-                for i in self.items
-            ) >= self.nutritional_constraints['calories']['min']
-            
-            self.model += pulp.lpSum(
-                self.eat_vars[w, i] * self.food_items[i]['calories']
-                for i in self.items
-            ) <= self.nutritional_constraints['calories']['max']
-            
-            # Protein
-            self.model += pulp.lpSum(
-                self.eat_vars[w, i] * self.food_items[i]['protein']
-                for i in self.items
-            ) >= self.nutritional_constraints['protein']['min']
-            
-            self.model += pulp.lpSum(
-                self.eat_vars[w, i] * self.food_items[i]['protein']
-                for i in self.items
-            ) <= self.nutritional_constraints['protein']['max']
-            
-            # Fat
-            self.model += pulp.lpSum(
-                self.eat_vars[w, i] * self.food_items[i]['fat']
-                for i in self.items
-            ) >= self.nutritional_constraints['fat']['min']
-            
-            self.model += pulp.lpSum(
-                self.eat_vars[w, i] * self.food_items[i]['fat']
-                for i in self.items
-            ) <= self.nutritional_constraints['fat']['max']
-            
-            # Carbs
-            self.model += pulp.lpSum(
-                self.eat_vars[w, i] * self.food_items[i]['carbs']
-                for i in self.items
-            ) >= self.nutritional_constraints['carbs']['min']
-            
-            self.model += pulp.lpSum(
-                self.eat_vars[w, i] * self.food_items[i]['carbs']
-                for i in self.items
-            ) <= self.nutritional_constraints['carbs']['max']
-            
-            # Fiber
-            self.model += pulp.lpSum(
-                self.eat_vars[w, i] * self.food_items[i]['fiber']
-                for i in self.items
-            ) >= self.nutritional_constraints['fiber']['min']
-            
-            self.model += pulp.lpSum(
-                self.eat_vars[w, i] * self.food_items[i]['fiber']
-                for i in self.items
-            ) <= self.nutritional_constraints['fiber']['max']
-            
-            # Sugar
-            self.model += pulp.lpSum(
-                self.eat_vars[w, i] * self.food_items[i]['sugar']
-                for i in self.items
-            ) >= self.nutritional_constraints['sugar']['min']
-            
-            self.model += pulp.lpSum(
-                self.eat_vars[w, i] * self.food_items[i]['sugar']
-                for i in self.items
-            ) <= self.nutritional_constraints['sugar']['max']
-    
-    def _add_order_constraints(self):
-        """Add constraints related to ordering."""
-        # Minimum order value constraint
+    def _nutrition_rows(self):
+        """
+        Rows for the weekly nutritional requirements.
+        
+        Each nutrient total is built once per week and bounded through a total
+        variable with the min and max as bounds, so it takes a single row.
+        
+        Returns:
+            tuple: (named rows, {(week, nutrient): total variable})
+        """
+        mins, maxs = nutrient_bounds(self.nutritional_constraints, self.nutrients)
+        keys = list(self.items)
+        nutrients = self.catalog['nutrients']
+        rows = []
+        totals = {}
         for w in self.weeks:
-            self.model += pulp.lpSum(
-                self.order_vars[w, i] * self.food_items[i]['cost']
-                for i in self.items
-            ) >= self.order_constraints['min_order_value'] * self.order_week[w]
-            
-            # Link order variables to order_week
-            for i in self.items:
-                self.model += self.order_vars[w, i] <= 1000 * self.order_week[w]
+            for j, (n, low, high) in enumerate(zip(self.nutrients, mins, maxs)):
+                total = pulp.LpVariable(
+                    f"nutrient_{n}_{w}",
+                    lowBound=low,
+                    upBound=high if np.isfinite(high) else None
+                )
+                totals[w, n] = total
+                rows.append((f"nutrition_{w}_{j}", total == pulp.lpSum(
+                    self.eat_vars[w, keys[k]] * nutrients[k, j]
+                    for k in np.flatnonzero(nutrients[:, j])
+                )))
+        return rows, totals
     
-    def _add_serving_limit_constraints(self):
-        """Add weekly serving limit constraints."""
-        for w in self.weeks:
-            for i in self.items:
-                self.model += self.eat_vars[w, i] <= self.food_items[i]['weekly_limit']
+    def _min_order_rows(self):
+        """Rows for the minimum order value of every week with an order."""
+        cost = self.catalog['cost']
+        return [
+            (f"min_order_{w}", pulp.lpSum(
+                self.order_vars[w, i] * cost[k]
+                for k, i in enumerate(self.items)
+            ) >= self.order_constraints['min_order_value'] * self.order_week[w])
+            for w in self.weeks
+        ]
     
-    def _add_perishable_constraints(self):
-        """Add constraints for perishable items."""
+    def _order_link_rows(self):
+        """Rows linking order variables to order_week, using the derived order bound as big-M."""
+        rows = []
         for w in self.weeks:
-            for i in self.items:
-                if self.food_items[i]['perishable']:
-                    # Must eat perishable items in the same week
-                    self.model += self.eat_vars[w, i] == self.order_vars[w, i]
+            for k, i in enumerate(self.items):
+                link_m = self.bounds['order'][w, k] if self.bounds is not None else ORDER_LINK_M
+                rows.append((f"order_link_{w}_{k}", self.order_vars[w, i] <= link_m * self.order_week[w]))
+        return rows
     
-    def _add_package_size_constraints(self):
-        """Add constraints to ensure orders are in multiples of package sizes."""
+    def _apply_serving_limits(self):
+        """Bound weekly consumption by each item's weekly limit through variable bounds."""
+        weekly_limit = self.catalog['weekly_limit']
+        size = self.catalog['package_size']
         for w in self.weeks:
-            for i in self.items:
-                # Link order quantities to number of packages
-                self.model += self.order_vars[w, i] == (
-                    self.package_vars[w, i] * self.food_items[i]['package_size']
-                )
+            for k, i in enumerate(self.items):
+                if isinstance(self.eat_vars[w, i], pulp.LpVariable):
+                    self.eat_vars[w, i].upBound = weekly_limit[k]
+                else:
+                    # Substituted perishable consumption is size * packages
+                    packages = self.package_vars[w, i]
+                    limit = np.floor(round(weekly_limit[k] / size[k], 9))
+                    packages.upBound = limit if packages.upBound is None else min(packages.upBound, limit)
+    
+    def _perishable_rows(self):
+        """Rows for perishable items."""
+        perishable = self.catalog['perishable']
+        # Must eat perishable items in the same week
+        return [
+            (f"perishable_{w}_{k}", self.eat_vars[w, i] == self.order_vars[w, i])
+            for w in self.weeks
+            for k, i in enumerate(self.items)
+            if perishable[k]
+        ]
+    
+    def _package_size_rows(self):
+        """Rows to ensure orders are in multiples of package sizes."""
+        size = self.catalog['package_size']
+        # Link order quantities to number of packages
+        return [
+            (f"package_size_{w}_{k}", self.order_vars[w, i] == self.package_vars[w, i] * size[k])
+            for w in self.weeks
+            for k, i in enumerate(self.items)
+        ]
     
     def solve(self):
         """Solve the optimization model."""
         # If we already have a solution, return the cached status silently
         if self._has_solved:
             return self._solution_status
+        self._solution_arrays = None
+        self._results = None
+        self._ledger = None
             
         print(f"\nSolving optimization model using {self.num_cores} cores...")
         print(f"Solver: {self.solver.__class__.__name__}")
         
-        # Start time for progress tracking
-        start_time = time.time()
         time_limit = self.order_constraints.get('solver_time_limit', 900)
         
-        # Show a simple progress indicator if progress display is enabled
+        # Track solver-reported incumbent, bound and gap
+        progress_callback = self.order_constraints.get('solver_progress_callback')
+        self.progress = ProgressTracker(
+            callbacks=[progress_callback] if progress_callback else [],
+            timeline_path=self.order_constraints.get('solver_progress_log')
+        )
         if self.show_progress:
             print("Solving optimization problem...")
-            
-            # Variable to control the progress indicator thread
-            solving_in_progress = [True]  # Using a list for mutable reference
-            
-            def progress_indicator():
-                progress_chars = 40  # Width of the progress bar
-                try:
-                    while solving_in_progress[0]:
-                        elapsed = time.time() - start_time
-                        if elapsed >= time_limit:
-                            break
-                            
-                        # Calculate progress based on elapsed time vs time limit
-                        progress = min(elapsed / time_limit, 1.0)
-                        filled = int(progress_chars * progress)
-                        
-                        # Update progress bar
-                        sys.stdout.write("\r[" + "=" * filled + " " * (progress_chars - filled) + 
-                                        f"] {elapsed:.1f}s / {time_limit:.1f}s")
-                        sys.stdout.flush()
-                        time.sleep(0.5)
-                except Exception as e:
-                    print(f"\nProgress indicator error: {e}")
-            
-            # Start progress indicator in a separate thread
-            with ThreadPoolExecutor(max_workers=1) as executor:
-                progress_future = executor.submit(progress_indicator)
-                
-                try:
-                    # Solve the model in the main thread
-                    status = self.model.solve(self.solver)
-                finally:
-                    # Signal the progress thread to stop
-                    solving_in_progress[0] = False
-                
-                # Wait for progress thread to finish
-                try:
-                    progress_future.result(timeout=1.0)
-                except:
-                    pass
-                
-            # Complete the progress bar
-            elapsed = time.time() - start_time
-            sys.stdout.write("\r[" + "=" * 40 + f"] Completed in {elapsed:.1f}s          \n")
-            sys.stdout.flush()
-        else:
-            # Just solve without progress indicator
-            status = self.model.solve(self.solver)
+            self.progress.add_callback(ConsoleProgressReporter(time_limit))
+        
+        # Early-termination policies are evaluated on every progress update
+        stop_policies = self.order_constraints.get('solver_stop_policies') or []
+        if stop_policies and self.matrices is None and not live_cbc_log_available():
+            raise ValueError("Stop policies on CBC need pseudo-terminals to follow its log; "
+                             "use solver_backend='highs' instead")
+        self.stop_controller = StopController(stop_policies) if stop_policies else None
+        if self.stop_controller is not None:
+            for policy in stop_policies:
+                policy.prepare(self)
+            self.progress.add_callback(self.stop_controller)
+        
+        self.progress.start()
+        self.cache_hit = None
+        cache_key = self._cache_key() if self.solution_cache is not None else None
+        try:
+            cached = self._cached_plan(self.solution_cache.get(*cache_key)) if cache_key else None
+            if cached is not None:
+                # The same model was solved before: reuse its plan
+                print(f"Using the cached plan (${cached['objective']:.2f})")
+                self.cache_hit = 'exact'
+                self.progress.update('cache', incumbent=cached['objective'])
+                status = self._use_start_solution(cached)
+            else:
+                start = None
+                if self.warm_start or self.solve_mode == 'heuristic':
+                    start = self._run_warm_start()
+                if cache_key and self.solve_mode == 'mip':
+                    start = self._cached_start(self.solution_cache.nearest(*cache_key), start)
+                if self.start_plan is not None and self.solve_mode == 'mip':
+                    start = self._better_start(self.start_plan, start, "the given start plan")
+                if self.solve_mode == 'heuristic' or (start is not None and self.stop_controller is not None
+                                                      and self.stop_controller.should_stop):
+                    # Use the heuristic plan as the answer without running the MIP
+                    status = self._use_start_solution(start)
+                    if self.solve_mode == 'mip':
+                        self.stop_controller.interrupted = True
+                else:
+                    status = self._run_solver(start)
+        finally:
+            self.progress.finish(self.solver_backend)
+        
+        if self.show_progress:
+            summary = self.progress.summary()
+            first_feasible = summary['time_to_first_feasible']
+            print(f"Completed in {summary['elapsed']:.1f}s" +
+                  (f" (first feasible solution after {first_feasible:.1f}s)" if first_feasible is not None else ""))
+        
+        # Record which stop policy ended the solve, if any; a policy that only fired
+        # once the solver had finished on its own did not stop anything
+        if self.stop_controller is not None and self.stop_controller.fired is not None:
+            self.stop_timing = {
+                'fired_at': self.stop_controller.fired_at,
+                'stopped_at': self.progress.summary()['elapsed']
+            }
+            timing = (f"met at {self.stop_timing['fired_at']:.1f}s, "
+                      f"solver stopped at {self.stop_timing['stopped_at']:.1f}s")
+            if self.stop_controller.interrupted:
+                self.stopped_by = self.stop_controller.fired.describe()
+                print(f"Stopped early by {self.stopped_by} ({timing})")
+            else:
+                print(f"Stop policy {self.stop_controller.fired.describe()} was {timing}, "
+                      "after the solver had finished on its own")
         
         # Cache the solution status and mark as solved BEFORE printing results
         self._has_solved = True
@@ -374,408 +528,645 @@ class DietOptimizer:
         
         # Print the final status
         if self._solution_status:
-            print(f"Found optimal solution with objective value: ${pulp.value(self.model.objective):.2f}")
+            print(f"Found optimal solution with objective value: ${self._objective_value():.2f}")
+            if cache_key and self.cache_hit != 'exact':
+                self.solution_cache.put(
+                    *cache_key, self.catalog['keys'], self.solution_arrays(), self._objective_value()
+                )
         else:
             print("Failed to find optimal solution")
         
         return self._solution_status
     
-    def get_results(self):
-        """Get the optimization results."""
+    def _cache_key(self):
+        """Return the (fingerprint, structure) of the model for the solution cache."""
+        return model_fingerprint(
+            self._fingerprint_catalog(),
+            self.nutritional_constraints,
+            self.order_constraints,
+            optimizer=type(self).__name__,
+            solver_backend=self.solver_backend
+        )
+    
+    def _fingerprint_catalog(self):
+        """Return the catalog arrays that identify the model."""
+        return self.catalog
+    
+    def _include_items(self, keys):
+        """Make sure the model has the given items; the base model always has all of them."""
+    
+    def _cached_plan(self, entry):
+        """
+        Map a cached plan onto the items of the model.
+        
+        Returns:
+            dict: weeks x items arrays per variable family plus 'objective', or None
+                if there is no entry or it uses items the model does not have
+        """
+        if entry is None:
+            return None
+        used = np.abs(entry['order']).sum(axis=0) + np.abs(entry['eat']).sum(axis=0) > 0
+        self._include_items([key for key, u in zip(entry['keys'], used) if u])
+        index = {key: k for k, key in enumerate(self.catalog['keys'])}
+        cached = [k for k, key in enumerate(entry['keys']) if key in index]
+        if used.sum() > used[cached].sum():
+            return None
+        positions = [index[entry['keys'][k]] for k in cached]
+        shape = (len(self.weeks), len(self.catalog['keys']))
+        plan = {'order_week': entry['order_week'], 'objective': entry['objective']}
+        for family in ('order', 'eat', 'inventory', 'packages'):
+            plan[family] = np.zeros(shape)
+            plan[family][:, positions] = entry[family][:, cached]
+        return plan
+    
+    def _cached_start(self, entry, start):
+        """Offer the cached plan of a similar model as the start solution; see _better_start."""
+        plan = self._better_start(self._cached_plan(entry), start, "the cached plan of a similar model")
+        if plan is not start:
+            self.cache_hit = 'warm start'
+        return plan
+    
+    def _better_start(self, plan, start, description):
+        """
+        Choose between an offered plan and the heuristic start, if any.
+        
+        The plan is used only if it is feasible for this model and cheaper than the
+        heuristic start.
+        
+        Returns:
+            dict: The start plan to use
+        """
+        if plan is None:
+            return start
+        matrices = self.matrices
+        if matrices is None:
+            matrices = build_model_matrices(self.food_items, self.nutritional_constraints, self.order_constraints)
+        x = matrices.pack(plan)
+        if not matrices.is_feasible(x):
+            print(f"Not starting from {description}: it is infeasible for this model")
+            return start
+        objective = matrices.objective(x)
+        if start is not None and matrices.objective(matrices.pack(start)) <= objective:
+            return start
+        print(f"Starting from {description}, costing ${objective:.2f}")
+        self.progress.update('start', incumbent=objective)
+        return plan
+    
+    def _run_warm_start(self):
+        """
+        Construct a feasible plan with the warm start heuristic.
+        
+        The plan is reported to the progress tracker as the first incumbent.
+        
+        Returns:
+            dict: weeks x items arrays per variable family, or None if the
+                heuristic found no feasible plan
+        """
+        matrices = self.matrices
+        if matrices is None:
+            matrices = build_model_matrices(self.food_items, self.nutritional_constraints, self.order_constraints)
+        heuristic = WarmStartHeuristic(self.food_items, self.nutritional_constraints, self.order_constraints, matrices)
+        x = heuristic.run()
+        if x is None:
+            print("Warm start heuristic found no feasible plan")
+            return None
+        print(f"Warm start plan costs ${heuristic.objective:.2f} (built in {heuristic.run_time:.2f}s)")
+        self.progress.update('heuristic', incumbent=heuristic.objective)
+        return matrices.unpack(x)
+    
+    def _use_start_solution(self, start):
+        """Store a heuristic plan as the solution and return a PuLP status code."""
+        if start is None:
+            return pulp.LpStatusNotSolved
+        if self.matrices is None:
+            self._set_pulp_values(start)
+        else:
+            self._solution_vector = self.matrices.pack(start)
+        return pulp.LpStatusOptimal
+    
+    def _run_solver(self, start=None):
+        """Run the configured solver, optionally from a start plan, and return a PuLP status code."""
+        if self.matrices is None:
+            return self._solve_pulp_model(start)
+        return self._solve_matrix_model(start)
+    
+    @contextlib.contextmanager
+    def _solver_threads(self):
+        """Hold the solver threads for a solve, waiting for an allotment if a CPU budget is shared."""
+        if self.cpu_budget is None:
+            yield self.num_cores
+            return
+        name = self.order_constraints.get('job_name') or f"{type(self).__name__} ({len(self.weeks)} weeks)"
+        with self.cpu_budget.allot(self.num_cores, name=name) as job:
+            self.thread_allotments.append(job)
+            if self.show_progress:
+                print(f"Allotted {job['threads']} of {self.cpu_budget.total_threads} threads "
+                      f"after waiting {job['wait_time']:.1f}s")
+            yield job['threads']
+    
+    def _solve_pulp_model(self, start=None):
+        """Solve the PuLP model with CBC, following its log for progress updates."""
+        with self._solver_threads() as threads:
+            self.solver.optionsDict['threads'] = threads
+            return self._run_cbc(start)
+    
+    def _run_cbc(self, start=None):
+        """Run CBC on the PuLP model, optionally from a start plan."""
+        if start is not None:
+            # CBC reads the variable values as its MIP start
+            self._set_pulp_values(start)
+            self.solver.optionsDict['warmStart'] = True
+        with CbcInterrupter() as interrupter:
+            log_path = None
+            if interrupter.output_fd is not None:
+                # CBC writes to a terminal line by line, so its progress is followed live
+                follower = CbcLogFollower(None, self.progress, fd=interrupter.output_fd)
+            else:
+                # Without terminals CBC can only log to a file, which it buffers
+                log_fd, log_path = tempfile.mkstemp(suffix='.log', prefix='cbc_')
+                os.close(log_fd)
+                self.solver.optionsDict['logPath'] = log_path
+                follower = CbcLogFollower(log_path, self.progress)
+            if self.stop_controller is not None:
+                self.stop_controller.add_stop_handler(interrupter.interrupt)
+            follower.start()
+            try:
+                return self.model.solve(self.solver)
+            finally:
+                follower.stop()
+                self.solver.optionsDict.pop('logPath', None)
+                self.solver.optionsDict.pop('warmStart', None)
+                if log_path is not None:
+                    os.remove(log_path)
+    
+    def _solve_matrix_model(self, start=None):
+        """Solve the sparse model in-process with HiGHS."""
+        should_stop = None
+        if self.stop_controller is not None:
+            should_stop = lambda: self.stop_controller.should_stop
+        with self._solver_threads() as threads:
+            self.solver.threads = threads
+            result = self.solver.solve(
+                self.matrices,
+                progress=self.progress,
+                should_stop=should_stop,
+                initial_solution=self.matrices.pack(start) if start is not None else None
+            )
+        if result.model_status == 'kInterrupt' and self.stop_controller is not None:
+            self.stop_controller.interrupted = True
+        if not result.has_solution:
+            return pulp.LpStatusInfeasible if result.is_infeasible else pulp.LpStatusNotSolved
+        self._solution_vector = result.x
+        return pulp.LpStatusOptimal
+    
+    def lp_lower_bound(self):
+        """Return the LP relaxation bound of the model, solved once with HiGHS."""
+        if self._lp_lower_bound is None:
+            matrices = self.matrices
+            if matrices is None:
+                matrices = build_model_matrices(self.food_items, self.nutritional_constraints, self.order_constraints)
+            backend = self.solver if isinstance(self.solver, HighsBackend) else HighsBackend(
+                time_limit=self.order_constraints.get('solver_time_limit', 900)
+            )
+            with self._solver_threads() as threads:
+                backend.threads = threads
+                result = backend.solve_relaxation(matrices)
+            self._lp_lower_bound = result.objective if result.is_optimal else None
+        return self._lp_lower_bound
+    
+    def bound_tightening_report(self):
+        """
+        Compare the root LP bound with and without the derived bounds.
+        
+        Returns:
+            dict: LP relaxation bound of the model with the fixed big-M and of the
+                model with derived bounds, and the absolute and relative improvement
+        """
+        backend = self.solver if isinstance(self.solver, HighsBackend) else HighsBackend(
+            time_limit=self.order_constraints.get('solver_time_limit', 900)
+        )
+        lp_bounds = {}
+        with self._solver_threads() as threads:
+            backend.threads = threads
+            for derived in (False, True):
+                constraints = dict(self.order_constraints, derived_bounds=derived)
+                matrices = build_model_matrices(self.food_items, self.nutritional_constraints, constraints)
+                result = backend.solve_relaxation(matrices)
+                lp_bounds[derived] = result.objective if result.is_optimal else None
+        
+        report = {'fixed_big_m': lp_bounds[False], 'derived_bounds': lp_bounds[True],
+                  'improvement': None, 'relative_improvement': None}
+        if lp_bounds[False] is not None and lp_bounds[True] is not None:
+            report['improvement'] = lp_bounds[True] - lp_bounds[False]
+            report['relative_improvement'] = report['improvement'] / max(abs(lp_bounds[False]), 1e-9)
+            print(f"Root LP bound: ${lp_bounds[False]:.2f} with big-M {ORDER_LINK_M}, "
+                  f"${lp_bounds[True]:.2f} with derived bounds "
+                  f"(+${report['improvement']:.2f}, {report['relative_improvement'] * 100:+.1f}%)")
+        return report
+    
+    def _objective_value(self):
+        """Return the objective value of the current solution."""
+        if self.matrices is None:
+            return pulp.value(self.model.objective)
+        return self.matrices.objective(self._solution_vector)
+    
+    def _pulp_variables(self):
+        """Return the PuLP variables of each per (week, item) family."""
+        return {
+            'order': self.order_vars,
+            'eat': self.eat_vars,
+            'inventory': self.inventory,
+            'packages': self.package_vars
+        }
+    
+    def _set_pulp_values(self, values):
+        """
+        Assign weeks x items arrays per variable family to the PuLP variables.
+        
+        Bounds are not checked, since the executed weeks of a re-plan hold realised
+        values that may lie outside them.
+        """
+        for name, variables in self._pulp_variables().items():
+            for w in self.weeks:
+                for k, i in enumerate(self.items):
+                    # Substituted variables are expressions and follow from the packages
+                    if isinstance(variables[w, i], pulp.LpVariable):
+                        variables[w, i].setInitialValue(values[name][w, k], check=False)
+        for w in self.weeks:
+            self.order_week[w].setInitialValue(values['order_week'][w], check=False)
+        nutrients = self.catalog['nutrients']
+        for (w, n), total in self.nutrient_totals.items():
+            total.setInitialValue(values['eat'][w] @ nutrients[:, self.nutrients.index(n)], check=False)
+    
+    def _solution_values(self):
+        """Extract solution values as weeks x items arrays per variable family."""
+        if self.matrices is not None:
+            return self.matrices.unpack(self._solution_vector)
+        
+        # Every variable is integer, so solver noise is rounded away
+        shape = (len(self.weeks), len(self.items))
+        values = {
+            name: np.round(np.fromiter(
+                (variables[w, i].value() or 0.0 for w in self.weeks for i in self.items),
+                dtype=float,
+                count=shape[0] * shape[1]
+            ).reshape(shape))
+            for name, variables in self._pulp_variables().items()
+        }
+        values['order_week'] = np.round(np.array([self.order_week[w].value() or 0.0 for w in self.weeks]))
+        return values
+    
+    def solution_arrays(self):
+        """
+        Get the solution as dense arrays, extracted once and cached.
+        
+        Returns:
+            dict: weeks x items arrays 'order', 'packages', 'eat' and 'inventory', and
+                the weekly delivery flag 'order_week', or None if there is no solution
+        """
+        if not self.solve():
+            return None
+        if self._solution_arrays is None:
+            self._solution_arrays = self._solution_values()
+        return self._solution_arrays
+    
+    def ledger(self):
+        """
+        Get the inventory ledger of the solution, built once and cached.
+        
+        Returns:
+            InventoryLedger: Orders, consumption, carry-over and waste per week and
+                item, or None if there is no solution
+        """
         if not self.solve():
             return None
+        if self._ledger is None:
+            self._ledger = InventoryLedger.from_solution(
+                self.solution_arrays(),
+                self.catalog,
+                cyclic=self.order_constraints.get('cyclic_inventory', False)
+            )
+        return self._ledger
+    
+    def replan(self, through_week, orders=None, consumption=None, inventory=None):
+        """
+        Lock in the executed weeks and re-solve the rest of the horizon.
+        
+        Weeks 0..through_week are fixed to what actually happened, and only a model of
+        the remaining weeks is built and solved. It starts from the non-perishable stock
+        on hand, and from the current plan for those weeks if that is still feasible.
+        The executed weeks and the new plan together replace the current solution.
+        
+        Args:
+            through_week (int): Last executed week, 0-based
+            orders (list): Realised {item: servings} orders of each executed week, as in
+                get_results()['order_schedule']; None keeps the planned orders
+            consumption (list): Realised {item: servings} consumption of each executed
+                week; None keeps the planned consumption
+            inventory (dict): Non-perishable {item: servings} on hand after through_week;
+                None derives the stock from the executed orders and consumption and
+                checks the executed weeks and the new plan against the full model
+        
+        Returns:
+            bool: True if the remaining weeks were solved
+        
+        Raises:
+            ValueError: If a realised order is not a whole number of packages, or the
+                executed weeks and the new plan are infeasible for the full model
+        """
+        n_weeks = len(self.weeks)
+        if self.order_constraints.get('cyclic_inventory', False):
+            raise ValueError("A cyclic plan cannot be re-planned")
+        if not 0 <= through_week < n_weeks - 1:
+            raise ValueError("through_week must leave at least one week to re-plan")
+        if not self.solve():
+            return False
+        
+        planned = self.solution_arrays()
+        keys = self.catalog['keys']
+        perishable = self.catalog['perishable']
+        executed_weeks = through_week + 1
+        order = self._realised(orders, planned['order'][:executed_weeks])
+        eat = self._realised(consumption, planned['eat'][:executed_weeks])
+        
+        size = self.catalog['package_size']
+        packages = np.round(order / size)
+        if not np.allclose(packages * size, order, atol=1e-6):
+            w, k = np.argwhere(~np.isclose(packages * size, order, atol=1e-6))[0]
+            raise ValueError(
+                f"Realised order of {order[w, k]:g} servings of {keys[k]} in week {w + 1} "
+                f"is not a whole number of packages of {size[k]:g}"
+            )
+        
+        # Stock before eating in each executed week, following the inventory balance
+        initial_inventory = self.order_constraints.get('initial_inventory') or {}
+        carried = np.array([float(initial_inventory.get(key, 0)) for key in keys])
+        stock, carried = self._carry_stock(order, eat, carried)
+        if inventory is not None:
+            carried = np.where(perishable, 0.0, [float(inventory.get(key, 0)) for key in keys])
+        
+        constraints = dict(
+            self.order_constraints,
+            total_weeks=n_weeks - executed_weeks,
+            initial_inventory=dict(zip(keys, carried)),
+            solver_progress_callback=None,
+            solver_progress_log=None
+        )
+        remaining = DietOptimizer(self.food_items, self.nutritional_constraints, constraints)
+        remaining.start_plan = self._continued_plan(planned, executed_weeks, carried)
+        if not remaining.solve():
+            print(f"No feasible plan for weeks {executed_weeks + 1}-{n_weeks}")
+            return False
         
-        results = {
-            'order_schedule': self._get_order_schedule(),
-            'consumption_schedule': self._get_consumption_schedule(),
-            'inventory_levels': self._get_inventory_levels(),
-            'cost_breakdown': self._get_cost_breakdown()
+        values = remaining.solution_arrays()
+        plan = {
+            'order': np.vstack([order, values['order']]),
+            'eat': np.vstack([eat, values['eat']]),
+            'inventory': np.vstack([stock, values['inventory']]),
+            'packages': np.vstack([packages, values['packages']]),
+            'order_week': np.concatenate([(order.sum(axis=1) > 0).astype(float), values['order_week']])
         }
-        return results
+        if inventory is None:
+            matrices = self.matrices
+            if matrices is None:
+                matrices = build_model_matrices(self.food_items, self.nutritional_constraints, self.order_constraints)
+            x = matrices.pack(plan)
+            if not matrices.is_feasible(x):
+                violated = np.count_nonzero(
+                    (matrices.A @ x < matrices.row_lower - 1e-6) | (matrices.A @ x > matrices.row_upper + 1e-6)
+                )
+                raise ValueError(
+                    f"The realised weeks and the new plan violate {violated} rows of the full model; "
+                    "check the realised orders and consumption"
+                )
+        self._use_start_solution(plan)
+        self._solution_arrays = None
+        self._results = None
+        self._ledger = None
+        self.replanned_through = through_week
+        print(f"Re-planned weeks {executed_weeks + 1}-{n_weeks}: total cost ${self._objective_value():.2f}")
+        return True
+    
+    def _realised(self, weeks, planned):
+        """Turn realised servings per item and executed week into an array; None keeps the plan."""
+        if weeks is None:
+            return planned.copy()
+        if len(weeks) != len(planned):
+            raise ValueError(f"Expected realised values for {len(planned)} executed weeks, got {len(weeks)}")
+        index = {key: i for i, key in enumerate(self.catalog['keys'])}
+        values = np.zeros_like(planned)
+        for w, week in enumerate(weeks):
+            for key, servings in week.items():
+                # Order schedules hold {'servings': ..., 'packages': ...} per item
+                values[w, index[key]] = servings['servings'] if isinstance(servings, Mapping) else servings
+        return values
+    
+    def _carry_stock(self, order, eat, carried):
+        """
+        Follow the inventory balance through consecutive weeks.
+        
+        Eating is not limited by the stock on hand (a week's eating can draw on the
+        next week's order), so the carried stock is not clamped at zero.
+        
+        Returns:
+            tuple: (stock before eating in each week, non-perishable stock carried out)
+        """
+        perishable = self.catalog['perishable']
+        stock = np.zeros_like(order)
+        for w in range(len(order)):
+            stock[w] = np.where(perishable, order[w], carried + order[w])
+            carried = np.where(perishable, 0.0, stock[w] - eat[w])
+        return stock, carried
+    
+    def _continued_plan(self, planned, first, carried):
+        """The current plan from week first on, with the inventory recomputed from the stock carried in."""
+        plan = {family: values[first:].copy() for family, values in planned.items()}
+        plan['inventory'], _ = self._carry_stock(plan['order'], plan['eat'], carried)
+        return plan
+    
+    def get_results(self):
+        """Get the optimization results; each view is built from the solution arrays on first access."""
+        if not self.solve():
+            return None
+        
+        if self._results is None:
+            self._results = LazyResults({
+                'order_schedule': self._get_order_schedule,
+                'consumption_schedule': self._get_consumption_schedule,
+                'inventory_levels': self._get_inventory_levels,
+                'cost_breakdown': self._get_cost_breakdown
+            })
+        return self._results
+    
+    def _servings_by_week(self, quantities):
+        """Turn a weeks x items array into one {item: servings} dict per week, skipping zeros."""
+        keys = list(self.items)
+        return [
+            {keys[idx]: int(week_quantities[idx]) for idx in np.flatnonzero(week_quantities > 0)}
+            for week_quantities in quantities
+        ]
     
     def _get_order_schedule(self):
         """Get the weekly order schedule."""
-        orders = []
-        for w in self.weeks:
-            week_orders = {}
-            for i in self.items:
-                qty = self.order_vars[w, i].value()
-                if qty > 0:
-                    week_orders[i] = {
-                        'servings': int(qty),
-                        'packages': int(self.package_vars[w, i].value())
-                    }
-            orders.append(week_orders)
-        return orders
+        values = self.solution_arrays()
+        keys = list(self.items)
+        return [
+            {
+                keys[idx]: {
+                    'servings': int(values['order'][w, idx]),
+                    'packages': int(values['packages'][w, idx])
+                }
+                for idx in np.flatnonzero(values['order'][w] > 0)
+            }
+            for w in self.weeks
+        ]
     
     def _get_consumption_schedule(self):
         """Get the weekly consumption schedule."""
-        consumption = []
-        for w in self.weeks:
-            week_consumption = {}
-            for i in self.items:
-                qty = self.eat_vars[w, i].value()
-                if qty > 0:
-                    week_consumption[i] = int(qty)
-            consumption.append(week_consumption)
-        return consumption
+        return self._servings_by_week(self.solution_arrays()['eat'])
     
     def _get_inventory_levels(self):
         """Get the weekly inventory levels."""
-        inventory = []
-        for w in self.weeks:
-            week_inventory = {}
-            for i in self.items:
-                qty = self.inventory[w, i].value()
-                if qty > 0:
-                    week_inventory[i] = int(qty)
-            inventory.append(week_inventory)
-        return inventory
+        return self._servings_by_week(self.solution_arrays()['inventory'])
     
     def _get_cost_breakdown(self):
         """Get the weekly cost breakdown."""
-        costs = []
-        total_cost = 0
-        for w in self.weeks:
-            week_cost = {
-                'items': sum(
-                    self.order_vars[w, i].value() * self.food_items[i]['cost']
-                    for i in self.items
-                ),
-                'delivery': (
-                    self.order_constraints['delivery_fee']
-                    if self.order_week[w].value() > 0.5
-                    else 0
-                )
-            }
-            week_cost['total'] = week_cost['items'] + week_cost['delivery']
-            total_cost += week_cost['total']
-            costs.append(week_cost)
+        values = self.solution_arrays()
+        items = values['order'] @ self.catalog['cost']
+        delivery = np.where(values['order_week'] > 0.5, self.order_constraints['delivery_fee'], 0)
+        costs = [
+            {'items': float(item), 'delivery': fee, 'total': float(item + fee)}
+            for item, fee in zip(items, delivery.tolist())
+        ]
         
         return {
             'weekly': costs,
-            'total': total_cost
+            'total': float((items + delivery).sum())
         }
 
     def get_formatted_results(self):
-        """Generate formatted tables and summaries of the optimization results."""
+        """
+        Generate formatted tables and summaries of the optimization results.
+        
+        Money columns stay numeric; format_currency() turns them into dollar strings
+        for display or export. With the 'lazy_formatted_results' order constraint each
+        table is only built when it is first accessed.
+        
+        Returns:
+            Mapping: 'weekly_schedule', 'cost_summary' and 'nutritional_summary'
+                DataFrames, or None if there is no solution
+        """
         # Use the solve method which will now use the cached result
         if not self.solve():
             return None
         
-        # Get raw results
         results = self.get_results()
-        
-        # Generate date range for weeks
+        date_strs = self._week_labels()
+        tables = {
+            'weekly_schedule': lambda: self._format_weekly_schedule(results, date_strs),
+            'cost_summary': lambda: self._format_cost_summary(results, date_strs),
+            'nutritional_summary': lambda: self._format_nutritional_summary(results, date_strs)
+        }
+        if self.order_constraints.get('lazy_formatted_results', False):
+            return LazyResults(tables)
+        return {name: build() for name, build in tables.items()}
+    
+    def _week_labels(self):
+        """Return the start date of every week as a 'YYYY-MM-DD' string."""
         start_date = self.order_constraints.get('start_date', datetime.now())
         if isinstance(start_date, str):
             start_date = datetime.strptime(start_date, '%Y-%m-%d')
-        dates = [start_date + timedelta(weeks=w) for w in self.weeks]
-        date_strs = [d.strftime('%Y-%m-%d') for d in dates]
-        
-        formatted_results = {
-            'weekly_schedule': self._format_weekly_schedule(results, date_strs),
-            'cost_summary': self._format_cost_summary(results, date_strs),
-            'nutritional_summary': self._format_nutritional_summary(results, date_strs)
-        }
-        
-        return formatted_results
+        return [(start_date + timedelta(weeks=w)).strftime('%Y-%m-%d') for w in self.weeks]
     
     def _format_weekly_schedule(self, results, date_strs):
-        """Format the weekly schedule into a pandas DataFrame."""
-        # Initialize lists to store data
-        rows = []
+        """Format the weekly schedule into a pandas DataFrame, one row per week and item."""
+        ledger = self.ledger()
+        order = np.argsort(ledger.keys, kind='stable')  # Items alphabetically within each week
+        n_weeks, n_items = len(date_strs), len(order)
         
-        for week, date in enumerate(date_strs):
-            orders = results['order_schedule'][week]
-            consumption = results['consumption_schedule'][week]
-            inventory = results['inventory_levels'][week]
-            
-            for item in self.items:
-                order_info = orders.get(item, {'servings': 0, 'packages': 0})
-                # For the final week, any remaining inventory is considered waste
-                final_inventory = inventory.get(item, 0)
-                if week == len(self.weeks) - 1 and final_inventory > 0:
-                    row = {
-                        'Week': date,
-                        'Item': item,
-                        'Order (Servings)': order_info['servings'],
-                        'Order (Packages)': order_info['packages'],
-                        'Consumption': consumption.get(item, 0),
-                        'Inventory': 0,  # Set to 0 since all remaining inventory is waste
-                        'Perishable': 'Yes' if self.food_items[item]['perishable'] else 'No',
-                        'Cost per Serving': f"${self.food_items[item]['cost']:.2f}",
-                        'Final Week Waste': final_inventory
-                    }
-                else:
-                    row = {
-                        'Week': date,
-                        'Item': item,
-                        'Order (Servings)': order_info['servings'],
-                        'Order (Packages)': order_info['packages'],
-                        'Consumption': consumption.get(item, 0),
-                        'Inventory': inventory.get(item, 0),
-                        'Perishable': 'Yes' if self.food_items[item]['perishable'] else 'No',
-                        'Cost per Serving': f"${self.food_items[item]['cost']:.2f}"
-                    }
-                rows.append(row)
-        
-        # Create DataFrame
-        df = pd.DataFrame(rows)
-        
-        # Sort and format
-        df = df.sort_values(['Week', 'Item'])
-        
-        return df
+        def column(values):
+            return values[:, order].ravel().astype(int)
+        
+        return pd.DataFrame({
+            'Week': np.repeat(date_strs, n_items),
+            'Item': np.tile(np.asarray(ledger.keys, dtype=object)[order], n_weeks),
+            'Order (Servings)': column(ledger.order),
+            'Order (Packages)': column(ledger.packages),
+            'Consumption': column(ledger.eat),
+            'Inventory': column(ledger.inventory),
+            'Carry-over': column(ledger.carry_over),
+            'Waste': column(ledger.waste),
+            'Perishable': np.tile(np.where(ledger.perishable[order], 'Yes', 'No'), n_weeks),
+            'Cost per Serving': np.tile(ledger.cost[order], n_weeks)
+        })
     
     def _format_cost_summary(self, results, date_strs):
-        """Format the cost breakdown into a pandas DataFrame."""
+        """Format the cost breakdown into a pandas DataFrame with a TOTAL row."""
         costs = results['cost_breakdown']['weekly']
+        items = np.array([cost['items'] for cost in costs], dtype=float)
+        delivery = np.array([cost['delivery'] for cost in costs], dtype=float)
         
-        rows = []
-        for week, (date, cost) in enumerate(zip(date_strs, costs)):
-            row = {
-                'Week': date,
-                'Item Costs': f"${cost['items']:.2f}",
-                'Delivery Fee': f"${cost['delivery']:.2f}",
-                'Total Cost': f"${cost['total']:.2f}"
-            }
-            rows.append(row)
-        
-        # Create DataFrame
-        df = pd.DataFrame(rows)
-        
-        # Add total row
-        total_row = {
-            'Week': 'TOTAL',
-            'Item Costs': f"${sum(c['items'] for c in costs):.2f}",
-            'Delivery Fee': f"${sum(c['delivery'] for c in costs):.2f}",
-            'Total Cost': f"${results['cost_breakdown']['total']:.2f}"
-        }
-        df = pd.concat([df, pd.DataFrame([total_row])], ignore_index=True)
-        
-        return df
+        return pd.DataFrame({
+            'Week': list(date_strs) + ['TOTAL'],
+            'Item Costs': np.append(items, items.sum()),
+            'Delivery Fee': np.append(delivery, delivery.sum()),
+            'Total Cost': np.append(items + delivery, results['cost_breakdown']['total'])
+        })
     
     def _format_nutritional_summary(self, results, date_strs):
         """Format the nutritional information into a pandas DataFrame."""
-        rows = []
-        
-        for week, date in enumerate(date_strs):
-            orders = results['order_schedule'][week]
-            consumption = results['consumption_schedule'][week]
-            inventory = results['inventory_levels'][week]
-            
-            # Calculate wastage for perishable items
-            wastage = {}
-            if week > 0:  # Can only calculate wastage from second week onwards
-                prev_inventory = results['inventory_levels'][week-1]
-                for item in self.items:
-                    if self.food_items[item]['perishable']:
-                        # Wastage = previous inventory - consumption
-                        prev_qty = prev_inventory.get(item, 0)
-                        consumed = consumption.get(item, 0)
-                        if prev_qty > consumed:
-                            wastage[item] = prev_qty - consumed
-            
-            # For the final week, add any remaining inventory to waste
-            if week == len(self.weeks) - 1:
-                for item in self.items:
-                    final_inventory = inventory.get(item, 0)
-                    if final_inventory > 0:
-                        wastage[item] = wastage.get(item, 0) + final_inventory
-            
-            # Only include items that need to be ordered, consumed, or have wastage this week
-            active_items = set()
-            for item in self.items:
-                if (item in orders and orders[item]['servings'] > 0) or \
-                   (item in consumption and consumption[item] > 0) or \
-                   (item in wastage and wastage[item] > 0):
-                    active_items.add(item)
-            
-            if active_items:  # Only add weeks where there's activity
-                order_text = []
-                consume_text = []
-                inventory_text = []
-                wastage_text = []
-                
-                for item in sorted(active_items):
-                    # Add order information if there's an order this week
-                    if item in orders and orders[item]['servings'] > 0:
-                        pkg_text = f"({orders[item]['packages']} packages)" if orders[item]['packages'] > 1 else "(1 package)"
-                        order_text.append(f"{item}: {orders[item]['servings']} servings {pkg_text}")
-                    
-                    # Add consumption information
-                    if item in consumption and consumption[item] > 0:
-                        consume_text.append(f"{item}: {consumption[item]} servings")
-                    
-                    # Add inventory information
-                    if item in inventory and inventory[item] > 0:
-                        inventory_text.append(f"{item}: {inventory[item]} servings")
-                    
-                    # Add wastage information
-                    if item in wastage and wastage[item] > 0:
-                        wastage_text.append(f"{item}: {wastage[item]} servings")
-                
-                row = {
-                    'Week': date,
-                    'Orders': '\n'.join(order_text) if order_text else "No orders needed",
-                    'Consumption Plan': '\n'.join(consume_text),
-                    'Remaining Inventory': '\n'.join(inventory_text) if inventory_text else "None",
-                    'Wastage': '\n'.join(wastage_text) if wastage_text else "None",
-                    'Total Cost': f"${results['cost_breakdown']['weekly'][week]['total']:.2f}"
-                }
-                rows.append(row)
-        
-        # Create DataFrame
-        df = pd.DataFrame(rows)
-        
-        # Calculate total wastage
-        total_wastage = {}
-        for week in range(1, len(self.weeks)):
-            prev_inventory = results['inventory_levels'][week-1]
-            consumption = results['consumption_schedule'][week]
-            for item in self.items:
-                if self.food_items[item]['perishable']:
-                    prev_qty = prev_inventory.get(item, 0)
-                    consumed = consumption.get(item, 0)
-                    if prev_qty > consumed:
-                        total_wastage[item] = total_wastage.get(item, 0) + (prev_qty - consumed)
-        
-        # Add summary rows
-        total_cost = results['cost_breakdown']['total']
-        wastage_cost = sum(total_wastage.get(item, 0) * self.food_items[item]['cost'] 
-                          for item in total_wastage)
-        
-        summary_rows = [
-            {
-                'Week': 'TOTAL WASTAGE',
-                'Orders': '',
-                'Consumption Plan': '',
-                'Remaining Inventory': '',
-                'Wastage': '\n'.join(f"{item}: {qty} servings (${qty * self.food_items[item]['cost']:.2f})"
-                                   for item, qty in total_wastage.items()) if total_wastage else "None",
-                'Total Cost': f"${wastage_cost:.2f} wasted"
-            },
-            {
-                'Week': 'TOTAL COST',
-                'Orders': '',
-                'Consumption Plan': '',
-                'Remaining Inventory': '',
-                'Wastage': '',
-                'Total Cost': f"${total_cost:.2f}"
-            }
-        ]
-        
-        df = pd.concat([df, pd.DataFrame(summary_rows)], ignore_index=True)
-        
-        return df
+        return self._format_weekly_action_plan(results, date_strs)
     
     def _format_weekly_action_plan(self, results, date_strs):
         """Format a simplified weekly action plan showing orders, consumption, and wastage."""
-        rows = []
-        
-        for week, date in enumerate(date_strs):
-            orders = results['order_schedule'][week]
-            consumption = results['consumption_schedule'][week]
-            inventory = results['inventory_levels'][week]
-            
-            # Calculate wastage for perishable items
-            wastage = {}
-            if week > 0:  # Can only calculate wastage from second week onwards
-                prev_inventory = results['inventory_levels'][week-1]
-                for item in self.items:
-                    if self.food_items[item]['perishable']:
-                        # Wastage = previous inventory - consumption
-                        prev_qty = prev_inventory.get(item, 0)
-                        consumed = consumption.get(item, 0)
-                        if prev_qty > consumed:
-                            wastage[item] = prev_qty - consumed
-            
-            # Only include items that need to be ordered, consumed, or have wastage this week
-            active_items = set()
-            for item in self.items:
-                if (item in orders and orders[item]['servings'] > 0) or \
-                   (item in consumption and consumption[item] > 0) or \
-                   (item in wastage and wastage[item] > 0):
-                    active_items.add(item)
-            
-            if active_items:  # Only add weeks where there's activity
-                order_text = []
-                consume_text = []
-                inventory_text = []
-                wastage_text = []
-                
-                for item in sorted(active_items):
-                    # Add order information if there's an order this week
-                    if item in orders and orders[item]['servings'] > 0:
-                        pkg_text = f"({orders[item]['packages']} packages)" if orders[item]['packages'] > 1 else "(1 package)"
-                        order_text.append(f"{item}: {orders[item]['servings']} servings {pkg_text}")
-                    
-                    # Add consumption information
-                    if item in consumption and consumption[item] > 0:
-                        consume_text.append(f"{item}: {consumption[item]} servings")
-                    
-                    # Add inventory information
-                    if item in inventory and inventory[item] > 0:
-                        inventory_text.append(f"{item}: {inventory[item]} servings")
-                    
-                    # Add wastage information
-                    if item in wastage and wastage[item] > 0:
-                        wastage_text.append(f"{item}: {wastage[item]} servings")
-                
-                row = {
-                    'Week': date,
-                    'Orders': '\n'.join(order_text) if order_text else "No orders needed",
-                    'Consumption Plan': '\n'.join(consume_text),
-                    'Remaining Inventory': '\n'.join(inventory_text) if inventory_text else "None",
-                    'Wastage': '\n'.join(wastage_text) if wastage_text else "None",
-                    'Total Cost': f"${results['cost_breakdown']['weekly'][week]['total']:.2f}"
-                }
-                rows.append(row)
-        
-        # Create DataFrame
-        df = pd.DataFrame(rows)
-        
-        # Calculate total wastage
-        total_wastage = {}
-        for week in range(1, len(self.weeks)):
-            prev_inventory = results['inventory_levels'][week-1]
-            consumption = results['consumption_schedule'][week]
-            for item in self.items:
-                if self.food_items[item]['perishable']:
-                    prev_qty = prev_inventory.get(item, 0)
-                    consumed = consumption.get(item, 0)
-                    if prev_qty > consumed:
-                        total_wastage[item] = total_wastage.get(item, 0) + (prev_qty - consumed)
+        ledger = self.ledger()
+        keys = np.asarray(ledger.keys, dtype=object)
+        order = np.argsort(ledger.keys, kind='stable')
+        # Only weeks and items that are ordered, consumed or wasted are listed
+        active = ledger.active()[:, order]
+        weeks = np.flatnonzero(active.any(axis=1))
         
-        # Add summary rows
-        total_cost = results['cost_breakdown']['total']
-        wastage_cost = sum(total_wastage.get(item, 0) * self.food_items[item]['cost'] 
-                          for item in total_wastage)
+        def cells(values, empty, packages=False):
+            """One newline-joined 'item: n servings' cell per listed week."""
+            listed = (values[:, order] > 0) & active
+            texts = []
+            for w in weeks:
+                idx = order[listed[w]]
+                lines = [f"{key}: {int(qty)} servings" for key, qty in zip(keys[idx], values[w, idx])]
+                if packages:
+                    lines = [
+                        f"{line} ({int(n)} packages)" if n > 1 else f"{line} (1 package)"
+                        for line, n in zip(lines, ledger.packages[w, idx])
+                    ]
+                texts.append('\n'.join(lines) if lines else empty)
+            return texts
         
-        summary_rows = [
-            {
-                'Week': 'TOTAL WASTAGE',
-                'Orders': '',
-                'Consumption Plan': '',
-                'Remaining Inventory': '',
-                'Wastage': '\n'.join(f"{item}: {qty} servings (${qty * self.food_items[item]['cost']:.2f})"
-                                   for item, qty in total_wastage.items()) if total_wastage else "None",
-                'Total Cost': f"${wastage_cost:.2f} wasted"
-            },
-            {
-                'Week': 'TOTAL COST',
-                'Orders': '',
-                'Consumption Plan': '',
-                'Remaining Inventory': '',
-                'Wastage': '',
-                'Total Cost': f"${total_cost:.2f}"
-            }
-        ]
+        weekly_total = np.array([cost['total'] for cost in results['cost_breakdown']['weekly']], dtype=float)
+        df = pd.DataFrame({
+            'Week': [date_strs[w] for w in weeks],
+            'Orders': cells(ledger.order, "No orders needed", packages=True),
+            'Consumption Plan': cells(ledger.eat, ""),
+            'Remaining Inventory': cells(ledger.inventory, "None"),
+            'Wastage': cells(ledger.waste, "None"),
+            'Total Cost': weekly_total[weeks]
+        })
         
-        df = pd.concat([df, pd.DataFrame(summary_rows)], ignore_index=True)
+        # Add summary rows
+        total_wastage = ledger.total_waste()
+        summary_rows = pd.DataFrame({
+            'Week': ['TOTAL WASTAGE', 'TOTAL COST'],
+            'Orders': ['', ''],
+            'Consumption Plan': ['', ''],
+            'Remaining Inventory': ['', ''],
+            'Wastage': [
+                '\n'.join(f"{item}: {int(qty)} servings (${cost:.2f})"
+                          for item, (qty, cost) in total_wastage.items()) if total_wastage else "None",
+                ''
+            ],
+            'Total Cost': [ledger.waste_cost.sum(), results['cost_breakdown']['total']]
+        })
         
-        return df
+        return pd.concat([df, summary_rows], ignore_index=True)
     
     def print_results(self):
         """Print formatted results to console."""
@@ -785,29 +1176,28 @@ class DietOptimizer:
             return
         
         # Get the weekly action plan
-        date_strs = [col for col in results['weekly_schedule']['Week'].unique() if col != 'TOTAL']
-        action_plan = self._format_weekly_action_plan(self.get_results(), date_strs)
+        action_plan = self._format_weekly_action_plan(self.get_results(), self._week_labels())
         
         print("\n=== WEEKLY ACTION PLAN ===")
         print("What to order and eat each week:\n")
         pd.set_option('display.max_colwidth', None)
         pd.set_option('display.max_rows', None)
-        print(action_plan.to_string(index=False))
+        print(format_currency(action_plan).to_string(index=False))
         
         print("\nDetailed breakdowns:")
         print("\n=== COST SUMMARY ===")
-        print(results['cost_summary'].to_string(index=False))
+        print(format_currency(results['cost_summary']).to_string(index=False))
         
         print("\n=== NUTRITIONAL SUMMARY ===")
-        print(results['nutritional_summary'].to_string(index=False))
+        print(format_currency(results['nutritional_summary']).to_string(index=False))
         
         # Save results to CSV files
         output_dir = 'output'
         os.makedirs(output_dir, exist_ok=True)
         
-        action_plan.to_csv(f'{output_dir}/weekly_action_plan.csv', index=False)
-        results['cost_summary'].to_csv(f'{output_dir}/cost_summary.csv', index=False)
-        results['nutritional_summary'].to_csv(f'{output_dir}/nutritional_summary.csv', index=False)
+        format_currency(action_plan).to_csv(f'{output_dir}/weekly_action_plan.csv', index=False)
+        format_currency(results['cost_summary']).to_csv(f'{output_dir}/cost_summary.csv', index=False)
+        format_currency(results['nutritional_summary']).to_csv(f'{output_dir}/nutritional_summary.csv', index=False)
         
         print(f"\nDetailed results have been saved to the '{output_dir}' directory.")
 
@@ -0,0 +1,159 @@
+"""
+Pre-flight feasibility check of the nutrient bounds and the minimum order value.
+
+Every week has the same nutrient bounds and weekly serving limits, so if a single
+week's diet cannot meet the bounds, neither can the multi-week model. The single-week
+diet is checked as an LP and, if that passes, with whole servings and whole perishable
+packages. When it fails, a deletion filter drops nutrient bounds one at a time while
+the rest stay infeasible, leaving a minimal set of bounds that conflict with each other
+given the catalog. Separately, the first week's diet has to be bought, so the largest
+order the model allows must reach the minimum order value. Both checks take
+milliseconds, far less than a MILP solve that runs into its time limit.
+"""
+
+import time
+import numpy as np
+from scipy.optimize import Bounds, LinearConstraint, linprog, milp
+
+from model_builder import ORDER_LINK_M, catalog_arrays, constrained_nutrients, derive_bounds, nutrient_bounds
+
+
+class FeasibilityChecker:
+    """Single-week nutrient and minimum order value checks of a diet configuration."""
+
+    def __init__(self, food_items, nutritional_constraints, order_constraints):
+        """
+        Args:
+            food_items (FoodCatalog or dict): Food items and their attributes
+            nutritional_constraints (dict): Dictionary of nutritional constraints
+            order_constraints (dict): Dictionary of order constraints
+        """
+        self.nutrients = constrained_nutrients(food_items, nutritional_constraints)
+        self.catalog = catalog_arrays(food_items, self.nutrients)
+        self.order_constraints = order_constraints
+        self.mins, self.maxs = nutrient_bounds(nutritional_constraints, self.nutrients)
+
+        # Perishables are eaten in whole packages, non-perishables in whole servings
+        c = self.catalog
+        self.step = np.where(c['perishable'], c['package_size'], 1.0)
+        self.upper = np.floor(np.round(c['weekly_limit'] / self.step, 6))
+        self.per_step = c['nutrients'] * self.step[:, None]
+
+        self.stage = None  # Check that failed: 'nutrients', 'whole servings' or 'minimum order'
+        self.conflict = []  # Minimal conflicting nutrient bounds as (nutrient, 'min' or 'max', value)
+        self.largest_order = None  # Value of the largest order the model allows
+        self.run_time = None
+
+    def check(self):
+        """
+        Run the checks.
+
+        Returns:
+            bool: True if no check found the configuration infeasible
+        """
+        start_time = time.time()
+        self.stage, self.conflict = None, []
+        bounds = self._bounds()
+        if not self._week_feasible(bounds, integer=False):
+            self.stage = 'nutrients'
+            self.conflict = self._minimal_conflict(bounds, integer=False)
+        elif not self._week_feasible(bounds, integer=True):
+            self.stage = 'whole servings'
+            self.conflict = self._minimal_conflict(bounds, integer=True)
+        elif not self._order_value_feasible():
+            self.stage = 'minimum order'
+        self.run_time = time.time() - start_time
+        return self.stage is None
+
+    def _bounds(self):
+        """List the nutrient bounds that restrict the diet as (nutrient index, sense) pairs."""
+        bounds = [(j, 'min') for j in np.flatnonzero(self.mins > 0)]
+        bounds += [(j, 'max') for j in np.flatnonzero(np.isfinite(self.maxs))]
+        return bounds
+
+    def _week_feasible(self, bounds, integer):
+        """Whether one week's diet can meet the given nutrient bounds within the serving limits."""
+        n_items = len(self.step)
+        if not bounds:
+            return True
+        rows = np.array([j for j, _ in bounds])
+        lower = np.array([self.mins[j] if sense == 'min' else -np.inf for j, sense in bounds])
+        upper = np.array([self.maxs[j] if sense == 'max' else np.inf for j, sense in bounds])
+        A = self.per_step[:, rows].T
+        if integer:
+            result = milp(
+                np.zeros(n_items),
+                constraints=LinearConstraint(A, lower, upper),
+                integrality=np.ones(n_items),
+                bounds=Bounds(np.zeros(n_items), self.upper)
+            )
+            return result.status == 0
+        at_least = np.isfinite(lower)
+        at_most = np.isfinite(upper)
+        result = linprog(
+            np.zeros(n_items),
+            A_ub=np.vstack([A[at_most], -A[at_least]]),
+            b_ub=np.concatenate([upper[at_most], -lower[at_least]]),
+            bounds=np.column_stack([np.zeros(n_items), self.upper]),
+            method='highs'
+        )
+        return result.status == 0
+
+    def _minimal_conflict(self, bounds, integer):
+        """Drop every bound that the rest stay infeasible without (deletion filter)."""
+        conflict = list(bounds)
+        for bound in bounds:
+            rest = [other for other in conflict if other != bound]
+            if not self._week_feasible(rest, integer):
+                conflict = rest
+        return [
+            (self.nutrients[j], sense, self.mins[j] if sense == 'min' else self.maxs[j])
+            for j, sense in conflict
+        ]
+
+    def _order_value_feasible(self):
+        """
+        Whether the largest order the model allows reaches the minimum order value.
+
+        Without stock carried in, the first week's diet has to be ordered in the first
+        two weeks. Eating is only free of orders in a one-week plan (nothing limits
+        non-perishables eaten in the last week), so that case is not checked.
+        """
+        oc = self.order_constraints
+        c = self.catalog
+        self.largest_order = None
+        if oc['total_weeks'] < 2 or oc.get('initial_inventory') or not (self.mins > 0).any():
+            return True
+        if oc.get('derived_bounds', True):
+            order = derive_bounds(c, oc)['order']
+        else:
+            order = (np.floor(ORDER_LINK_M / c['package_size']) * c['package_size'])[None, :]
+        self.largest_order = float((order @ c['cost']).max())
+        return self.largest_order >= float(oc['min_order_value'])
+
+    def describe(self):
+        """Return a one-line summary of the failed check, or None if every check passed."""
+        if self.stage is None:
+            return None
+        if self.stage == 'minimum order':
+            return (f"largest order ${self.largest_order:.2f} is below the minimum order value "
+                    f"${float(self.order_constraints['min_order_value']):.2f}")
+        bounds = ', '.join(
+            f"{nutrient} {'>=' if sense == 'min' else '<='} {value:g}" for nutrient, sense, value in self.conflict
+        )
+        return f"conflicting nutrient bounds ({self.stage}): {bounds}"
+
+    def report(self):
+        """Print the outcome of the checks."""
+        if self.stage is None:
+            print(f"Feasibility check passed in {self.run_time * 1000:.0f}ms")
+            return
+        print(f"Feasibility check failed in {self.run_time * 1000:.0f}ms:")
+        if self.stage == 'minimum order':
+            print(f"  The largest possible order is worth ${self.largest_order:.2f}, "
+                  f"below the minimum order value of ${float(self.order_constraints['min_order_value']):.2f}")
+            return
+        reason = "no weekly diet" if self.stage == 'nutrients' else "no weekly diet of whole servings and packages"
+        print(f"  Within the weekly serving limits, {reason} meets these bounds together:")
+        for nutrient, sense, value in self.conflict:
+            print(f"    {nutrient} {'>=' if sense == 'min' else '<='} {value:g}")
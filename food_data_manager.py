@@ -1,50 +1,391 @@
 """
 Food data manager responsible for loading and managing food catalog data.
+
+The parsed catalog is kept as a directory of .npy arrays next to the CSV
+(food_catalog.cache for food_catalog.csv). The cache is reused while the CSV's size
+and mtime, or failing those its content hash, still match, and the arrays are
+memory-mapped, so worker processes share the same pages instead of each parsing
+the CSV.
 """
+import hashlib
+import json
+import numpy as np
 import pandas as pd
-from typing import Dict, Any
+from collections.abc import Mapping
+from types import MappingProxyType
+from typing import Dict, Any, List
 import os
+import re
+
+# Catalog columns that describe the product rather than a nutrient
+PRODUCT_COLUMNS = [
+    'Product Name', 'Price', 'Perishable', 'Package Size', 'Price per serving',
+    'Weekly limit', 'Serving Size (g)'
+]
+
+# Catalog columns of the standard nutrients and their keys
+NUTRIENT_COLUMNS = {
+    'Calories': 'calories',
+    'Protein (g)': 'protein',
+    'Fat (g)': 'fat',
+    'Carbs (g)': 'carbs',
+    'Fiber (g)': 'fiber',
+    'Sugar (g)': 'sugar'
+}
+
+
+def nutrient_key(column: str) -> str:
+    """Turn a catalog column like 'Sodium (mg)' into a nutrient key like 'sodium'."""
+    name = re.sub(r'\(.*?\)', '', column).strip().lower()
+    return re.sub(r'[^a-z0-9]+', '_', name).strip('_')
+
+
+def product_keys(names: pd.Series) -> pd.Series:
+    """Create snake_case item keys from product names."""
+    return (
+        names.str.lower()
+        .str.replace(' ', '_', regex=False)
+        .str.replace('(', '', regex=False)
+        .str.replace(')', '', regex=False)
+    )
+
+
+def validate_catalog(df: pd.DataFrame, default_weekly_limit: float) -> pd.DataFrame:
+    """
+    Coerce the catalog columns to their types and check every row at once.
+    
+    Prices and sizes are parsed as numbers, a missing weekly limit becomes
+    default_weekly_limit and 'Perishable' must be Y or N. Nutrients must be
+    non-negative numbers, package sizes positive, and weekly limits, prices and
+    serving sizes non-negative; a missing serving size is allowed.
+    
+    Args:
+        df (pd.DataFrame): Catalog as read from the CSV
+        default_weekly_limit (float): Weekly serving limit of items without one
+    
+    Returns:
+        pd.DataFrame: The coerced catalog
+    
+    Raises:
+        ValueError: Listing every missing column, or every problem row
+    """
+    required = ['Product Name', 'Price per serving', 'Perishable', 'Package Size', *NUTRIENT_COLUMNS]
+    missing = [column for column in required if column not in df.columns]
+    if missing:
+        raise ValueError(f"Food catalog is missing columns: {', '.join(missing)}")
+    
+    df = df.copy()
+    df['Product Name'] = df['Product Name'].astype('string').str.strip()
+    df['Price per serving'] = pd.to_numeric(
+        df['Price per serving'].astype('string').str.replace('$', '', regex=False).str.strip(), errors='coerce'
+    )
+    for column in ['Package Size', 'Weekly limit', 'Serving Size (g)']:
+        if column not in df.columns:
+            df[column] = np.nan
+        df[column] = pd.to_numeric(df[column], errors='coerce')
+    df['Weekly limit'] = df['Weekly limit'].fillna(default_weekly_limit)
+    perishable_flag = df['Perishable'].astype('string').str.strip().str.upper()
+    df['Perishable'] = perishable_flag == 'Y'
+    nutrient_columns = nutrient_column_keys(df)
+    for column in nutrient_columns:
+        df[column] = pd.to_numeric(df[column], errors='coerce')
+    
+    # One boolean mask per rule, so all problem rows are found in a single pass
+    nutrients = df[list(nutrient_columns)]
+    keys = product_keys(df['Product Name'].fillna(''))
+    checks = {
+        'missing product name': df['Product Name'].fillna('') == '',
+        'duplicate product name': keys.duplicated(keep=False) & (keys != ''),
+        'missing or negative price per serving': ~(df['Price per serving'] >= 0),
+        "perishable flag is not 'Y' or 'N'": ~perishable_flag.isin(['Y', 'N']).fillna(False),
+        'missing or non-positive package size': ~(df['Package Size'] > 0),
+        'negative weekly limit': ~(df['Weekly limit'] >= 0),
+        'non-positive serving size': df['Serving Size (g)'] <= 0,
+    }
+    for column in nutrient_columns:
+        checks[f"missing or negative '{column}'"] = ~(nutrients[column] >= 0)
+    
+    failed = pd.DataFrame(checks).astype('boolean').fillna(True).to_numpy(dtype=bool)
+    bad_rows = np.flatnonzero(failed.any(axis=1))
+    if len(bad_rows):
+        reasons = np.array(list(checks), dtype=object)
+        lines = [
+            f"  row {row + 2} ({df['Product Name'].iloc[row] if pd.notna(df['Product Name'].iloc[row]) else '?'}): "
+            + ', '.join(reasons[failed[row]])
+            for row in bad_rows
+        ]
+        raise ValueError(f"Food catalog has {len(bad_rows)} invalid rows:\n" + '\n'.join(lines))
+    return df
+
+
+def nutrient_column_keys(df: pd.DataFrame) -> Dict[str, str]:
+    """
+    Map the catalog's nutrient columns to nutrient keys.
+    
+    Besides the standard nutrients, any other numeric column is an extra nutrient,
+    e.g. 'Sodium (mg)' -> 'sodium'.
+    """
+    extra_nutrients = {
+        column: nutrient_key(column) for column in df.columns
+        if column not in PRODUCT_COLUMNS and column not in NUTRIENT_COLUMNS
+        and pd.api.types.is_numeric_dtype(df[column])
+    }
+    return {**NUTRIENT_COLUMNS, **extra_nutrients}
+
+
+# Weekly serving limit of items without one in the catalog
+DEFAULT_WEEKLY_LIMIT = 14
+
+# Bump when the cache layout or the parsing changes so old caches are rebuilt
+CATALOG_CACHE_VERSION = 2
+
+# Per-item arrays stored in the catalog cache
+CATALOG_ARRAYS = ['cost', 'nutrients', 'package_size', 'weekly_limit', 'serving_size', 'perishable']
+
+
+class FoodCatalog(Mapping):
+    """
+    Food items stored as contiguous NumPy arrays in a fixed item order.
+    
+    Item item_keys[i] has cost[i], nutrients[i], package_size[i], weekly_limit[i],
+    serving_size[i] (grams, NaN if unknown) and perishable[i]; index maps an item key to its position. Looking an item up by key
+    returns a read-only dict view, so code written for the dict-of-dicts food items
+    keeps working.
+    """
+    
+    def __init__(self, keys: List[str], names, cost, nutrient_keys: List[str], nutrients,
+                 package_size, weekly_limit, perishable, serving_size=None):
+        """
+        Args:
+            keys (list): Item keys in array order
+            names (array-like): Product names
+            cost (array-like): Cost per serving
+            nutrient_keys (list): Nutrient keys, one per nutrients column
+            nutrients (array-like): Nutrients per serving, items x nutrients
+            package_size (array-like): Servings per package
+            weekly_limit (array-like): Maximum servings per week
+            perishable (array-like): Whether each item is perishable
+            serving_size (array-like): Grams per serving, NaN where unknown
+        """
+        self.item_keys = list(keys)
+        self.index = {key: i for i, key in enumerate(self.item_keys)}
+        self.names = np.asarray(names, dtype=object)
+        self.cost = np.ascontiguousarray(cost, dtype=float)
+        self.nutrient_keys = list(nutrient_keys)
+        self.nutrients = np.ascontiguousarray(nutrients, dtype=float).reshape(len(self.item_keys), len(self.nutrient_keys))
+        self.package_size = np.ascontiguousarray(package_size, dtype=float)
+        self.weekly_limit = np.ascontiguousarray(weekly_limit, dtype=float)
+        self.perishable = np.ascontiguousarray(perishable, dtype=bool)
+        if serving_size is None:
+            serving_size = np.full(len(self.item_keys), np.nan)
+        self.serving_size = np.ascontiguousarray(serving_size, dtype=float)
+    
+    @classmethod
+    def from_items(cls, food_items: Dict[str, Dict[str, Any]]) -> 'FoodCatalog':
+        """Build a catalog from a dict-of-dicts of food items."""
+        if isinstance(food_items, FoodCatalog):
+            return food_items
+        keys = list(food_items)
+        items = [food_items[key] for key in keys]
+        product_fields = {'name', 'cost', 'perishable', 'package_size', 'weekly_limit', 'serving_size'}
+        nutrient_keys = [
+            field for field in (items[0] if items else {})
+            if field not in product_fields and all(field in item for item in items)
+        ]
+        return cls(
+            keys,
+            names=[item.get('name', key) for key, item in zip(keys, items)],
+            cost=[item['cost'] for item in items],
+            nutrient_keys=nutrient_keys,
+            nutrients=[[item[n] for n in nutrient_keys] for item in items],
+            package_size=[item['package_size'] for item in items],
+            weekly_limit=[item.get('weekly_limit', DEFAULT_WEEKLY_LIMIT) for item in items],
+            perishable=[bool(item['perishable']) for item in items],
+            serving_size=[item.get('serving_size', np.nan) for item in items]
+        )
+    
+    def __getitem__(self, key: str) -> Mapping:
+        i = self.index[key]
+        item = {
+            'name': self.names[i],
+            'cost': float(self.cost[i]),
+            **{n: float(value) for n, value in zip(self.nutrient_keys, self.nutrients[i])},
+            'perishable': bool(self.perishable[i]),
+            'package_size': float(self.package_size[i]),
+            'weekly_limit': float(self.weekly_limit[i]),
+            'serving_size': float(self.serving_size[i])
+        }
+        return MappingProxyType(item)
+    
+    def __iter__(self):
+        return iter(self.item_keys)
+    
+    def __len__(self) -> int:
+        return len(self.item_keys)
+    
+    def __contains__(self, key) -> bool:
+        return key in self.index
+    
+    def nutrient_matrix(self, nutrients: List[str]) -> np.ndarray:
+        """Return the items x nutrients matrix for the given nutrient keys, in that order."""
+        columns = [self.nutrient_keys.index(n) for n in nutrients]
+        return self.nutrients[:, columns]
+    
+    def save(self, cache_dir: str, source: Dict[str, Any]) -> None:
+        """
+        Write the catalog as .npy arrays plus meta.json.
+        
+        Every file is written under a temporary name and moved into place, and
+        meta.json goes last, so a concurrent reader never sees a partial cache.
+        
+        Args:
+            cache_dir (str): Directory to write to
+            source (dict): Size, mtime and hash of the CSV the catalog was parsed from
+        """
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_suffix = f'.{os.getpid()}.tmp'
+        for name in CATALOG_ARRAYS:
+            path = os.path.join(cache_dir, f'{name}.npy')
+            with open(path + tmp_suffix, 'wb') as f:
+                np.save(f, getattr(self, name))
+            os.replace(path + tmp_suffix, path)
+        meta = {
+            'version': CATALOG_CACHE_VERSION,
+            'source': source,
+            'item_keys': self.item_keys,
+            'names': [str(name) for name in self.names],
+            'nutrient_keys': self.nutrient_keys
+        }
+        path = os.path.join(cache_dir, 'meta.json')
+        with open(path + tmp_suffix, 'w') as f:
+            json.dump(meta, f)
+        os.replace(path + tmp_suffix, path)
+    
+    @classmethod
+    def load(cls, cache_dir: str, meta: Dict[str, Any]) -> 'FoodCatalog':
+        """Load a catalog written by save, memory-mapping its arrays read-only."""
+        arrays = {
+            name: np.load(os.path.join(cache_dir, f'{name}.npy'), mmap_mode='r')
+            for name in CATALOG_ARRAYS
+        }
+        return cls(meta['item_keys'], names=meta['names'], nutrient_keys=meta['nutrient_keys'], **arrays)
+    
+    def subset(self, keep) -> 'FoodCatalog':
+        """Return a catalog of the items selected by a boolean mask or index array, in order."""
+        keep = np.flatnonzero(keep) if np.asarray(keep).dtype == bool else np.asarray(keep, dtype=int)
+        return FoodCatalog(
+            [self.item_keys[i] for i in keep],
+            names=self.names[keep],
+            cost=self.cost[keep],
+            nutrient_keys=self.nutrient_keys,
+            nutrients=self.nutrients[keep],
+            package_size=self.package_size[keep],
+            weekly_limit=self.weekly_limit[keep],
+            perishable=self.perishable[keep],
+            serving_size=self.serving_size[keep]
+        )
+    
+    def set_weekly_limit(self, limit) -> None:
+        """Set the weekly serving limit of every item, from a scalar or one value per item."""
+        self.weekly_limit = np.ascontiguousarray(np.broadcast_to(limit, len(self.item_keys)), dtype=float)
+
 
 class FoodDataManager:
-    def __init__(self, csv_path: str = 'food_catalog_temp.csv'):
+    def __init__(self, csv_path: str = 'food_catalog_temp.csv', use_cache: bool = True,
+                 default_weekly_limit: float = DEFAULT_WEEKLY_LIMIT):
+        """
+        Args:
+            csv_path (str): Path of the food catalog CSV
+            use_cache (bool): Whether to reuse and maintain the compiled catalog cache
+            default_weekly_limit (float): Weekly serving limit of items without one in the catalog
+        """
         self.csv_path = csv_path
-        self.food_items = {}
+        self.use_cache = use_cache
+        self.default_weekly_limit = default_weekly_limit
+        self.cache_dir = os.path.splitext(csv_path)[0] + '.cache'
+        self.food_items = None
         self.nutritional_constraints = {}
         self.order_constraints = {}
         self.reload_data()
     
     def reload_data(self) -> None:
-        """Reload data from CSV file."""
+        """Reload data from the catalog cache if it is current, otherwise from the CSV file."""
         if not os.path.exists(self.csv_path):
             raise FileNotFoundError(f"CSV file not found at {self.csv_path}")
         
-        df = pd.read_csv(self.csv_path)
-        self.food_items = {}
+        if not self.use_cache:
+            self.food_items = self._parse_csv()
+            return
+        
+        stat = os.stat(self.csv_path)
+        source = {
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'default_weekly_limit': self.default_weekly_limit
+        }
+        meta = self._read_cache_meta()
+        if (meta is not None and meta['source']['size'] == source['size']
+                and meta['source'].get('default_weekly_limit') == source['default_weekly_limit']):
+            if meta['source']['mtime_ns'] == source['mtime_ns']:
+                self.food_items = FoodCatalog.load(self.cache_dir, meta)
+                return
+            # Touched but possibly unchanged: compare the content hash
+            source['sha256'] = self._csv_hash()
+            if meta['source'].get('sha256') == source['sha256']:
+                self.food_items = FoodCatalog.load(self.cache_dir, meta)
+                self._write_cache(self.food_items, source)
+                return
         
-        for _, row in df.iterrows():
-            # Convert price per serving from string to float
-            price_per_serving = float(row['Price per serving'].replace('$', '').strip())
-            
-            food_item = {
-                'name': row['Product Name'],
-                'cost': price_per_serving,
-                'calories': row['Calories'],
-                'protein': row['Protein (g)'],
-                'fat': row['Fat (g)'],
-                'carbs': row['Carbs (g)'],
-                'fiber': row['Fiber (g)'],
-                'sugar': row['Sugar (g)'],
-                'perishable': row['Perishable'] == 'Y',
-                'package_size': row['Package Size'],
-                'weekly_limit': 14  # Default weekly limit if not specified
-            }
-            
-            # Create a snake_case key from the product name
-            key = row['Product Name'].lower().replace(' ', '_').replace('(', '').replace(')', '')
-            self.food_items[key] = food_item
-    
-    def get_food_items(self) -> Dict[str, Dict[str, Any]]:
-        """Return the current food items dictionary."""
+        self.food_items = self._parse_csv()
+        source.setdefault('sha256', self._csv_hash())
+        self._write_cache(self.food_items, source)
+    
+    def _read_cache_meta(self):
+        """Return the cache metadata, or None if there is no usable cache."""
+        try:
+            with open(os.path.join(self.cache_dir, 'meta.json')) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if meta.get('version') != CATALOG_CACHE_VERSION:
+            return None
+        if not all(os.path.exists(os.path.join(self.cache_dir, f'{name}.npy')) for name in CATALOG_ARRAYS):
+            return None
+        return meta
+    
+    def _write_cache(self, catalog: FoodCatalog, source: Dict[str, Any]) -> None:
+        """Write the catalog cache; a read-only location only costs the speed-up."""
+        try:
+            catalog.save(self.cache_dir, source)
+        except OSError as e:
+            print(f"Warning: could not write the catalog cache to {self.cache_dir}: {e}")
+    
+    def _csv_hash(self) -> str:
+        """Return the SHA-256 of the CSV contents."""
+        digest = hashlib.sha256()
+        with open(self.csv_path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        return digest.hexdigest()
+    
+    def _parse_csv(self) -> FoodCatalog:
+        """Parse the CSV file into a FoodCatalog."""
+        df = validate_catalog(pd.read_csv(self.csv_path), self.default_weekly_limit)
+        nutrient_columns = nutrient_column_keys(df)
+        return FoodCatalog(
+            product_keys(df['Product Name']).tolist(),
+            names=df['Product Name'].to_numpy(dtype=object),
+            cost=df['Price per serving'].to_numpy(dtype=float),
+            nutrient_keys=list(nutrient_columns.values()),
+            nutrients=df[list(nutrient_columns)].to_numpy(dtype=float),
+            package_size=df['Package Size'].to_numpy(dtype=float),
+            weekly_limit=df['Weekly limit'].to_numpy(dtype=float),
+            serving_size=df['Serving Size (g)'].to_numpy(dtype=float),
+            perishable=df['Perishable'].to_numpy(dtype=bool)
+        )
+    
+    def get_food_items(self) -> FoodCatalog:
+        """Return the current food catalog."""
         return self.food_items
     
     def get_nutritional_constraints(self) -> Dict[str, Dict[str, float]]:
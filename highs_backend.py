@@ -0,0 +1,229 @@
+"""
+In-process HiGHS solver backend for models built by model_builder.
+
+Passes the sparse model arrays straight to highspy.Highs, so a solve needs no
+temporary model files and no solver subprocess.
+"""
+
+import time
+import numpy as np
+
+try:
+    import highspy
+except ImportError:  # highspy is optional when only the CBC backend is used
+    highspy = None
+
+
+def highs_available():
+    """Return True if the highspy package can be imported."""
+    return highspy is not None
+
+
+class HighsResult:
+    """Outcome of a HiGHS solve."""
+
+    def __init__(self, model_status, has_solution, x, objective, mip_gap, dual_bound, run_time, row_dual=None):
+        self.model_status = model_status  # HiGHS model status name, e.g. 'kOptimal'
+        self.has_solution = has_solution  # True if a feasible primal solution is available
+        self.x = x  # Primal column values as a NumPy array
+        self.objective = objective
+        self.mip_gap = mip_gap
+        self.dual_bound = dual_bound
+        self.run_time = run_time
+        self.row_dual = row_dual  # Row duals of an LP solve, with reduced costs c - A.T @ row_dual
+
+    @property
+    def is_infeasible(self):
+        return self.model_status == 'kInfeasible'
+
+    @property
+    def is_optimal(self):
+        return self.model_status == 'kOptimal'
+
+
+class HighsBackend:
+    """Solve ModelMatrices with an in-process highspy.Highs instance."""
+
+    def __init__(self, time_limit=900, mip_gap=0.05, threads=None, show_log=False):
+        """
+        Configure the solver.
+
+        Args:
+            time_limit (float): Time limit in seconds
+            mip_gap (float): Relative MIP optimality gap
+            threads (int): Number of solver threads, or None for the HiGHS default
+            show_log (bool): Whether HiGHS prints its log to the console
+        """
+        if highspy is None:
+            raise ImportError("highspy is required for the HiGHS solver backend")
+        self.time_limit = time_limit
+        self.mip_gap = mip_gap
+        self.threads = threads
+        self.show_log = show_log
+
+    def _create_highs(self):
+        """Create a Highs instance with the configured options."""
+        h = highspy.Highs()
+        h.setOptionValue('output_flag', bool(self.show_log))
+        h.setOptionValue('time_limit', float(self.time_limit))
+        h.setOptionValue('mip_rel_gap', float(self.mip_gap))
+        if self.threads:
+            h.setOptionValue('threads', int(self.threads))
+        return h
+
+    @staticmethod
+    def pass_model(h, matrices):
+        """Load the sparse model arrays into a Highs instance."""
+        A = matrices.A.tocsc()
+        status = h.passModel(
+            matrices.num_cols,
+            matrices.num_rows,
+            A.nnz,
+            int(highspy.MatrixFormat.kColwise),
+            int(highspy.ObjSense.kMinimize),
+            0.0,
+            np.ascontiguousarray(matrices.cost, dtype=np.float64),
+            np.ascontiguousarray(matrices.col_lower, dtype=np.float64),
+            np.ascontiguousarray(matrices.col_upper, dtype=np.float64),
+            np.ascontiguousarray(matrices.row_lower, dtype=np.float64),
+            np.ascontiguousarray(matrices.row_upper, dtype=np.float64),
+            A.indptr.astype(np.int32),
+            A.indices.astype(np.int32),
+            A.data.astype(np.float64),
+            np.ascontiguousarray(matrices.integrality, dtype=np.int32),
+        )
+        if status == highspy.HighsStatus.kError:
+            raise ValueError("HiGHS rejected the model")
+
+    def solve(self, matrices, progress=None, should_stop=None, initial_solution=None):
+        """
+        Solve the model.
+
+        Args:
+            matrices (ModelMatrices): The model to solve
+            progress (ProgressTracker): Optional tracker fed from the MIP callbacks
+            should_stop (callable): Optional function polled during the search;
+                returning True interrupts the solve and keeps the incumbent
+            initial_solution (np.ndarray): Optional feasible solution vector used
+                as the starting incumbent
+
+        Returns:
+            HighsResult: Solve status and primal values
+        """
+        h = self._create_highs()
+        self.pass_model(h, matrices)
+        return self._run(h, matrices, progress, should_stop, initial_solution)
+
+    def _run(self, h, matrices, progress=None, should_stop=None, initial_solution=None):
+        """Solve the model loaded in h; see solve."""
+        if initial_solution is not None:
+            h.setSolution(
+                matrices.num_cols,
+                np.arange(matrices.num_cols, dtype=np.int32),
+                np.ascontiguousarray(initial_solution, dtype=np.float64)
+            )
+        if progress is not None:
+            self._attach_progress(h, progress)
+        if should_stop is not None:
+            def on_interrupt_check(event):
+                if should_stop():
+                    event.data_in.user_interrupt = True
+            h.cbMipInterrupt.subscribe(on_interrupt_check)
+
+        start_time = time.time()
+        h.run()
+        run_time = time.time() - start_time
+
+        return self._collect_result(h, matrices, run_time)
+
+    def solve_relaxation(self, matrices):
+        """
+        Solve the LP relaxation of the model.
+
+        Returns:
+            HighsResult: LP status, primal values and, if optimal, row duals; an
+                optimal LP objective is a lower bound on the MIP objective
+        """
+        h = self._create_highs()
+        self.pass_model(h, matrices)
+        h.changeColsIntegrality(
+            matrices.num_cols,
+            np.arange(matrices.num_cols, dtype=np.int32),
+            np.zeros(matrices.num_cols, dtype=np.uint8)
+        )
+        start_time = time.time()
+        h.run()
+        result = self._collect_result(h, matrices, time.time() - start_time)
+        if result.is_optimal:
+            result.row_dual = np.array(h.getSolution().row_dual)
+        return result
+
+    @staticmethod
+    def _attach_progress(h, progress, interval=0.5):
+        """Report new incumbents and, at most every interval seconds, the bound and node count."""
+        last_report = [0.0]
+
+        def on_improving_solution(event):
+            data = event.data_out
+            progress.update(
+                'highs',
+                incumbent=data.objective_function_value,
+                bound=data.mip_dual_bound,
+                nodes=data.mip_node_count,
+                elapsed=data.running_time
+            )
+
+        def on_interrupt_check(event):
+            data = event.data_out
+            if data.running_time - last_report[0] >= interval:
+                last_report[0] = data.running_time
+                progress.update(
+                    'highs',
+                    bound=data.mip_dual_bound,
+                    nodes=data.mip_node_count,
+                    elapsed=data.running_time
+                )
+
+        h.cbMipImprovingSolution.subscribe(on_improving_solution)
+        h.cbMipInterrupt.subscribe(on_interrupt_check)
+
+    @staticmethod
+    def _collect_result(h, matrices, run_time):
+        """Read status, objective and primal values back from a Highs instance."""
+        info = h.getInfo()
+        model_status = h.getModelStatus()
+        has_solution = info.primal_solution_status == highspy.SolutionStatus.kSolutionStatusFeasible
+        x = np.array(h.getSolution().col_value) if has_solution else None
+        return HighsResult(
+            model_status=model_status.name,
+            has_solution=has_solution,
+            x=x,
+            objective=info.objective_function_value if has_solution else None,
+            mip_gap=info.mip_gap,
+            dual_bound=info.mip_dual_bound,
+            run_time=run_time,
+        )
+
+
+class PersistentHighsBackend(HighsBackend):
+    """HighsBackend that keeps the model loaded in one Highs instance between solves.
+
+    Changes to the model are applied to the instance in place (see OptimizerSession),
+    so a re-solve skips passing the model and HiGHS keeps what it can of the previous
+    solve, e.g. the LP basis.
+    """
+
+    def __init__(self, time_limit=900, mip_gap=0.05, threads=None, show_log=False):
+        super().__init__(time_limit=time_limit, mip_gap=mip_gap, threads=threads, show_log=show_log)
+        self.h = None  # Highs instance holding the model, created on the first solve
+
+    def solve(self, matrices, progress=None, should_stop=None, initial_solution=None):
+        """Solve the model, loading it into the kept Highs instance on the first call; see HighsBackend.solve."""
+        if self.h is None:
+            self.h = self._create_highs()
+            self.pass_model(self.h, matrices)
+        else:
+            # Callbacks of the previous solve refer to its progress tracker
+            self.h.cbMipImprovingSolution.clear()
+            self.h.cbMipInterrupt.clear()
+        return self._run(self.h, matrices, progress, should_stop, initial_solution)
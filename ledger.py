@@ -0,0 +1,98 @@
+"""
+Inventory ledger of a solved plan.
+
+Orders, consumption, carry-over and waste are derived from the solution arrays in
+one vectorized pass, so every report uses the same waste definition: perishable
+stock not eaten in the week it was delivered spoils at the end of that week, and
+non-perishable stock left after the last week is wasted unless the plan repeats.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+class InventoryLedger:
+    """Per-week, per-item quantities of a plan as weeks x items arrays."""
+
+    def __init__(self, keys, order, packages, eat, inventory, perishable, cost, cyclic=False):
+        """
+        Build the ledger.
+
+        Args:
+            keys (list): Item keys, one per array column
+            order (np.ndarray): Servings ordered per week and item
+            packages (np.ndarray): Packages ordered per week and item
+            eat (np.ndarray): Servings eaten per week and item
+            inventory (np.ndarray): Servings available per week and item before eating
+            perishable (np.ndarray): Boolean perishable flag per item
+            cost (np.ndarray): Cost per serving per item
+            cyclic (bool): Whether stock left after the last week carries into the first
+        """
+        self.keys = list(keys)
+        self.order = np.asarray(order, dtype=float)
+        self.packages = np.asarray(packages, dtype=float)
+        self.eat = np.asarray(eat, dtype=float)
+        self.inventory = np.asarray(inventory, dtype=float)
+        self.perishable = np.asarray(perishable, dtype=bool)
+        self.cost = np.asarray(cost, dtype=float)
+
+        # Non-perishable stock carried into the next week follows the model's balance
+        # inventory[w + 1] = inventory[w] - eat[w] + order[w + 1]
+        leftover = self.inventory - self.eat
+        self.carry_over = np.where(self.perishable, 0.0, leftover)
+        self.waste = np.where(self.perishable, np.maximum(leftover, 0), 0.0)
+        if not cyclic and len(leftover):
+            self.waste[-1] += np.maximum(self.carry_over[-1], 0)
+            self.carry_over[-1] = 0
+        self.waste_cost = self.waste * self.cost
+
+    @classmethod
+    def from_solution(cls, arrays, catalog, cyclic=False):
+        """
+        Build the ledger from solution arrays.
+
+        Args:
+            arrays (dict): weeks x items arrays 'order', 'packages', 'eat' and 'inventory'
+            catalog (dict): Catalog arrays from model_builder.catalog_arrays, in the
+                same item order as the solution arrays
+            cyclic (bool): Whether the plan repeats
+
+        Returns:
+            InventoryLedger: Ledger of the plan
+        """
+        return cls(
+            catalog['keys'],
+            arrays['order'],
+            arrays['packages'],
+            arrays['eat'],
+            arrays['inventory'],
+            perishable=catalog['perishable'],
+            cost=catalog['cost'],
+            cyclic=cyclic
+        )
+
+    @property
+    def n_weeks(self):
+        return self.order.shape[0]
+
+    def active(self):
+        """Return a weeks x items mask of items ordered, eaten or wasted."""
+        return (self.order > 0) | (self.eat > 0) | (self.waste > 0)
+
+    def total_waste(self):
+        """Return {item: (servings, cost)} of the waste summed over all weeks."""
+        servings = self.waste.sum(axis=0)
+        costs = self.waste_cost.sum(axis=0)
+        return {self.keys[i]: (servings[i], costs[i]) for i in np.flatnonzero(servings > 0)}
+
+    def by_week(self, name):
+        """Return one {item: servings} dict per week of the named array, skipping zeros."""
+        values = getattr(self, name)
+        return [
+            {self.keys[i]: int(round(week[i])) for i in np.flatnonzero(week > 0)}
+            for week in values
+        ]
+
+    def to_frame(self, name, index=None):
+        """Return the named array as a weeks x items DataFrame."""
+        return pd.DataFrame(getattr(self, name), index=index, columns=self.keys)
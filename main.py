@@ -3,9 +3,15 @@ Main script to run the diet optimization and generate visualizations.
 Configuration variables can be adjusted below.
 """
 
-from diet_optimizer import DietOptimizer
+from diet_optimizer import DietOptimizer, format_currency
+from rolling_horizon import RollingHorizonOptimizer
+from periodic_optimizer import PeriodicOptimizer
+from column_generation import ColumnGenerationOptimizer
 from visualizer import OptimizationVisualizer
 from food_data_manager import FoodDataManager
+from catalog_pruning import CatalogPruner
+from feasibility import FeasibilityChecker
+from stop_policies import GapStallPolicy, AbsoluteGapPolicy, LowerBoundPolicy
 import os
 import copy
 import pandas as pd
@@ -49,25 +55,65 @@ SUGAR = {
     'max': 700     # ~100g/day maximum (reasonable allowance for fruits/gels)
 }
 
+# Additional nutrients, keyed by catalog column without units, e.g. 'Sodium (mg)' -> 'sodium':
+# {'sodium': {'min': 10500, 'max': 16100}}
+EXTRA_NUTRIENTS = {}
+
 # Order Constraints
 MIN_ORDER_VALUE = 75  # Minimum order value in dollars
 DELIVERY_FEE = 10     # Delivery fee in dollars
 
 # Default Weekly Serving Limits
-DEFAULT_WEEKLY_LIMIT = 14  # Default maximum servings per week for any item
+DEFAULT_WEEKLY_LIMIT = 14  # Maximum servings per week of items without a 'Weekly limit' in the catalog
 
 # Data Source
 FOOD_CATALOG_PATH = 'food_catalog.csv'
+CATALOG_PRUNING = False  # Drop never-useful and dominated items before building the model
+CATALOG_CACHE = True  # Reuse the compiled, memory-mapped catalog next to the CSV while it is current
 
 # Output Configuration
 OUTPUT_DIR = 'output'
 SAVE_PLOTS = True
 SAVE_CSV = True
+LAZY_FORMATTED_RESULTS = False  # Build each formatted table only when it is first used
+SOLUTION_CACHE_DIR = 'solutions.cache'  # Reuse plans of previously solved identical models; None disables
+SOLUTION_CACHE_MAX_MB = 100  # Least recently used plans are removed beyond this size
 
 # Solver Configuration
 SOLVER_TIME_LIMIT = 900  # 15 minutes time limit
+SOLVER_THREADS = None  # Solver threads; None uses every core
 SOLVER_MIP_GAP = 0.20   # 10% optimality gap for faster convergence (increased from 5%)
 SOLVER_SHOW_PROGRESS = True  # Show solver progress
+SOLVER_PROGRESS_LOG = None  # Optional JSONL file recording the solver progress timeline
+# Early-termination policies, e.g. [GapStallPolicy(min_improvement=0.01, window=120),
+#                                   AbsoluteGapPolicy(max_gap=5), LowerBoundPolicy(tolerance=20)]
+SOLVER_STOP_POLICIES = []
+MODEL_BUILDER = 'pulp'  # 'pulp' (one expression at a time) or 'matrix' (sparse matrices)
+REDUCED_FORMULATION = False  # Substitute out orders and perishable eat/inventory variables
+DERIVED_BOUNDS = True  # Per-item order/package/inventory bounds instead of a fixed big-M
+REPORT_LP_BOUNDS = False  # Print the root LP bound with and without the derived bounds (needs highspy)
+SOLVER_BACKEND = None  # None (by architecture), 'cbc' (PuLP subprocess) or 'highs' (in-process)
+SOLVER_WARM_START = False  # Start the MIP from a heuristic plan
+SOLVE_MODE = 'mip'  # 'mip' (optimize) or 'heuristic' (fast heuristic plan only)
+FEASIBILITY_CHECK = True  # Check a single week's nutrient bounds and the minimum order before building the model
+
+# Rolling Horizon (solve overlapping windows instead of the whole horizon at once)
+ROLLING_HORIZON = False
+ROLLING_WINDOW_WEEKS = 8  # Weeks per window
+ROLLING_OVERLAP_WEEKS = 4  # Weeks re-planned by the next window
+ROLLING_WINDOW_TIME_LIMIT = 60  # Seconds per window
+ROLLING_REFERENCE_COST = None  # Cost of a monolithic solve to compare with, if known
+
+# Periodic Mode (tile the cheapest repeating cycle over the horizon)
+PERIODIC_MODE = False
+PERIODIC_CYCLE_WEEKS = [1, 2, 3, 4]  # Cycle lengths to try
+PERIODIC_CYCLE_TIME_LIMIT = 60  # Seconds per cycle solve
+
+# Column Generation (price catalog items into the model with LP duals; requires highspy)
+COLUMN_GENERATION = False
+CG_INITIAL_ITEMS_PER_NUTRIENT = 5  # Best items per dollar of each nutrient to start with
+CG_COLUMNS_PER_ITERATION = 20  # Most items added per pricing round
+CG_MAX_ITERATIONS = 50  # Pricing rounds before solving the working set as is
 
 # ============= END CONFIGURATION =============
 
@@ -80,7 +126,8 @@ def update_constraints(food_manager):
         'fat': FAT,
         'carbs': CARBS,
         'fiber': FIBER,
-        'sugar': SUGAR
+        'sugar': SUGAR,
+        **EXTRA_NUTRIENTS
     }
     food_manager.update_nutritional_constraints(nutritional_constraints)
     
@@ -92,16 +139,34 @@ def update_constraints(food_manager):
         'start_date': START_DATE,
         # Add solver configuration
         'solver_time_limit': SOLVER_TIME_LIMIT,
+        'solver_threads': SOLVER_THREADS,
         'solver_mip_gap': SOLVER_MIP_GAP,
-        'solver_show_progress': SOLVER_SHOW_PROGRESS
+        'solver_show_progress': SOLVER_SHOW_PROGRESS,
+        'solver_progress_log': SOLVER_PROGRESS_LOG,
+        'solver_stop_policies': SOLVER_STOP_POLICIES,
+        'model_builder': MODEL_BUILDER,
+        'reduced_formulation': REDUCED_FORMULATION,
+        'derived_bounds': DERIVED_BOUNDS,
+        'solver_backend': SOLVER_BACKEND,
+        'solver_warm_start': SOLVER_WARM_START,
+        'solve_mode': SOLVE_MODE,
+        'rolling_window_weeks': ROLLING_WINDOW_WEEKS,
+        'rolling_overlap_weeks': ROLLING_OVERLAP_WEEKS,
+        'rolling_window_time_limit': ROLLING_WINDOW_TIME_LIMIT,
+        'rolling_reference_cost': ROLLING_REFERENCE_COST,
+        'periodic_cycle_weeks': PERIODIC_CYCLE_WEEKS,
+        'periodic_cycle_time_limit': PERIODIC_CYCLE_TIME_LIMIT,
+        'cg_initial_items_per_nutrient': CG_INITIAL_ITEMS_PER_NUTRIENT,
+        'cg_columns_per_iteration': CG_COLUMNS_PER_ITERATION,
+        'cg_max_iterations': CG_MAX_ITERATIONS,
+        'lazy_formatted_results': LAZY_FORMATTED_RESULTS,
+        'solution_cache_dir': SOLUTION_CACHE_DIR,
+        'solution_cache_max_mb': SOLUTION_CACHE_MAX_MB
     }
     food_manager.update_order_constraints(order_constraints)
     
-    # Update serving limits if specified
+    # Weekly serving limits come from the catalog, defaulting to DEFAULT_WEEKLY_LIMIT
     food_items = food_manager.get_food_items()
-    for item in food_items:
-        # Set default weekly limit
-        food_items[item]['weekly_limit'] = DEFAULT_WEEKLY_LIMIT
     
     return food_manager.get_nutritional_constraints(), food_manager.get_order_constraints(), food_items
 
@@ -119,26 +184,54 @@ def print_configuration(food_manager):
     print(f"Carbs:    {CARBS['min']} - {CARBS['max']} g")
     print(f"Fiber:    {FIBER['min']} - {FIBER['max']} g")
     print(f"Sugar:    {SUGAR['min']} - {SUGAR['max']} g")
+    for nutrient, bounds in EXTRA_NUTRIENTS.items():
+        print(f"{nutrient.capitalize() + ':':<9} {bounds.get('min', 0)} - {bounds.get('max', 'no limit')}")
     print("\nOrder Constraints:")
     print(f"Minimum Order Value: ${MIN_ORDER_VALUE}")
     print(f"Delivery Fee: ${DELIVERY_FEE}")
     print(f"\nDefault Weekly Serving Limit: {DEFAULT_WEEKLY_LIMIT}")
     print("\nData Source:")
     print(f"Food Catalog: {FOOD_CATALOG_PATH}")
+    print(f"Catalog Cache: {CATALOG_CACHE}")
+    print(f"Catalog Pruning: {CATALOG_PRUNING}")
     print("\nOutput Configuration:")
     print(f"Output Directory: {OUTPUT_DIR}")
     print(f"Save Plots: {SAVE_PLOTS}")
     print(f"Save CSV: {SAVE_CSV}")
+    print(f"Lazy Formatted Results: {LAZY_FORMATTED_RESULTS}")
+    print(f"Solution Cache: {SOLUTION_CACHE_DIR or 'disabled'}")
     
     print("\nSolver Configuration:")
     print(f"Time Limit: {SOLVER_TIME_LIMIT} seconds")
+    print(f"Solver Threads: {SOLVER_THREADS or 'all cores'}")
     print(f"MIP Gap: {SOLVER_MIP_GAP * 100}%")
     print(f"Show Progress: {SOLVER_SHOW_PROGRESS}")
+    if SOLVER_PROGRESS_LOG:
+        print(f"Progress Log: {SOLVER_PROGRESS_LOG}")
+    for policy in SOLVER_STOP_POLICIES:
+        print(f"Stop Policy: {policy.describe()}")
+    print(f"Model Builder: {MODEL_BUILDER}")
+    print(f"Reduced Formulation: {REDUCED_FORMULATION}")
+    print(f"Derived Bounds: {DERIVED_BOUNDS}")
+    print(f"Solver Backend: {SOLVER_BACKEND or 'auto'}")
+    print(f"Warm Start: {SOLVER_WARM_START}")
+    print(f"Solve Mode: {SOLVE_MODE}")
+    print(f"Feasibility Check: {FEASIBILITY_CHECK}")
+    if ROLLING_HORIZON:
+        print(f"Rolling Horizon: {ROLLING_WINDOW_WEEKS}-week windows, {ROLLING_OVERLAP_WEEKS}-week overlap, "
+              f"{ROLLING_WINDOW_TIME_LIMIT}s per window")
+    if PERIODIC_MODE:
+        print(f"Periodic Mode: cycles of {PERIODIC_CYCLE_WEEKS} weeks, {PERIODIC_CYCLE_TIME_LIMIT}s per cycle")
+    if COLUMN_GENERATION:
+        print(f"Column Generation: {CG_INITIAL_ITEMS_PER_NUTRIENT} starting items per nutrient, "
+              f"up to {CG_COLUMNS_PER_ITERATION} items per round, {CG_MAX_ITERATIONS} rounds")
     print("=" * 50 + "\n")
 
 def main():
     # Initialize food data manager
-    food_manager = FoodDataManager(FOOD_CATALOG_PATH)
+    food_manager = FoodDataManager(
+        FOOD_CATALOG_PATH, use_cache=CATALOG_CACHE, default_weekly_limit=DEFAULT_WEEKLY_LIMIT
+    )
     
     # Print current configuration
     print_configuration(food_manager)
@@ -146,14 +239,38 @@ def main():
     # Update constraints based on configuration
     nutritional_constraints, order_constraints, food_items = update_constraints(food_manager)
     
+    if CATALOG_PRUNING:
+        pruner = CatalogPruner(food_items, nutritional_constraints)
+        food_items = pruner.prune()
+        pruner.report()
+    
+    if FEASIBILITY_CHECK:
+        checker = FeasibilityChecker(food_items, nutritional_constraints, order_constraints)
+        feasible = checker.check()
+        checker.report()
+        if not feasible:
+            print("Model not built: adjust the nutrient or order constraints in main.py.")
+            return
+    
     # Run optimization
     print("Running diet optimization...")
-    optimizer = DietOptimizer(
+    if PERIODIC_MODE:
+        optimizer_class = PeriodicOptimizer
+    elif ROLLING_HORIZON:
+        optimizer_class = RollingHorizonOptimizer
+    elif COLUMN_GENERATION:
+        optimizer_class = ColumnGenerationOptimizer
+    else:
+        optimizer_class = DietOptimizer
+    optimizer = optimizer_class(
         food_items=food_items,
         nutritional_constraints=nutritional_constraints,
         order_constraints=order_constraints
     )
     
+    if REPORT_LP_BOUNDS:
+        optimizer.bound_tightening_report()
+    
     # Get formatted results (this will trigger the solve operation once)
     formatted_results = optimizer.get_formatted_results()
     
@@ -167,57 +284,26 @@ def main():
     pd.set_option('display.max_rows', None)
     pd.set_option('display.max_columns', None)
     pd.set_option('display.width', None)
-    print(formatted_results['weekly_schedule'].to_string())
+    print(format_currency(formatted_results['weekly_schedule']).to_string())
     
     print("\n=== COST BREAKDOWN ===")
-    print(formatted_results['cost_summary'].to_string())
+    print(format_currency(formatted_results['cost_summary']).to_string())
     
     print("\n=== NUTRITIONAL SUMMARY ===")
-    print(formatted_results['nutritional_summary'].to_string())
+    print(format_currency(formatted_results['nutritional_summary']).to_string())
     
     if SAVE_PLOTS or SAVE_CSV:
         # Create output directory if it doesn't exist
         if not os.path.exists(OUTPUT_DIR):
             os.makedirs(OUTPUT_DIR)
             
-        # Get raw results for visualization
+        # Get raw results and the inventory ledger for visualization and export
         raw_results = optimizer.get_results()
+        ledger = optimizer.ledger()
         
         if SAVE_PLOTS:
             print("\n=== Generating Visualizations ===")
-            # Transform formatted results into the structure expected by visualizer
-            # Convert order schedule to use just servings instead of the full order info
-            order_schedule = []
-            for week_orders in raw_results['order_schedule']:
-                week_dict = {}
-                for item, order_info in week_orders.items():
-                    week_dict[item] = order_info['servings']
-                order_schedule.append(week_dict)
-            
-            # Calculate waste for each week
-            waste_schedule = []
-            for week in range(len(raw_results['order_schedule'])):
-                week_waste = {}
-                if week > 0:  # Can only calculate waste from second week onwards
-                    prev_inventory = raw_results['inventory_levels'][week-1]
-                    consumption = raw_results['consumption_schedule'][week]
-                    for item in food_items:
-                        if food_items[item]['perishable']:
-                            prev_qty = prev_inventory.get(item, 0)
-                            consumed = consumption.get(item, 0)
-                            if prev_qty > consumed:
-                                week_waste[item] = prev_qty - consumed
-                waste_schedule.append(week_waste)
-                
-            visualization_results = {
-                'order_schedule': order_schedule,
-                'consumption': raw_results['consumption_schedule'],
-                'waste': waste_schedule,
-                'cost_breakdown': raw_results['cost_breakdown']
-            }
-            
-            # Create visualizer instance with the transformed results
-            visualizer = OptimizationVisualizer(visualization_results, food_items)
+            visualizer = OptimizationVisualizer(ledger, raw_results['cost_breakdown'])
             
             # Create plots directory
             plots_dir = os.path.join(OUTPUT_DIR, 'plots')
@@ -248,14 +334,15 @@ def main():
         if SAVE_CSV:
             print("\n=== Saving Data Files ===")
             # Save main results
-            formatted_results['weekly_schedule'].to_csv(os.path.join(OUTPUT_DIR, 'weekly_schedule.csv'))
-            formatted_results['cost_summary'].to_csv(os.path.join(OUTPUT_DIR, 'cost_summary.csv'))
-            formatted_results['nutritional_summary'].to_csv(os.path.join(OUTPUT_DIR, 'nutritional_summary.csv'))
+            format_currency(formatted_results['weekly_schedule']).to_csv(os.path.join(OUTPUT_DIR, 'weekly_schedule.csv'))
+            format_currency(formatted_results['cost_summary']).to_csv(os.path.join(OUTPUT_DIR, 'cost_summary.csv'))
+            format_currency(formatted_results['nutritional_summary']).to_csv(os.path.join(OUTPUT_DIR, 'nutritional_summary.csv'))
             
             # Save additional detailed data
-            pd.DataFrame(raw_results['order_schedule']).to_csv(os.path.join(OUTPUT_DIR, 'detailed_orders.csv'))
-            pd.DataFrame(raw_results['consumption_schedule']).to_csv(os.path.join(OUTPUT_DIR, 'detailed_consumption.csv'))
-            pd.DataFrame(raw_results['inventory_levels']).to_csv(os.path.join(OUTPUT_DIR, 'detailed_inventory.csv'))
+            ledger.to_frame('order').to_csv(os.path.join(OUTPUT_DIR, 'detailed_orders.csv'))
+            ledger.to_frame('eat').to_csv(os.path.join(OUTPUT_DIR, 'detailed_consumption.csv'))
+            ledger.to_frame('inventory').to_csv(os.path.join(OUTPUT_DIR, 'detailed_inventory.csv'))
+            ledger.to_frame('waste').to_csv(os.path.join(OUTPUT_DIR, 'detailed_waste.csv'))
             
             # Save a summary of the optimization parameters
             with open(os.path.join(OUTPUT_DIR, 'optimization_parameters.txt'), 'w') as f:
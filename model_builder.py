@@ -0,0 +1,446 @@
+"""
+Sparse matrix builder for the diet optimization model.
+
+Assembles the same MILP as the PuLP formulation in DietOptimizer, but builds every
+constraint family as a block of a scipy.sparse matrix from NumPy arrays of the
+catalog instead of one PuLP expression at a time. All rows are expressed in the
+ranged form row_lower <= A @ x <= row_upper.
+"""
+
+import numpy as np
+import scipy.sparse as sp
+
+from food_data_manager import FoodCatalog
+
+# Nutrients of the standard catalog
+NUTRIENTS = ['calories', 'protein', 'fat', 'carbs', 'fiber', 'sugar']
+
+# Per (week, item) variable families, in column order
+ITEM_FAMILIES = ['order', 'eat', 'inventory', 'packages']
+
+# Big-M used to link orders to the weekly order indicator; also the largest order
+# of any item in one week
+ORDER_LINK_M = 1000
+
+
+def constrained_nutrients(food_items, nutritional_constraints):
+    """
+    Return the nutrients the model constrains, in row order within each week.
+
+    A nutrient is constrained if it has an entry in nutritional_constraints and a
+    value for every food item.
+    """
+    if isinstance(food_items, FoodCatalog):
+        return [nutrient for nutrient in nutritional_constraints if nutrient in food_items.nutrient_keys]
+    return [
+        nutrient for nutrient in nutritional_constraints
+        if all(nutrient in item for item in food_items.values())
+    ]
+
+
+def nutrient_bounds(nutritional_constraints, nutrients):
+    """Return arrays of weekly minimums and maximums; a missing bound is unconstrained."""
+    mins = np.array([nutritional_constraints[n].get('min', 0.0) for n in nutrients], dtype=float)
+    maxs = np.array([nutritional_constraints[n].get('max', np.inf) for n in nutrients], dtype=float)
+    return mins, maxs
+
+
+def catalog_arrays(food_items, nutrients=NUTRIENTS):
+    """
+    Convert the food items into dense NumPy arrays.
+
+    A FoodCatalog already holds the arrays, so only the nutrient columns are selected.
+
+    Args:
+        food_items (FoodCatalog or dict): Food items and their attributes
+        nutrients (list): Nutrient keys to extract, in column order
+
+    Returns:
+        dict: Item keys plus cost, nutrient matrix (items x nutrients), package size,
+            weekly limit and perishable mask arrays, all in the same item order
+    """
+    if isinstance(food_items, FoodCatalog):
+        return {
+            'keys': food_items.item_keys,
+            'cost': food_items.cost,
+            'nutrients': food_items.nutrient_matrix(nutrients),
+            'package_size': food_items.package_size,
+            'weekly_limit': food_items.weekly_limit,
+            'perishable': food_items.perishable,
+        }
+    keys = list(food_items.keys())
+    items = [food_items[key] for key in keys]
+    return {
+        'keys': keys,
+        'cost': np.array([item['cost'] for item in items], dtype=float),
+        'nutrients': np.array(
+            [[item[n] for n in nutrients] for item in items], dtype=float
+        ).reshape(len(items), len(nutrients)),
+        'package_size': np.array([item['package_size'] for item in items], dtype=float),
+        'weekly_limit': np.array([item['weekly_limit'] for item in items], dtype=float),
+        'perishable': np.array([bool(item['perishable']) for item in items], dtype=bool),
+    }
+
+
+def derive_bounds(catalog, order_constraints):
+    """
+    Derive upper bounds on orders, packages and inventory for every week and item.
+
+    A perishable item is eaten in the week it is ordered, so more than
+    floor(weekly_limit / package_size) packages are never useful. Non-perishable
+    stock ordered in week w can only be eaten from week w - 1 on, so orders are
+    bounded by the servings that can still be eaten, rounded up to whole packages
+    (in a cyclic model, by a whole cycle of servings). No order exceeds
+    ORDER_LINK_M. Inventory never exceeds the stock carried in plus everything that
+    could have been ordered so far.
+
+    Args:
+        catalog (dict): Catalog arrays from catalog_arrays
+        order_constraints (dict): Dictionary of order constraints
+
+    Returns:
+        dict: weeks x items arrays of upper bounds for 'order', 'packages' and 'inventory'
+    """
+    n_weeks = order_constraints['total_weeks']
+    size = catalog['package_size']
+    limit = catalog['weekly_limit']
+    perishable = catalog['perishable']
+    cyclic = order_constraints.get('cyclic_inventory', False)
+
+    week = np.arange(n_weeks)[:, None]
+    remaining_weeks = np.full((n_weeks, 1), n_weeks) if cyclic else np.minimum(n_weeks - week + 1, n_weeks)
+    useful = np.where(
+        perishable,
+        np.floor(limit / size),
+        np.ceil(np.round(limit * remaining_weeks / size, 6))
+    )
+    packages = np.minimum(useful, np.floor(ORDER_LINK_M / size))
+    order = packages * size
+
+    initial_inventory = {} if cyclic else order_constraints.get('initial_inventory') or {}
+    carried = np.array([max(float(initial_inventory.get(key, 0)), 0.0) for key in catalog['keys']])
+    ordered_so_far = np.broadcast_to(order.sum(axis=0), order.shape) if cyclic else np.cumsum(order, axis=0)
+    inventory = np.where(perishable, order, carried + ordered_so_far)
+    return {'order': order, 'packages': packages, 'inventory': inventory}
+
+
+class ModelMatrices:
+    """Sparse representation of the diet MILP: minimize cost @ x subject to
+    row_lower <= A @ x <= row_upper and col_lower <= x <= col_upper.
+
+    A reduced model keeps only some of the columns; expand maps its solution
+    vectors back to the full column layout and kept lists the full column of
+    each reduced column.
+    """
+
+    def __init__(self, A, row_lower, row_upper, cost, col_lower, col_upper,
+                 integrality, n_weeks, item_keys, row_blocks, expand=None, kept=None):
+        self.A = A
+        self.row_lower = row_lower
+        self.row_upper = row_upper
+        self.cost = cost
+        self.col_lower = col_lower
+        self.col_upper = col_upper
+        self.integrality = integrality
+        self.n_weeks = n_weeks
+        self.item_keys = item_keys
+        self.row_blocks = row_blocks  # Constraint family name -> slice of rows
+        self.expand = expand  # Sparse full columns x reduced columns map, or None
+        self.kept = kept  # Full column index of each reduced column, or None
+
+    @property
+    def n_items(self):
+        return len(self.item_keys)
+
+    @property
+    def num_rows(self):
+        return self.A.shape[0]
+
+    @property
+    def num_cols(self):
+        return self.A.shape[1]
+
+    def column(self, family, week=0, item=0):
+        """Return the column index of a variable in the full column layout."""
+        if family == 'order_week':
+            return len(ITEM_FAMILIES) * self.n_weeks * self.n_items + week
+        cells = self.n_weeks * self.n_items
+        return ITEM_FAMILIES.index(family) * cells + week * self.n_items + item
+
+    def unpack(self, x):
+        """
+        Split a solution vector into per-family arrays.
+
+        Args:
+            x (np.ndarray): Solution vector with one entry per column
+
+        Returns:
+            dict: weeks x items arrays for each item family and a weeks array
+                for 'order_week'. Integer columns are rounded to whole numbers.
+        """
+        x = np.where(self.integrality > 0, np.round(x), x)
+        if self.expand is not None:
+            x = self.expand @ x
+        cells = self.n_weeks * self.n_items
+        values = {
+            family: x[k * cells:(k + 1) * cells].reshape(self.n_weeks, self.n_items)
+            for k, family in enumerate(ITEM_FAMILIES)
+        }
+        values['order_week'] = x[len(ITEM_FAMILIES) * cells:]
+        return values
+
+    def pack(self, values):
+        """
+        Assemble a solution vector from per-family arrays (the inverse of unpack).
+
+        Args:
+            values (dict): weeks x items arrays for each item family and a weeks
+                array for 'order_week'
+
+        Returns:
+            np.ndarray: Solution vector with one entry per column
+        """
+        x = np.concatenate(
+            [np.asarray(values[family], dtype=float).ravel() for family in ITEM_FAMILIES]
+            + [np.asarray(values['order_week'], dtype=float)]
+        )
+        return x if self.kept is None else x[self.kept]
+
+    def objective(self, x):
+        """Evaluate the objective for a solution vector."""
+        return float(self.cost @ x)
+
+    def is_feasible(self, x, tol=1e-6):
+        """Check a solution vector against all rows and column bounds."""
+        activity = self.A @ x
+        return bool(
+            np.all(activity >= self.row_lower - tol)
+            and np.all(activity <= self.row_upper + tol)
+            and np.all(x >= self.col_lower - tol)
+            and np.all(x <= self.col_upper + tol)
+        )
+
+
+def build_model_matrices(food_items, nutritional_constraints, order_constraints):
+    """
+    Build the diet optimization model as sparse coefficient matrices.
+
+    The feasible set and objective are identical to the PuLP formulation built by
+    DietOptimizer; min/max nutrient pairs become a single ranged row per week.
+
+    Args:
+        food_items (dict): Dictionary of food items and their attributes
+        nutritional_constraints (dict): Dictionary of nutritional constraints
+        order_constraints (dict): Dictionary of order constraints
+
+    Unless order_constraints['derived_bounds'] is False, the bounds from
+    derive_bounds are used as column upper bounds and as the per-item order link
+    coefficients. If order_constraints['reduced_formulation'] is set, the variables
+    implied by the package-size and perishable equalities are substituted out, see
+    reduce_model_matrices.
+
+    Returns:
+        ModelMatrices: The assembled model
+    """
+    nutrients = constrained_nutrients(food_items, nutritional_constraints)
+    catalog = catalog_arrays(food_items, nutrients)
+    n_weeks = order_constraints['total_weeks']
+    n_items = len(catalog['keys'])
+    cells = n_weeks * n_items
+    n_cols = len(ITEM_FAMILIES) * cells + n_weeks
+
+    # Column indices of every (week, item) cell for each family
+    cell = np.arange(cells)
+    week_of = cell // n_items
+    item_of = cell % n_items
+    col = {family: k * cells + cell for k, family in enumerate(ITEM_FAMILIES)}
+    order_week_col = len(ITEM_FAMILIES) * cells + np.arange(n_weeks)
+    perishable = catalog['perishable'][item_of]
+    bounds = derive_bounds(catalog, order_constraints) if order_constraints.get('derived_bounds', True) else None
+
+    blocks = []
+
+    # Inventory balance: inventory[w,i] == inventory[w-1,i] + order[w,i] - eat[w-1,i]
+    # for non-perishables after week 0, inventory[0,i] == initial[i] + order[0,i] for
+    # non-perishables carried in and inventory[w,i] == order[w,i] otherwise. A cyclic
+    # model wraps week 0 around to the last week instead of carrying stock in.
+    cyclic = order_constraints.get('cyclic_inventory', False)
+    carry = ((week_of > 0) | cyclic) & ~perishable
+    previous = np.where(week_of > 0, cell - n_items, cell + (n_weeks - 1) * n_items)[carry]
+    rows = np.concatenate([cell, cell, cell[carry], cell[carry]])
+    cols = np.concatenate([
+        col['inventory'], col['order'],
+        col['inventory'][previous], col['eat'][previous],
+    ])
+    vals = np.concatenate([
+        np.ones(cells), -np.ones(cells), -np.ones(carry.sum()), np.ones(carry.sum()),
+    ])
+    initial_inventory = {} if cyclic else order_constraints.get('initial_inventory') or {}
+    balance = np.zeros(cells)
+    balance[:n_items] = np.where(
+        catalog['perishable'], 0.0,
+        [float(initial_inventory.get(key, 0)) for key in catalog['keys']]
+    )
+    blocks.append(('inventory', rows, cols, vals, balance, balance))
+
+    # Nutrition: week-block matrix with one ranged row per nutrient and week
+    nutrient_block = sp.kron(sp.identity(n_weeks), catalog['nutrients'].T, format='coo')
+    mins, maxs = nutrient_bounds(nutritional_constraints, nutrients)
+    blocks.append((
+        'nutrition', nutrient_block.row, col['eat'][nutrient_block.col], nutrient_block.data,
+        np.tile(mins, n_weeks), np.tile(maxs, n_weeks),
+    ))
+
+    # Minimum order value: sum(order * cost) - min_order_value * order_week >= 0
+    weeks = np.arange(n_weeks)
+    rows = np.concatenate([week_of, weeks])
+    cols = np.concatenate([col['order'], order_week_col])
+    vals = np.concatenate([
+        catalog['cost'][item_of],
+        np.full(n_weeks, -float(order_constraints['min_order_value'])),
+    ])
+    blocks.append(('min_order', rows, cols, vals, np.zeros(n_weeks), np.full(n_weeks, np.inf)))
+
+    # Link orders to the weekly order indicator: order - M * order_week <= 0, with
+    # M the derived order bound of the item if available
+    link_m = bounds['order'].ravel() if bounds is not None else np.full(cells, float(ORDER_LINK_M))
+    rows = np.concatenate([cell, cell])
+    cols = np.concatenate([col['order'], order_week_col[week_of]])
+    vals = np.concatenate([np.ones(cells), -link_m])
+    blocks.append(('order_link', rows, cols, vals, np.full(cells, -np.inf), np.zeros(cells)))
+
+    # Perishables must be eaten in the week they are ordered: eat - order == 0
+    n_perishable = perishable.sum()
+    rows = np.tile(np.arange(n_perishable), 2)
+    cols = np.concatenate([col['eat'][perishable], col['order'][perishable]])
+    vals = np.concatenate([np.ones(n_perishable), -np.ones(n_perishable)])
+    blocks.append(('perishable', rows, cols, vals, np.zeros(n_perishable), np.zeros(n_perishable)))
+
+    # Orders come in whole packages: order - package_size * packages == 0
+    rows = np.concatenate([cell, cell])
+    cols = np.concatenate([col['order'], col['packages']])
+    vals = np.concatenate([np.ones(cells), -catalog['package_size'][item_of]])
+    blocks.append(('package_size', rows, cols, vals, np.zeros(cells), np.zeros(cells)))
+
+    # Stack the blocks in a fixed order
+    all_rows, all_cols, all_vals, lowers, uppers = [], [], [], [], []
+    row_blocks = {}
+    offset = 0
+    for name, rows, cols, vals, lower, upper in blocks:
+        all_rows.append(rows + offset)
+        all_cols.append(cols)
+        all_vals.append(vals)
+        lowers.append(lower)
+        uppers.append(upper)
+        row_blocks[name] = slice(offset, offset + len(lower))
+        offset += len(lower)
+
+    A = sp.csr_matrix(
+        (np.concatenate(all_vals), (np.concatenate(all_rows), np.concatenate(all_cols))),
+        shape=(offset, n_cols),
+    )
+
+    # Objective: item costs plus delivery fees
+    cost = np.zeros(n_cols)
+    cost[col['order']] = catalog['cost'][item_of]
+    cost[order_week_col] = float(order_constraints['delivery_fee'])
+
+    # Weekly serving limits are upper bounds on the eat columns rather than rows
+    col_upper = np.full(n_cols, np.inf)
+    col_upper[order_week_col] = 1.0
+    col_upper[col['eat']] = catalog['weekly_limit'][item_of]
+    if bounds is not None:
+        for family in ('order', 'packages', 'inventory'):
+            col_upper[col[family]] = bounds[family].ravel()
+
+    matrices = ModelMatrices(
+        A=A,
+        row_lower=np.concatenate(lowers),
+        row_upper=np.concatenate(uppers),
+        cost=cost,
+        col_lower=np.zeros(n_cols),
+        col_upper=col_upper,
+        integrality=np.ones(n_cols, dtype=np.uint8),
+        n_weeks=n_weeks,
+        item_keys=catalog['keys'],
+        row_blocks=row_blocks,
+    )
+    if order_constraints.get('reduced_formulation', False):
+        matrices = reduce_model_matrices(matrices, catalog)
+    return matrices
+
+
+def reduce_model_matrices(matrices, catalog):
+    """
+    Substitute out the variables implied by equality rows.
+
+    order == package_size * packages for every item, and eat == inventory == order
+    for perishables, so those columns are replaced by package_size * packages.
+    Only packages, order_week and the non-perishable eat and inventory columns are
+    kept; rows left without coefficients are dropped. The upper bound of a dropped
+    column c * packages carries over to the integer packages column as
+    floor(upper / c).
+
+    Args:
+        matrices (ModelMatrices): The full model
+        catalog (dict): Catalog arrays from catalog_arrays
+
+    Returns:
+        ModelMatrices: The reduced model, with expand and kept set
+    """
+    n_weeks, n_items = matrices.n_weeks, matrices.n_items
+    cells = n_weeks * n_items
+    cell = np.arange(cells)
+    perishable = catalog['perishable'][cell % n_items]
+    size = catalog['package_size'][cell % n_items]
+    col = {family: k * cells + cell for k, family in enumerate(ITEM_FAMILIES)}
+    order_week_col = len(ITEM_FAMILIES) * cells + np.arange(n_weeks)
+
+    kept = np.concatenate([
+        col['eat'][~perishable], col['inventory'][~perishable], col['packages'], order_week_col,
+    ])
+    reduced_index = np.full(matrices.num_cols, -1)
+    reduced_index[kept] = np.arange(len(kept))
+
+    # Every full column is a multiple of one kept column
+    packages = reduced_index[col['packages']]
+    source = np.concatenate([kept, col['order'], col['eat'][perishable], col['inventory'][perishable]])
+    target = np.concatenate([np.arange(len(kept)), packages, packages[perishable], packages[perishable]])
+    coefficient = np.concatenate([np.ones(len(kept)), size, size[perishable], size[perishable]])
+    expand = sp.csr_matrix((coefficient, (source, target)), shape=(matrices.num_cols, len(kept)))
+
+    A = (matrices.A @ expand).tocsr()
+    A.eliminate_zeros()
+    keep_rows = np.diff(A.indptr) > 0
+    empty = ~keep_rows
+    if np.any(matrices.row_lower[empty] > 1e-9) or np.any(matrices.row_upper[empty] < -1e-9):
+        raise ValueError("Substitution left an infeasible empty row")
+
+    # Row blocks shrink by the rows they lose
+    new_offset = np.concatenate([[0], np.cumsum(keep_rows)])
+    row_blocks = {
+        name: slice(int(new_offset[rows.start]), int(new_offset[rows.stop]))
+        for name, rows in matrices.row_blocks.items()
+    }
+
+    col_upper = matrices.col_upper[kept].copy()
+    dropped = len(kept)
+    np.minimum.at(
+        col_upper, target[dropped:],
+        np.floor(np.round(matrices.col_upper[source[dropped:]] / coefficient[dropped:], 9))
+    )
+
+    return ModelMatrices(
+        A=A[keep_rows],
+        row_lower=matrices.row_lower[keep_rows],
+        row_upper=matrices.row_upper[keep_rows],
+        cost=expand.T @ matrices.cost,
+        col_lower=matrices.col_lower[kept],
+        col_upper=col_upper,
+        integrality=matrices.integrality[kept],
+        n_weeks=n_weeks,
+        item_keys=matrices.item_keys,
+        row_blocks=row_blocks,
+        expand=expand,
+        kept=kept,
+    )
@@ -0,0 +1,188 @@
+"""
+Persistent optimizer session for interactive what-if re-solves.
+
+The sparse model is built once and kept loaded in a HiGHS instance. Price, nutrient
+bound, delivery fee, minimum order value and availability changes are written into
+the model arrays and the HiGHS instance in place, and each re-solve starts from the
+previous plan if it is still feasible. Nothing is rebuilt, so a re-solve costs only
+the solver time.
+"""
+
+import copy
+import numpy as np
+
+from diet_optimizer import DietOptimizer
+from highs_backend import PersistentHighsBackend, highs_available
+from model_builder import ITEM_FAMILIES, catalog_arrays
+
+
+class OptimizerSession(DietOptimizer):
+    """DietOptimizer whose model is updated in place and re-solved from the previous plan."""
+
+    def __init__(self, food_items, nutritional_constraints, order_constraints):
+        """
+        Build the model once and keep it loaded in HiGHS.
+
+        Args:
+            food_items (FoodCatalog or dict): Food items and their attributes
+            nutritional_constraints (dict): Dictionary of nutritional constraints
+            order_constraints (dict): Dictionary of order constraints
+        """
+        if not highs_available():
+            raise ImportError("highspy is required for an optimizer session")
+        super().__init__(
+            food_items,
+            copy.deepcopy(nutritional_constraints),
+            dict(order_constraints, model_builder='matrix', solver_backend='highs', reduced_formulation=False)
+        )
+        self.solver = PersistentHighsBackend(
+            time_limit=self.solver.time_limit,
+            mip_gap=self.solver.mip_gap,
+            threads=self.solver.threads
+        )
+        # Private copy of the catalog arrays that the updates change
+        self.food_items = self.food_items.subset(np.arange(len(self.food_items)))
+        self.catalog = catalog_arrays(self.food_items, self.nutrients)
+        self.index = {key: i for i, key in enumerate(self.catalog['keys'])}
+        self.weekly_limit = self.food_items.weekly_limit.copy()
+        self.available = np.ones(len(self.index), dtype=bool)
+        self.original_col_upper = self.matrices.col_upper.copy()
+        self.previous_solution = None  # Solution vector of the last successful solve
+
+        # Positions in A.data of the cost coefficients of the minimum order rows
+        A = self.matrices.A
+        rows = np.repeat(np.arange(A.shape[0]), np.diff(A.indptr))
+        min_order_rows = self.matrices.row_blocks['min_order']
+        in_min_order = (rows >= min_order_rows.start) & (rows < min_order_rows.stop)
+        self.cells = len(self.weeks) * len(self.index)
+        self.min_order_item_entries = np.flatnonzero(in_min_order & (A.indices < self.cells))
+        self.min_order_week_entries = np.flatnonzero(in_min_order & (A.indices >= len(ITEM_FAMILIES) * self.cells))
+
+    def _invalidate(self):
+        """Forget the solution of the model before the update."""
+        self._has_solved = False
+        self._solution_status = None
+        self._solution_vector = None
+        self._solution_arrays = None
+        self._results = None
+        self._ledger = None
+        self._lp_lower_bound = None
+
+    def _change_coefficients(self, entries, values):
+        """Set entries of A.data and the matching coefficients in HiGHS."""
+        A = self.matrices.A
+        A.data[entries] = values
+        h = self.solver.h
+        if h is not None:
+            rows = np.searchsorted(A.indptr, entries, side='right') - 1
+            for row, col, value in zip(rows, A.indices[entries], A.data[entries]):
+                h.changeCoeff(int(row), int(col), float(value))
+
+    def _change_costs(self, cols):
+        """Push the objective coefficients of the given columns to HiGHS."""
+        if self.solver.h is not None:
+            cols = np.asarray(cols, dtype=np.int32)
+            self.solver.h.changeColsCost(len(cols), cols, self.matrices.cost[cols])
+
+    def _change_col_bounds(self, cols):
+        """Push the bounds of the given columns to HiGHS."""
+        if self.solver.h is not None:
+            cols = np.asarray(cols, dtype=np.int32)
+            self.solver.h.changeColsBounds(
+                len(cols), cols, self.matrices.col_lower[cols], self.matrices.col_upper[cols]
+            )
+
+    def _item_cols(self, items, families=ITEM_FAMILIES):
+        """Columns of the given item positions in every week for the given families."""
+        n_items = len(self.index)
+        cell = (np.arange(len(self.weeks))[:, None] * n_items + np.asarray(items)[None, :]).ravel()
+        return np.concatenate([ITEM_FAMILIES.index(family) * self.cells + cell for family in families])
+
+    def update_costs(self, costs):
+        """
+        Change the cost per serving of some items.
+
+        Args:
+            costs (dict): Item key -> new cost per serving
+        """
+        items = np.array([self.index[key] for key in costs], dtype=int)
+        new_cost = self.food_items.cost.copy()
+        new_cost[items] = [float(costs[key]) for key in costs]
+        changed = items[new_cost[items] != self.food_items.cost[items]]
+        self.food_items.cost = new_cost
+        self.catalog = catalog_arrays(self.food_items, self.nutrients)
+        if len(changed):
+            cols = self._item_cols(changed, ['order'])
+            self.matrices.cost[cols] = new_cost[cols % len(self.index)]
+            self._change_costs(cols)
+            # The minimum order rows weigh each order by its cost
+            entries = self.min_order_item_entries[
+                np.isin(self.matrices.A.indices[self.min_order_item_entries], cols)
+            ]
+            self._change_coefficients(entries, new_cost[self.matrices.A.indices[entries] % len(self.index)])
+        self._invalidate()
+
+    def set_nutrient_bounds(self, nutrient, min_value=None, max_value=None):
+        """
+        Change the weekly bounds of a constrained nutrient; None keeps a bound unchanged.
+
+        Args:
+            nutrient (str): Nutrient key, e.g. 'protein'
+            min_value (float): New weekly minimum
+            max_value (float): New weekly maximum, np.inf for none
+        """
+        if nutrient not in self.nutrients:
+            raise ValueError(f"{nutrient} is not a constrained nutrient of the model")
+        bounds = self.nutritional_constraints[nutrient]
+        if min_value is not None:
+            bounds['min'] = min_value
+        if max_value is not None:
+            bounds['max'] = max_value
+        j = self.nutrients.index(nutrient)
+        rows = self.matrices.row_blocks['nutrition'].start + np.arange(len(self.weeks)) * len(self.nutrients) + j
+        self.matrices.row_lower[rows] = bounds.get('min', 0.0)
+        self.matrices.row_upper[rows] = bounds.get('max', np.inf)
+        if self.solver.h is not None:
+            for row in rows:
+                self.solver.h.changeRowBounds(int(row), self.matrices.row_lower[row], self.matrices.row_upper[row])
+        self._invalidate()
+
+    def set_delivery_fee(self, fee):
+        """Change the delivery fee charged for every week with an order."""
+        self.order_constraints['delivery_fee'] = fee
+        cols = len(ITEM_FAMILIES) * self.cells + np.arange(len(self.weeks))
+        self.matrices.cost[cols] = float(fee)
+        self._change_costs(cols)
+        self._invalidate()
+
+    def set_min_order_value(self, value):
+        """Change the minimum value of an order."""
+        self.order_constraints['min_order_value'] = value
+        self._change_coefficients(self.min_order_week_entries, -float(value))
+        self._invalidate()
+
+    def set_available(self, key, available=True):
+        """
+        Make an item available or unavailable; an unavailable item cannot be ordered or eaten.
+
+        Args:
+            key (str): Item key
+            available (bool): Whether the item can be used
+        """
+        i = self.index[key]
+        self.available[i] = available
+        self.food_items.set_weekly_limit(np.where(self.available, self.weekly_limit, 0.0))
+        self.catalog = catalog_arrays(self.food_items, self.nutrients)
+        cols = self._item_cols([i])
+        self.matrices.col_upper[cols] = self.original_col_upper[cols] if available else 0.0
+        self._change_col_bounds(cols)
+        self._invalidate()
+
+    def _run_solver(self, start=None):
+        """Solve from the previous plan when it is still feasible."""
+        if start is None and self.previous_solution is not None and self.matrices.is_feasible(self.previous_solution):
+            start = self.matrices.unpack(self.previous_solution)
+        status = super()._run_solver(start)
+        if self._solution_vector is not None:
+            self.previous_solution = self._solution_vector
+        return status
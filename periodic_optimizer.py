@@ -0,0 +1,161 @@
+"""
+Periodic (cyclic) schedules for stationary planning horizons.
+
+Every week has the same nutrient bounds, costs and limits, so instead of one MILP
+over the whole horizon the cheapest repeating p-week cycle is found for a few small
+p. In the cycle the non-perishable stock left after the last week feeds the first
+week. The best cycle is rotated to start with a delivery, the stock it expects to
+carry in is bought up front and the cycle is tiled across the horizon. The LP
+relaxation of the full model bounds how far the tiled plan can be from optimal.
+"""
+
+import contextlib
+import io
+import time
+import numpy as np
+import pulp
+
+from diet_optimizer import DietOptimizer
+from highs_backend import HighsBackend, highs_available
+from model_builder import ORDER_LINK_M, build_model_matrices
+
+
+class PeriodicOptimizer(DietOptimizer):
+    """DietOptimizer that tiles the cheapest repeating cycle over the horizon."""
+
+    def __init__(self, food_items, nutritional_constraints, order_constraints):
+        """
+        Initialize the optimizer.
+
+        Besides the DietOptimizer settings, order_constraints may contain
+        'periodic_cycle_weeks' (cycle lengths to try) and 'periodic_cycle_time_limit'
+        (seconds per cycle solve).
+
+        Args:
+            food_items (dict): Dictionary of food items and their attributes
+            nutritional_constraints (dict): Dictionary of nutritional constraints
+            order_constraints (dict): Dictionary of order constraints
+        """
+        self.cycle_lengths = [
+            p for p in order_constraints.get('periodic_cycle_weeks', [1, 2, 3, 4])
+            if 1 <= p <= order_constraints['total_weeks']
+        ]
+        if not self.cycle_lengths:
+            raise ValueError("periodic_cycle_weeks needs a cycle length between 1 and total_weeks")
+        self.cycle_time_limit = order_constraints.get('periodic_cycle_time_limit', 60)
+        self.cycles = []  # Summary of each solved cycle length
+        self.cycle_weeks = None  # Length of the tiled cycle
+        self.lower_bound = None  # LP relaxation bound of the full horizon
+        self.bound_gap = None  # Relative gap between the tiled plan and the bound
+        self.derived_bounds = order_constraints.get('derived_bounds', True)
+        # Tiled orders near the end of the horizon buy stock for the rest of the cycle,
+        # which the derived bounds rule out, so the horizon model holding the tiled
+        # plan is built without them
+        super().__init__(food_items, nutritional_constraints, dict(order_constraints, derived_bounds=False))
+
+    def _run_solver(self, start=None):
+        """Solve the cycles, tile the cheapest one and store it as the solution."""
+        cost = self.catalog['cost']
+        delivery_fee = float(self.order_constraints['delivery_fee'])
+
+        best = None
+        self.cycles = []
+        for p in self.cycle_lengths:
+            start_time = time.time()
+            values = self._solve_cycle(p)
+            solve_time = time.time() - start_time
+            plan = self._tile(values) if values is not None else None
+            tiled_cost = None
+            if plan is not None:
+                tiled_cost = float((plan['order'] @ cost).sum()) + delivery_fee * float(plan['order_week'].sum())
+            self.cycles.append({'cycle_weeks': p, 'tiled_cost': tiled_cost, 'solve_time': solve_time})
+            if self.show_progress:
+                outcome = f"${tiled_cost:.2f} over the horizon" if tiled_cost is not None else "no feasible cycle"
+                print(f"{p}-week cycle: {outcome} ({solve_time:.1f}s)")
+            if tiled_cost is not None and (best is None or tiled_cost < best[0]):
+                best = (tiled_cost, p, plan)
+
+        if best is None:
+            print("No feasible cycle found")
+            return pulp.LpStatusInfeasible
+
+        self.cycle_weeks = best[1]
+        status = self._use_start_solution(best[2])
+        self._report_bound()
+        self.progress.update('periodic', incumbent=self._objective_value(), bound=self.lower_bound)
+        return status
+
+    def _solve_cycle(self, p):
+        """
+        Find the cheapest p-week cycle.
+
+        Returns:
+            dict: p x items arrays per variable family, or None if no feasible
+                cycle was found
+        """
+        constraints = dict(self.order_constraints)
+        constraints.update({
+            'total_weeks': p,
+            'cyclic_inventory': True,
+            'derived_bounds': self.derived_bounds,
+            'solver_time_limit': self.cycle_time_limit,
+            'solver_show_progress': False,
+            'solver_progress_callback': None,
+            'solver_progress_log': None,
+            'solver_stop_policies': None
+        })
+        with contextlib.redirect_stdout(io.StringIO()):
+            cycle = DietOptimizer(self.food_items, self.nutritional_constraints, constraints)
+            if not cycle.solve():
+                return None
+            return cycle.solution_arrays()
+
+    def _tile(self, values):
+        """
+        Expand a cycle to the full horizon.
+
+        The cycle is rotated so its first week has a delivery, and the first week also
+        buys the non-perishable stock the cycle expects to carry in, rounded up to
+        whole packages.
+
+        Returns:
+            dict: weeks x items arrays per variable family, or None if the cycle
+                has no delivery or the start-up order exceeds the order limit
+        """
+        ordering = np.nonzero(values['order_week'] > 0.5)[0]
+        if len(ordering) == 0:
+            return None
+        rotated = {family: np.roll(values[family], -ordering[0], axis=0) for family in values}
+
+        size = self.catalog['package_size']
+        perishable = self.catalog['perishable']
+        carried_in = np.where(perishable, 0.0, rotated['inventory'][-1] - rotated['eat'][-1])
+        startup_packages = np.ceil(np.round(np.maximum(carried_in, 0) / size, 6))
+        surplus = startup_packages * size - carried_in  # Stock left over from rounding up
+
+        n_weeks = self.order_constraints['total_weeks']
+        cycle = np.arange(n_weeks) % len(values['order_week'])
+        plan = {family: rotated[family][cycle].copy() for family in values}
+        plan['order'][0] += startup_packages * size
+        plan['packages'][0] += startup_packages
+        plan['inventory'] += np.where(perishable, 0.0, surplus)
+        if (plan['order'][0] > ORDER_LINK_M).any():
+            return None
+        return plan
+
+    def _report_bound(self):
+        """Bound the tiled plan with the LP relaxation of the full horizon."""
+        if not highs_available():
+            print("LP bound unavailable without highspy")
+            return
+        constraints = dict(self.order_constraints, derived_bounds=self.derived_bounds)
+        matrices = build_model_matrices(self.food_items, self.nutritional_constraints, constraints)
+        with self._solver_threads() as threads:
+            result = HighsBackend(time_limit=self.cycle_time_limit, threads=threads).solve_relaxation(matrices)
+        if not result.is_optimal:
+            return
+        self.lower_bound = result.objective
+        cost = self._objective_value()
+        self.bound_gap = (cost - self.lower_bound) / max(abs(cost), 1e-9)
+        print(f"Best cycle: {self.cycle_weeks} weeks, ${cost:.2f} over {self.order_constraints['total_weeks']} weeks; "
+              f"LP bound ${self.lower_bound:.2f} (gap {self.bound_gap * 100:.1f}%)")
@@ -0,0 +1,148 @@
+"""
+Rolling-horizon decomposition for long planning horizons.
+
+Instead of one MILP over every week, overlapping windows of a few weeks are solved
+one after another. The first weeks of each window are committed, the non-perishable
+stock they leave behind is carried into the next window as its initial inventory and
+the window moves on, so solve time grows roughly linearly with the number of weeks.
+"""
+
+import contextlib
+import io
+import time
+import numpy as np
+import pulp
+
+from diet_optimizer import DietOptimizer
+from model_builder import ITEM_FAMILIES
+
+
+class RollingHorizonOptimizer(DietOptimizer):
+    """DietOptimizer that solves the planning horizon in overlapping windows."""
+
+    def __init__(self, food_items, nutritional_constraints, order_constraints):
+        """
+        Initialize the optimizer.
+
+        Besides the DietOptimizer settings, order_constraints may contain
+        'rolling_window_weeks' (weeks per window), 'rolling_overlap_weeks' (weeks
+        re-planned by the next window), 'rolling_window_time_limit' (seconds per
+        window) and 'rolling_reference_cost' (cost of a monolithic solve to compare with).
+
+        Args:
+            food_items (dict): Dictionary of food items and their attributes
+            nutritional_constraints (dict): Dictionary of nutritional constraints
+            order_constraints (dict): Dictionary of order constraints
+        """
+        self.window_weeks = order_constraints.get('rolling_window_weeks', 8)
+        self.overlap_weeks = order_constraints.get('rolling_overlap_weeks', 4)
+        self.window_time_limit = order_constraints.get('rolling_window_time_limit', 60)
+        self.reference_cost = order_constraints.get('rolling_reference_cost')
+        if not 0 <= self.overlap_weeks < self.window_weeks:
+            raise ValueError("rolling_overlap_weeks must be at least 0 and less than rolling_window_weeks")
+        self.windows = []  # Summary of each solved window
+        super().__init__(food_items, nutritional_constraints, order_constraints)
+
+    def _run_solver(self, start=None):
+        """Solve the horizon window by window and store the stitched plan."""
+        n_weeks = self.order_constraints['total_weeks']
+        step = self.window_weeks - self.overlap_weeks
+        keys = list(self.items)
+        cost = self.catalog['cost']
+        perishable = self.catalog['perishable']
+        delivery_fee = float(self.order_constraints['delivery_fee'])
+
+        plan = {family: np.zeros((n_weeks, len(keys))) for family in ITEM_FAMILIES}
+        plan['order_week'] = np.zeros(n_weeks)
+        carry = np.zeros(len(keys))  # Non-perishable stock entering the window
+        self.windows = []
+        first = 0
+        while first < n_weeks:
+            length = min(self.window_weeks, n_weeks - first)
+            commit = length if first + length >= n_weeks else step
+            start_time = time.time()
+            values = self._solve_window(length, dict(zip(keys, carry)))
+            if values is None:
+                print(f"Window starting at week {first + 1} found no feasible plan")
+                return pulp.LpStatusInfeasible
+
+            # Commit the first weeks and carry their leftover stock forward
+            committed = slice(first, first + commit)
+            for family in plan:
+                plan[family][committed] = values[family][:commit]
+            last = commit - 1
+            carry = np.where(perishable, 0.0, values['inventory'][last] - values['eat'][last])
+
+            window_cost = (
+                float((values['order'][:commit] @ cost).sum())
+                + delivery_fee * float(values['order_week'][:commit].sum())
+            )
+            self.windows.append({
+                'first_week': first + 1,
+                'weeks': length,
+                'committed_weeks': commit,
+                'committed_cost': window_cost,
+                'solve_time': time.time() - start_time
+            })
+            if self.show_progress:
+                print(f"Window weeks {first + 1}-{first + length}: committed {commit} weeks "
+                      f"for ${window_cost:.2f} in {self.windows[-1]['solve_time']:.1f}s")
+            first += commit
+
+        status = self._use_start_solution(plan)
+        self._print_comparison()
+        self.progress.update('rolling', incumbent=self._objective_value())
+        return status
+
+    def _solve_window(self, length, initial_inventory):
+        """
+        Solve one window of the horizon.
+
+        Returns:
+            dict: weeks x items arrays per variable family, or None if the window
+                has no feasible plan
+        """
+        constraints = dict(self.order_constraints)
+        constraints.update({
+            'total_weeks': length,
+            'initial_inventory': initial_inventory,
+            'solver_time_limit': self.window_time_limit,
+            'solver_show_progress': False,
+            'solver_progress_callback': None,
+            'solver_progress_log': None,
+            'solver_stop_policies': None
+        })
+        # Keep the console to one line per window
+        with contextlib.redirect_stdout(io.StringIO()):
+            window = DietOptimizer(self.food_items, self.nutritional_constraints, constraints)
+            if not window.solve():
+                return None
+            return window.solution_arrays()
+
+    def comparison(self):
+        """
+        Compare the rolling-horizon cost with the monolithic reference cost.
+
+        Returns:
+            dict: Rolling-horizon cost, reference cost and the absolute and relative
+                difference, or None if no reference cost is configured
+        """
+        if self.reference_cost is None or not self.solve():
+            return None
+        cost = self._objective_value()
+        return {
+            'rolling_cost': cost,
+            'reference_cost': self.reference_cost,
+            'difference': cost - self.reference_cost,
+            'relative_difference': (cost - self.reference_cost) / max(abs(self.reference_cost), 1e-9)
+        }
+
+    def _print_comparison(self):
+        """Print the total cost and its comparison with the reference cost."""
+        cost = self._objective_value()
+        solve_time = sum(window['solve_time'] for window in self.windows)
+        print(f"Rolling horizon: {len(self.windows)} windows, total cost ${cost:.2f} in {solve_time:.1f}s")
+        if self.reference_cost is not None:
+            difference = cost - self.reference_cost
+            print(f"Monolithic reference: ${self.reference_cost:.2f} "
+                  f"(rolling horizon {difference:+.2f}, {difference / max(abs(self.reference_cost), 1e-9) * 100:+.1f}%)")
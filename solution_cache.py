@@ -0,0 +1,186 @@
+"""
+Persistent cache of solved plans keyed on a canonical model fingerprint.
+
+The fingerprint hashes the catalog arrays, the nutritional constraints, the order
+constraints that affect the model and the solver settings, so a rerun with the same
+inputs can reuse the stored plan instead of solving again. A second, structural key
+covers only the item keys and the number of weeks: a plan stored for a model with
+the same structure but different numbers can still serve as a start solution. Plans
+are stored as one .npz file each and the least recently used files are removed once
+the cache grows beyond its size limit.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import numpy as np
+
+# Order constraints that only affect progress output, formatting or the cache itself
+NON_MODEL_SETTINGS = {
+    'solver_show_progress', 'solver_progress_callback', 'solver_progress_log', 'start_date',
+    'lazy_formatted_results', 'solution_cache_dir', 'solution_cache_max_mb', 'cpu_budget', 'job_name'
+}
+
+PLAN_FAMILIES = ['order', 'eat', 'inventory', 'packages', 'order_week']
+
+
+def _canonical(value):
+    """Convert a setting to JSON-serializable form with numbers as floats."""
+    if isinstance(value, dict):
+        return {str(key): _canonical(value[key]) for key in sorted(value, key=str)}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(item) for item in value]
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        return float(value)
+    if hasattr(value, 'describe'):
+        return f"{type(value).__name__}: {value.describe()}"
+    return repr(value)
+
+
+def model_fingerprint(catalog, nutritional_constraints, order_constraints, **solver_settings):
+    """
+    Hash the inputs that determine the solved plan.
+
+    Args:
+        catalog (dict): Catalog arrays from model_builder.catalog_arrays
+        nutritional_constraints (dict): Dictionary of nutritional constraints
+        order_constraints (dict): Dictionary of order constraints; callables and the
+            NON_MODEL_SETTINGS keys are ignored
+        **solver_settings: Further settings that affect the plan, e.g. the solver backend
+
+    Returns:
+        tuple: (fingerprint, structure) hex digests; the structure only covers the
+            item keys and the number of weeks
+    """
+    keys = '\0'.join(catalog['keys']).encode()
+    structure = hashlib.sha256(keys)
+    structure.update(str(int(order_constraints['total_weeks'])).encode())
+
+    fingerprint = hashlib.sha256(keys)
+    for name in ('cost', 'nutrients', 'package_size', 'weekly_limit'):
+        fingerprint.update(np.ascontiguousarray(catalog[name], dtype=np.float64).tobytes())
+    fingerprint.update(np.ascontiguousarray(catalog['perishable'], dtype=np.uint8).tobytes())
+    settings = {
+        'nutritional_constraints': nutritional_constraints,
+        'order_constraints': {
+            key: value for key, value in order_constraints.items()
+            if key not in NON_MODEL_SETTINGS and not callable(value)
+        },
+        'solver': solver_settings
+    }
+    fingerprint.update(json.dumps(_canonical(settings), sort_keys=True).encode())
+    return fingerprint.hexdigest(), structure.hexdigest()
+
+
+class SolutionCache:
+    """Directory of solved plans with least-recently-used size eviction."""
+
+    def __init__(self, cache_dir, max_bytes=100 * 1024 ** 2):
+        """
+        Args:
+            cache_dir (str): Directory holding the cached plans; created if missing
+            max_bytes (int): Total size of the cached plans to keep
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, fingerprint, structure):
+        return os.path.join(self.cache_dir, f"{structure[:16]}-{fingerprint}.npz")
+
+    def get(self, fingerprint, structure):
+        """
+        Load the plan stored for a fingerprint and mark it as recently used.
+
+        Returns:
+            dict: 'keys', 'objective' and weeks x items arrays per variable family,
+                or None if no plan is stored
+        """
+        return self._load(self._path(fingerprint, structure))
+
+    def nearest(self, fingerprint, structure):
+        """Load the most recently used plan of another model with the same structure, if any."""
+        prefix = f"{structure[:16]}-"
+        own = os.path.basename(self._path(fingerprint, structure))
+        candidates = [
+            (entry, stat) for entry, stat in self._entries()
+            if entry.name.startswith(prefix) and entry.name != own
+        ]
+        for entry, _ in sorted(candidates, key=lambda candidate: candidate[1].st_mtime, reverse=True):
+            plan = self._load(entry.path)
+            if plan is not None:
+                return plan
+        return None
+
+    def put(self, fingerprint, structure, keys, arrays, objective):
+        """
+        Store a solved plan and evict the least recently used plans beyond the size limit.
+
+        Args:
+            fingerprint (str): Model fingerprint from model_fingerprint
+            structure (str): Structural key from model_fingerprint
+            keys (list): Item keys of the plan's columns
+            arrays (dict): weeks x items arrays per variable family
+            objective (float): Cost of the plan
+        """
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            np.savez(
+                f,
+                keys=np.array(keys, dtype=str),
+                objective=np.float64(objective),
+                **{family: arrays[family] for family in PLAN_FAMILIES}
+            )
+        path = self._path(fingerprint, structure)
+        os.replace(tmp_path, path)
+        self._evict(keep=path)
+
+    def _load(self, path):
+        try:
+            with np.load(path) as data:
+                plan = {family: data[family] for family in PLAN_FAMILIES}
+                plan['keys'] = data['keys'].tolist()
+                plan['objective'] = float(data['objective'])
+            os.utime(path)
+        except (OSError, KeyError, ValueError):
+            # Also covers a plan evicted by another process in the meantime
+            return None
+        return plan
+
+    def _entries(self):
+        """
+        List the cached plans with their stat results.
+        
+        Other processes sharing the directory may evict a plan at any time, so plans
+        that disappear while the directory is scanned are skipped.
+        """
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if not entry.name.endswith('.npz'):
+                continue
+            try:
+                entries.append((entry, entry.stat()))
+            except FileNotFoundError:
+                continue
+        return entries
+
+    def _evict(self, keep):
+        """Remove the least recently used plans until the cache fits in max_bytes."""
+        entries = sorted(self._entries(), key=lambda item: item[1].st_mtime)
+        total = sum(stat.st_size for _, stat in entries)
+        for entry, stat in entries:
+            if total <= self.max_bytes:
+                break
+            if entry.path == keep:
+                continue
+            total -= stat.st_size
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                # Already evicted by another process
+                continue
@@ -0,0 +1,326 @@
+"""
+Solver-reported progress tracking for MIP solves.
+
+Collects incumbent objective, best bound, relative gap and node count as the
+solver reports them (CBC through its log stream, HiGHS through its MIP
+callbacks), hands every update to pluggable callbacks and can record the whole
+timeline as JSONL.
+"""
+
+import json
+import math
+import os
+import re
+import select
+import sys
+import threading
+import time
+
+
+class ProgressEvent:
+    """A single progress update reported by the solver."""
+
+    __slots__ = ['elapsed', 'incumbent', 'bound', 'gap', 'nodes', 'source', 'kind']
+
+    def __init__(self, elapsed, incumbent, bound, gap, nodes, source, kind):
+        self.elapsed = elapsed  # Seconds since the solve started
+        self.incumbent = incumbent  # Best feasible objective, or None
+        self.bound = bound  # Best proven lower bound, or None
+        self.gap = gap  # Relative gap |incumbent - bound| / |incumbent|, or None
+        self.nodes = nodes  # Branch-and-bound nodes explored, or None
+        self.source = source  # 'cbc' or 'highs'
+        self.kind = kind  # 'incumbent', 'bound' or 'final'
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def relative_gap(incumbent, bound):
+    """Relative MIP gap as reported by HiGHS and CBC."""
+    if incumbent is None or bound is None:
+        return None
+    return abs(incumbent - bound) / max(abs(incumbent), 1e-9)
+
+
+class ProgressTracker:
+    """
+    Keep the running solver state and dispatch updates to callbacks.
+
+    Callbacks receive a ProgressEvent. Updates may arrive from a solver or log
+    reader thread, so state changes are serialized with a lock.
+    """
+
+    def __init__(self, callbacks=None, timeline_path=None):
+        """
+        Args:
+            callbacks (list): Callables invoked with each ProgressEvent
+            timeline_path (str): Optional path of a JSONL file recording every event
+        """
+        self.callbacks = list(callbacks or [])
+        self.timeline_path = timeline_path
+        self.events = []
+        self.incumbent = None
+        self.bound = None
+        self.nodes = None
+        self.time_to_first_feasible = None
+        self.start_time = None
+        self._lock = threading.Lock()
+        self._timeline = None
+
+    def add_callback(self, callback):
+        self.callbacks.append(callback)
+
+    def start(self):
+        """Mark the start of the solve."""
+        self.start_time = time.time()
+        if self.timeline_path:
+            self._timeline = open(self.timeline_path, 'w')
+
+    @property
+    def elapsed(self):
+        return time.time() - self.start_time if self.start_time else 0.0
+
+    @property
+    def gap(self):
+        return relative_gap(self.incumbent, self.bound)
+
+    def update(self, source, incumbent=None, bound=None, nodes=None, elapsed=None, kind=None):
+        """
+        Record a solver update and notify the callbacks.
+
+        Args:
+            source (str): Reporting solver, 'cbc' or 'highs'
+            incumbent (float): New incumbent objective, if reported
+            bound (float): New best bound, if reported
+            nodes (int): Nodes explored so far, if reported
+            elapsed (float): Solver-reported time; defaults to wall time since start
+            kind (str): Event kind; inferred from the reported values if omitted
+        """
+        with self._lock:
+            elapsed = self.elapsed if elapsed is None else elapsed
+            improved = incumbent is not None and (self.incumbent is None or incumbent < self.incumbent - 1e-9)
+            if improved:
+                self.incumbent = incumbent
+                if self.time_to_first_feasible is None:
+                    self.time_to_first_feasible = elapsed
+            if bound is not None and math.isfinite(bound):
+                self.bound = bound if self.bound is None else max(self.bound, bound)
+            if nodes is not None:
+                self.nodes = nodes
+            event = ProgressEvent(
+                elapsed=elapsed,
+                incumbent=self.incumbent,
+                bound=self.bound,
+                gap=self.gap,
+                nodes=self.nodes,
+                source=source,
+                kind=kind or ('incumbent' if improved else 'bound'),
+            )
+            self.events.append(event)
+            if self._timeline is not None:
+                self._timeline.write(json.dumps(event.to_dict()) + '\n')
+                self._timeline.flush()
+        for callback in self.callbacks:
+            callback(event)
+        return event
+
+    def finish(self, source):
+        """Emit a final event and close the timeline file."""
+        event = self.update(source, kind='final')
+        if self._timeline is not None:
+            self._timeline.close()
+            self._timeline = None
+        return event
+
+    def summary(self):
+        """Return the final solver state as a dictionary."""
+        return {
+            'incumbent': self.incumbent,
+            'bound': self.bound,
+            'gap': self.gap,
+            'nodes': self.nodes,
+            'time_to_first_feasible': self.time_to_first_feasible,
+            'elapsed': self.events[-1].elapsed if self.events else None,
+            'events': len(self.events),
+        }
+
+
+class ConsoleProgressReporter:
+    """Progress callback that redraws a one-line solver status on stdout."""
+
+    def __init__(self, time_limit, min_interval=0.5):
+        self.time_limit = time_limit
+        self.min_interval = min_interval
+        self._last_draw = 0.0
+
+    def __call__(self, event):
+        now = time.time()
+        if event.kind != 'final' and now - self._last_draw < self.min_interval:
+            return
+        self._last_draw = now
+        incumbent = f"${event.incumbent:.2f}" if event.incumbent is not None else "-"
+        bound = f"${event.bound:.2f}" if event.bound is not None else "-"
+        gap = f"{event.gap * 100:.1f}%" if event.gap is not None else "-"
+        nodes = event.nodes if event.nodes is not None else "-"
+        sys.stdout.write(
+            f"\r[{event.elapsed:.1f}s / {self.time_limit:.1f}s] incumbent {incumbent} | "
+            f"bound {bound} | gap {gap} | nodes {nodes}          "
+        )
+        if event.kind == 'final':
+            sys.stdout.write("\n")
+        sys.stdout.flush()
+
+
+_NUMBER = r'(-?[\d.]+(?:e[+-]?\d+)?)'
+_CBC_PATTERNS = [
+    # Cbc0004I / Cbc0012I Integer solution of 144.55 found ... after 9842 iterations and 793 nodes (1.71 seconds)
+    (re.compile(r'Cbc00(?:04|12)I Integer solution of ' + _NUMBER +
+                r' found.* and (\d+) nodes \(([\d.]+) seconds\)'),
+     lambda m: dict(incumbent=float(m.group(1)), nodes=int(m.group(2)), elapsed=float(m.group(3)))),
+    # Cbc0010I After 1000 nodes, 215 on tree, 144.55 best solution, best possible 124.2248 (1.96 seconds)
+    (re.compile(r'Cbc0010I After (\d+) nodes, \d+ on tree, ' + _NUMBER +
+                r' best solution, best possible ' + _NUMBER + r' \(([\d.]+) seconds\)'),
+     lambda m: dict(nodes=int(m.group(1)), incumbent=_cbc_value(m.group(2)),
+                    bound=float(m.group(3)), elapsed=float(m.group(4)))),
+    # Cbc0038I Solution found of 151.55
+    (re.compile(r'Cbc0038I Solution found of ' + _NUMBER),
+     lambda m: dict(incumbent=float(m.group(1)))),
+    # Cbc0013I At root node, 18 cuts changed objective from 121.30418 to 124.2248 in 10 passes
+    (re.compile(r'Cbc0013I At root node, .* to ' + _NUMBER + r' in'),
+     lambda m: dict(bound=float(m.group(1)))),
+    # Continuous objective value is 120.368 - 0.02 seconds
+    (re.compile(r'Continuous objective value is ' + _NUMBER + r' - ([\d.]+) seconds'),
+     lambda m: dict(bound=float(m.group(1)), elapsed=float(m.group(2)))),
+    # Lower bound:                    133.135
+    (re.compile(r'^Lower bound:\s+' + _NUMBER),
+     lambda m: dict(bound=float(m.group(1)))),
+    # Enumerated nodes:               15237
+    (re.compile(r'^Enumerated nodes:\s+(\d+)'),
+     lambda m: dict(nodes=int(m.group(1)))),
+]
+
+
+# Clock time of a CBC message, e.g. "Cbc0038I ... (0.50 seconds)" or "Continuous objective
+# value is 53.78 - 0.02 seconds"; the cut generator statistics report durations instead
+_CBC_SECONDS = re.compile(r'^(?:Cbc\d{4}I|Continuous objective).*(?:\(([\d.]+) seconds\)|- ([\d.]+) seconds)')
+
+
+def _cbc_value(text):
+    """CBC reports a missing incumbent as 1e+50."""
+    value = float(text)
+    return None if value >= 1e49 else value
+
+
+def parse_cbc_log_line(line):
+    """
+    Parse one CBC log line.
+
+    Returns:
+        dict: Reported incumbent/bound/nodes/elapsed values, or None if the line
+            carries no progress information
+    """
+    for pattern, extract in _CBC_PATTERNS:
+        match = pattern.search(line)
+        if match:
+            return extract(match)
+    return None
+
+
+class CbcLogFollower:
+    """
+    Follow the CBC log in a background thread and feed a ProgressTracker.
+
+    The log is read either from a file descriptor, e.g. a pseudo-terminal CBC
+    writes to line by line, or from a log file, which CBC buffers so lines can
+    arrive in bursts. Events are stamped with the time CBC reported, counted from
+    when its output started, not with the time the line was read; lines without a
+    time are stamped with the last CBC-reported time.
+    """
+
+    def __init__(self, log_path, tracker, poll_interval=0.25, fd=None):
+        """
+        Args:
+            log_path (str): CBC log file; ignored if fd is given
+            tracker (ProgressTracker): Tracker to feed
+            poll_interval (float): Seconds between checks for new output
+            fd (int): File descriptor of CBC's output stream
+        """
+        self.log_path = log_path
+        self.tracker = tracker
+        self.poll_interval = poll_interval
+        self.fd = fd
+        self._offset = None  # Tracker time at which CBC's output started
+        self._last_elapsed = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._follow_fd if fd is not None else self._follow, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        """Stop following after the remaining log lines have been read."""
+        self._stop.set()
+        self._thread.join()
+
+    def _follow(self):
+        # CBC creates the log file once the solver process starts
+        log = None
+        while log is None:
+            try:
+                log = open(self.log_path, 'r')
+            except FileNotFoundError:
+                if self._stop.is_set():
+                    return
+                time.sleep(self.poll_interval)
+        self._offset = self.tracker.elapsed
+
+        with log:
+            buffer = ''
+            while True:
+                chunk = log.readline()
+                if chunk:
+                    buffer += chunk
+                    if buffer.endswith('\n'):
+                        self._handle(buffer)
+                        buffer = ''
+                elif self._stop.is_set():
+                    if buffer:
+                        self._handle(buffer)
+                    return
+                else:
+                    time.sleep(self.poll_interval)
+
+    def _follow_fd(self):
+        buffer = b''
+        while True:
+            ready, _, _ = select.select([self.fd], [], [], self.poll_interval)
+            if not ready:
+                if self._stop.is_set():
+                    break
+                continue
+            try:
+                chunk = os.read(self.fd, 65536)
+            except OSError:
+                # A pseudo-terminal reports EIO once CBC has exited
+                chunk = b''
+            if not chunk:
+                break
+            if self._offset is None:
+                self._offset = self.tracker.elapsed
+            *lines, buffer = (buffer + chunk).split(b'\n')
+            for line in lines:
+                self._handle(line.decode(errors='replace'))
+        if buffer:
+            self._handle(buffer.decode(errors='replace'))
+
+    def _handle(self, line):
+        line = line.strip()
+        seconds = _CBC_SECONDS.search(line)
+        if seconds:
+            self._last_elapsed = max(self._last_elapsed, float(seconds.group(1) or seconds.group(2)))
+        values = parse_cbc_log_line(line)
+        if values:
+            if self._offset is None:
+                self._offset = self.tracker.elapsed
+            values['elapsed'] = self._offset + max(values.get('elapsed', 0.0), self._last_elapsed)
+            self.tracker.update('cbc', **values)
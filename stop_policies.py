@@ -0,0 +1,242 @@
+"""
+Early-termination policies for long MIP solves.
+
+A policy looks at each solver progress event and decides whether the current
+incumbent is good enough to stop. The StopController evaluates a list of
+policies, remembers which one fired and interrupts the running solver: HiGHS
+through its interrupt callback, CBC by sending SIGINT to the solver process,
+which makes CBC stop and report its incumbent like a time limit would.
+
+CBC is given a pseudo-terminal as its output, so it writes its log line by line
+and policies see its progress as it happens. Without pseudo-terminals (e.g. on
+Windows) CBC only writes its buffered log when it finishes, too late to stop it,
+so stop policies need the HiGHS backend there.
+"""
+
+import os
+import signal
+import threading
+
+from pulp.apis import coin_api
+
+
+class StopPolicy:
+    """Base class for early-termination policies."""
+
+    name = 'policy'
+
+    def prepare(self, optimizer):
+        """Called once before the solve starts."""
+
+    def should_stop(self, event):
+        """Return True if the solve should stop after this ProgressEvent."""
+        raise NotImplementedError
+
+    def describe(self):
+        return self.name
+
+
+class GapStallPolicy(StopPolicy):
+    """
+    Stop when the relative gap has not improved by min_improvement within window seconds.
+
+    min_improvement is measured in gap points, e.g. 0.01 requires the gap to shrink
+    by one percentage point (say from 8% to 7%) to count as progress.
+    """
+
+    name = 'gap_stall'
+
+    def __init__(self, min_improvement=0.01, window=60.0):
+        self.min_improvement = min_improvement
+        self.window = window
+        self._reference = None  # (elapsed, gap) of the last real improvement
+
+    def prepare(self, optimizer):
+        self._reference = None
+
+    def should_stop(self, event):
+        if event.gap is None:
+            return False
+        if self._reference is None or self._reference[1] - event.gap >= self.min_improvement:
+            self._reference = (event.elapsed, event.gap)
+            return False
+        return event.elapsed - self._reference[0] >= self.window
+
+    def describe(self):
+        return (f"{self.name}: gap improved by less than {self.min_improvement * 100:.1f} points "
+                f"in {self.window:.0f}s")
+
+
+class AbsoluteGapPolicy(StopPolicy):
+    """Stop once the incumbent is within max_gap dollars of the best bound."""
+
+    name = 'absolute_gap'
+
+    def __init__(self, max_gap=5.0):
+        self.max_gap = max_gap
+
+    def should_stop(self, event):
+        if event.incumbent is None or event.bound is None:
+            return False
+        return event.incumbent - event.bound <= self.max_gap
+
+    def describe(self):
+        return f"{self.name}: incumbent within ${self.max_gap:.2f} of the best bound"
+
+
+class LowerBoundPolicy(StopPolicy):
+    """
+    Stop once the incumbent is within tolerance dollars of a precomputed lower bound.
+
+    If no lower_bound is given, the LP relaxation bound of the model is computed
+    before the solve starts.
+    """
+
+    name = 'lower_bound'
+
+    def __init__(self, tolerance=10.0, lower_bound=None):
+        self.tolerance = tolerance
+        self.lower_bound = lower_bound
+
+    def prepare(self, optimizer):
+        if self.lower_bound is None:
+            self.lower_bound = optimizer.lp_lower_bound()
+
+    def should_stop(self, event):
+        if event.incumbent is None or self.lower_bound is None:
+            return False
+        return event.incumbent - self.lower_bound <= self.tolerance
+
+    def describe(self):
+        bound = f"${self.lower_bound:.2f}" if self.lower_bound is not None else "n/a"
+        return f"{self.name}: incumbent within ${self.tolerance:.2f} of LP bound {bound}"
+
+
+class StopController:
+    """Progress callback that evaluates stop policies and records which one fired."""
+
+    def __init__(self, policies):
+        self.policies = list(policies)
+        self.fired = None  # The policy that fired, if any
+        self.fired_at = None  # Solve time of the progress event that fired it
+        self.interrupted = False  # Whether a stop handler interrupted the running solver
+        self._stop_handlers = []
+
+    def add_stop_handler(self, handler):
+        """Register a function called once when a policy fires; it returns True if it stopped the solver."""
+        self._stop_handlers.append(handler)
+
+    @property
+    def should_stop(self):
+        return self.fired is not None
+
+    def __call__(self, event):
+        if self.fired is not None or event.kind == 'final':
+            return
+        for policy in self.policies:
+            if policy.should_stop(event):
+                self.fired = policy
+                self.fired_at = event.elapsed
+                for handler in self._stop_handlers:
+                    self.interrupted = bool(handler()) or self.interrupted
+                break
+
+
+def live_cbc_log_available():
+    """Whether CBC's log can be followed live through a pseudo-terminal."""
+    return hasattr(os, 'openpty')
+
+
+class _CoinSubprocess:
+    """
+    Stand-in for the subprocess module inside pulp's coin_api that records CBC
+    processes and points their output at the interrupter's pseudo-terminal.
+    """
+
+    def __init__(self, module):
+        self._module = module
+        self._capture = threading.local()
+
+    def __getattr__(self, name):
+        return getattr(self._module, name)
+
+    def Popen(self, *args, **kwargs):
+        interrupter = getattr(self._capture, 'interrupter', None)
+        if interrupter is None:
+            return self._module.Popen(*args, **kwargs)
+        if interrupter._terminal is not None:
+            # A terminal makes CBC line-buffer its output
+            kwargs['stdout'] = kwargs['stderr'] = interrupter._terminal
+        process = self._module.Popen(*args, **kwargs)
+        interrupter.process = process
+        interrupter._close_terminal()
+        return process
+
+
+_coin_subprocess = None  # Wrapper installed in coin_api while any interrupter is active
+_coin_subprocess_users = 0
+_coin_subprocess_lock = threading.Lock()
+
+
+class CbcInterrupter:
+    """
+    Context manager that captures the CBC process started by PuLP in this thread,
+    so a stop policy can interrupt it, and gives it a pseudo-terminal as output.
+
+    The subprocess module of pulp's coin_api is wrapped only while at least one
+    interrupter is active, and the original is put back when the last one exits.
+    CBC's log can be read from output_fd while it runs; output_fd is None if the
+    platform has no pseudo-terminals.
+    """
+
+    def __init__(self):
+        self.process = None
+        self.interrupted = False
+        self.output_fd = None
+        self._terminal = None
+
+    def __enter__(self):
+        global _coin_subprocess, _coin_subprocess_users
+        if live_cbc_log_available():
+            self.output_fd, self._terminal = os.openpty()
+        with _coin_subprocess_lock:
+            if _coin_subprocess_users == 0:
+                _coin_subprocess = _CoinSubprocess(coin_api.subprocess)
+                coin_api.subprocess = _coin_subprocess
+            _coin_subprocess_users += 1
+            _coin_subprocess._capture.interrupter = self
+        return self
+
+    def _close_terminal(self):
+        """Close this process's end of CBC's terminal, so reads end once CBC exits."""
+        if self._terminal is not None:
+            os.close(self._terminal)
+            self._terminal = None
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        global _coin_subprocess, _coin_subprocess_users
+        with _coin_subprocess_lock:
+            _coin_subprocess._capture.interrupter = None
+            _coin_subprocess_users -= 1
+            if _coin_subprocess_users == 0:
+                coin_api.subprocess = _coin_subprocess._module
+                _coin_subprocess = None
+        self._close_terminal()
+        if self.output_fd is not None:
+            os.close(self.output_fd)
+            self.output_fd = None
+        self.process = None
+        return False
+
+    def interrupt(self):
+        """
+        Ask CBC to stop and report its incumbent (POSIX only).
+
+        Returns:
+            bool: True if the signal reached a CBC process that was still running
+        """
+        process = self.process
+        if process is not None and process.poll() is None and os.name == 'posix':
+            process.send_signal(signal.SIGINT)
+            self.interrupted = True
+        return self.interrupted
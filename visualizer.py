@@ -7,20 +7,27 @@ import matplotlib.pyplot as plt
 import numpy as np
 
 class OptimizationVisualizer:
-    def __init__(self, results, food_items):
-        self.results = results
-        self.food_items = food_items
-        self.weeks = range(len(results['order_schedule']))
+    def __init__(self, ledger, cost_breakdown):
+        """
+        Args:
+            ledger (InventoryLedger): Orders, consumption and waste of the plan
+            cost_breakdown (dict): Weekly and total costs from DietOptimizer.get_results()
+        """
+        self.ledger = ledger
+        self.cost_breakdown = cost_breakdown
+        self.weeks = range(ledger.n_weeks)
+
+    def _split_by_perishable(self, values, perishable_label, non_perishable_label):
+        """Sum a weeks x items array into perishable and non-perishable columns per week."""
+        perishable = self.ledger.perishable
+        return pd.DataFrame({
+            'Week': list(self.weeks),
+            perishable_label: values[:, perishable].sum(axis=1),
+            non_perishable_label: values[:, ~perishable].sum(axis=1)
+        })
 
     def plot_weekly_order_volume(self):
-        order_volume = []
-        for week in self.weeks:
-            week_order = self.results['order_schedule'][week]
-            perishable_volume = sum(qty for item, qty in week_order.items() if self.food_items[item]['perishable'])
-            non_perishable_volume = sum(qty for item, qty in week_order.items() if not self.food_items[item]['perishable'])
-            order_volume.append({'Week': week, 'Perishable': perishable_volume, 'Non-Perishable': non_perishable_volume})
-
-        df = pd.DataFrame(order_volume)
+        df = self._split_by_perishable(self.ledger.order, 'Perishable', 'Non-Perishable')
         fig, ax = plt.subplots(figsize=(15,6))
         df.set_index('Week').plot(kind='bar', stacked=True, alpha=0.8, ax=ax)
         plt.title('Weekly Shopping Order Volume')
@@ -32,13 +39,11 @@ class OptimizationVisualizer:
         return fig
 
     def plot_consumption_vs_purchase(self):
-        consumption_purchase = []
-        for week in self.weeks:
-            week_order = sum(self.results['order_schedule'][week].values())
-            week_consumption = sum(self.results['consumption'][week].values())
-            consumption_purchase.append({'Week': week, 'Ordered': week_order, 'Consumed': week_consumption})
-
-        df = pd.DataFrame(consumption_purchase)
+        df = pd.DataFrame({
+            'Week': list(self.weeks),
+            'Ordered': self.ledger.order.sum(axis=1),
+            'Consumed': self.ledger.eat.sum(axis=1)
+        })
         fig, ax = plt.subplots(figsize=(15,6))
         df.set_index('Week').plot(kind='line', marker='o', ax=ax)
         plt.title('Weekly Consumption vs. Purchases')
@@ -49,14 +54,7 @@ class OptimizationVisualizer:
         return fig
 
     def plot_weekly_waste(self):
-        weekly_waste = []
-        for week in self.weeks:
-            waste = self.results['waste'][week] if week > 0 else {}  # No waste in first week
-            perishable_waste = sum(qty for item, qty in waste.items() if self.food_items[item]['perishable'])
-            non_perishable_waste = sum(qty for item, qty in waste.items() if not self.food_items[item]['perishable'])
-            weekly_waste.append({'Week': week, 'Perishable Waste': perishable_waste, 'Non-Perishable Waste': non_perishable_waste})
-
-        df = pd.DataFrame(weekly_waste)
+        df = self._split_by_perishable(self.ledger.waste, 'Perishable Waste', 'Non-Perishable Waste')
         fig, ax = plt.subplots(figsize=(15,6))
         df.set_index('Week').plot(kind='bar', stacked=True, color=['salmon', 'gray'], ax=ax)
         plt.title('Weekly Waste Analysis')
@@ -67,36 +65,22 @@ class OptimizationVisualizer:
         return fig
 
     def generate_summary_tables(self):
-        shopping_summary = []
-        consumption_waste_summary = []
-
-        for week in self.weeks:
-            order = self.results['order_schedule'][week]
-            consumption = self.results['consumption'][week]
-            waste = self.results['waste'][week]
-
-            total_ordered = sum(order.values())
-            total_consumed = sum(consumption.values())
-            total_wasted = sum(waste.values())
-
-            shopping_summary.append({
-                'Week': week,
-                'Items Ordered': len(order),
-                'Quantity Ordered': total_ordered,
-                'Total Cost': self.results['cost_breakdown']['weekly'][week]['items'],
-                'Delivery Cost': self.results['cost_breakdown']['weekly'][week]['delivery']
-            })
-
-            consumption_waste_summary.append({
-                'Week': week,
-                'Items Consumed': len(consumption),
-                'Quantity Consumed': total_consumed,
-                'Quantity Wasted': total_wasted,
-                'Waste Cost': sum(waste[item] * self.food_items[item]['cost'] for item in waste)
-            })
-
-        shopping_df = pd.DataFrame(shopping_summary)
-        consumption_waste_df = pd.DataFrame(consumption_waste_summary)
+        ledger = self.ledger
+        weekly_costs = self.cost_breakdown['weekly']
+        shopping_df = pd.DataFrame({
+            'Week': list(self.weeks),
+            'Items Ordered': (ledger.order > 0).sum(axis=1),
+            'Quantity Ordered': ledger.order.sum(axis=1),
+            'Total Cost': [cost['items'] for cost in weekly_costs],
+            'Delivery Cost': [cost['delivery'] for cost in weekly_costs]
+        })
+        consumption_waste_df = pd.DataFrame({
+            'Week': list(self.weeks),
+            'Items Consumed': (ledger.eat > 0).sum(axis=1),
+            'Quantity Consumed': ledger.eat.sum(axis=1),
+            'Quantity Wasted': ledger.waste.sum(axis=1),
+            'Waste Cost': ledger.waste_cost.sum(axis=1)
+        })
 
         print("Shopping Summary Table:")
         print(shopping_df.to_string(index=False))
@@ -0,0 +1,198 @@
+"""
+Construction heuristic that produces a feasible weekly plan quickly.
+
+Every week has the same nutrient bounds, so the plan starts from the LP relaxation
+of a single week's diet: consumption is rounded up to whole servings and whole
+perishable packages and the nutrient bounds are repaired with greedy single-package
+moves. Orders are then placed in the weeks that need a delivery anyway, buying the
+non-perishables needed until the next delivery, and weeks below the minimum order
+value pull future non-perishable purchases forward. Perishables force a delivery
+every week they are eaten, so a diet without perishables is tried as well and the
+cheaper plan is kept. The result can be passed to the MIP solver as a start solution
+or used on its own as a fast answer.
+"""
+
+import time
+import numpy as np
+from scipy.optimize import linprog
+
+from model_builder import catalog_arrays, constrained_nutrients, derive_bounds, nutrient_bounds
+
+
+class WarmStartHeuristic:
+    """LP-rounding and greedy repair heuristic for the diet model."""
+
+    def __init__(self, food_items, nutritional_constraints, order_constraints, matrices, max_moves=1000):
+        """
+        Args:
+            food_items (dict): Dictionary of food items and their attributes
+            nutritional_constraints (dict): Dictionary of nutritional constraints
+            order_constraints (dict): Dictionary of order constraints
+            matrices (ModelMatrices): The model the plan must be feasible for
+            max_moves (int): Maximum greedy repair moves per week
+        """
+        nutrients = constrained_nutrients(food_items, nutritional_constraints)
+        self.catalog = catalog_arrays(food_items, nutrients)
+        self.nutritional_constraints = nutritional_constraints
+        self.order_constraints = order_constraints
+        self.matrices = matrices
+        self.max_moves = max_moves
+        self.mins, self.maxs = nutrient_bounds(nutritional_constraints, nutrients)
+        self.objective = None
+        self.run_time = None
+
+    def run(self):
+        """
+        Construct a plan.
+
+        Returns:
+            np.ndarray: Feasible solution vector for the model, or None if the
+                repair could not satisfy every constraint
+        """
+        start_time = time.time()
+        best = None
+        for allow_perishable in (True, False):
+            upper = self._weekly_upper(allow_perishable)
+            plan = self._construct(self._lp_consumption(upper), upper)
+            if plan is None:
+                continue
+            x = self.matrices.pack(plan)
+            if not self.matrices.is_feasible(x):
+                continue
+            if best is None or self.matrices.objective(x) < self.matrices.objective(best):
+                best = x
+        self.objective = self.matrices.objective(best) if best is not None else None
+        self.run_time = time.time() - start_time
+        return best
+
+    def _weekly_upper(self, allow_perishable=True):
+        """Most servings of each item that can be eaten in one week."""
+        c = self.catalog
+        perishable_upper = np.floor(c['weekly_limit'] / c['package_size']) * c['package_size']
+        return np.where(c['perishable'], perishable_upper if allow_perishable else 0.0, c['weekly_limit'])
+
+    def _lp_consumption(self, upper):
+        """Cheapest continuous single-week diet within upper, or zeros if the LP fails."""
+        c = self.catalog
+        n_items = len(c['keys'])
+        finite_max = np.isfinite(self.maxs)
+        result = linprog(
+            c['cost'],
+            A_ub=np.vstack([c['nutrients'].T[finite_max], -c['nutrients'].T]),
+            b_ub=np.concatenate([self.maxs[finite_max], -self.mins]),
+            bounds=np.column_stack([np.zeros(n_items), upper]),
+            method='highs'
+        )
+        return result.x if result.status == 0 else np.zeros(n_items)
+
+    def _construct(self, target, upper):
+        """Round and repair the weekly diet, then schedule orders and stock."""
+        c = self.catalog
+        n_weeks = self.matrices.n_weeks
+        size = c['package_size']
+        perishable = c['perishable']
+
+        # Perishables are eaten in whole packages; non-perishables in whole servings
+        step = np.where(perishable, size, 1.0)
+        start = np.clip(np.ceil(np.round(target, 6) / step) * step, 0, upper)
+        week_diet = self._repair_week(start, step, upper)
+        if week_diet is None:
+            return None
+        eat = np.tile(week_diet, (n_weeks, 1))
+
+        # Orders stay within the derived package bounds of the model
+        cap = derive_bounds(c, self.order_constraints)['packages']
+        package_cost = size * c['cost']
+        remaining_need = np.cumsum(eat[::-1], axis=0)[::-1]  # Servings eaten from week w on
+        delivery = (eat[:, perishable] > 0).any(axis=1)
+        next_delivery = np.full(n_weeks, n_weeks)
+        for w in range(n_weeks - 2, -1, -1):
+            next_delivery[w] = w + 1 if delivery[w + 1] else next_delivery[w + 1]
+
+        order = np.zeros((n_weeks, len(size)))
+        inventory = np.zeros_like(order)
+        min_order_value = float(self.order_constraints['min_order_value'])
+        leftover = np.zeros(len(size))  # Non-perishable stock carried into the week
+        for w in range(n_weeks):
+            if delivery[w] or (eat[w] > leftover + 1e-9).any():
+                # Cover non-perishable consumption until the next delivery
+                cover = eat[w:next_delivery[w]].sum(axis=0)
+                packages = np.where(
+                    perishable,
+                    eat[w] / size,
+                    np.minimum(np.ceil(np.round(np.maximum(cover - leftover, 0) / size, 6)), cap[w])
+                )
+                value = packages @ package_cost
+                while value < min_order_value - 1e-9:
+                    # Pull future non-perishable needs forward before buying extra stock
+                    room = ~perishable & (packages < cap[w])
+                    future = room & (remaining_need[w] > leftover + packages * size)
+                    candidates = future if future.any() else room
+                    if not candidates.any():
+                        return None
+                    i = int(np.argmin(np.where(candidates, package_cost, np.inf)))
+                    packages[i] += 1
+                    value += package_cost[i]
+                order[w] = packages * size
+            inventory[w] = leftover + order[w]
+            if (eat[w] > inventory[w] + 1e-9).any():
+                return None
+            leftover = np.where(perishable, 0, inventory[w] - eat[w])
+
+        return {
+            'order': order,
+            'eat': eat,
+            'inventory': inventory,
+            'packages': np.round(order / size),
+            'order_week': (order.sum(axis=1) > 0).astype(float),
+        }
+
+    def _repair_week(self, eat, step, upper):
+        """
+        Greedily add or remove one step of an item until every nutrient bound holds.
+
+        Removals that reduce the scaled bound violation are taken first, otherwise
+        the addition with the largest violation reduction per dollar. Once feasible,
+        the most expensive steps that can be dropped without breaking a bound are
+        removed. Returns None if no move helps.
+        """
+        c = self.catalog
+        mins, maxs = self.mins, self.maxs
+        scale = np.where(np.isfinite(maxs) & (maxs > 0), maxs, np.maximum(mins, 1.0))
+        per_step = c['nutrients'] * step[:, None]  # Nutrients of one move per item
+        cost_step = np.maximum(c['cost'] * step, 1e-6)
+
+        def violation(totals):
+            return (np.maximum(mins - totals, 0) / scale + np.maximum(totals - maxs, 0) / scale).sum(axis=-1)
+
+        eat = eat.copy()
+        totals = eat @ c['nutrients']
+        current = violation(totals)
+        moves = 0
+        while current > 1e-9:
+            if moves >= self.max_moves:
+                return None
+            moves += 1
+            removable = eat - step >= -1e-9
+            addable = eat + step <= upper + 1e-9
+            remove_gain = np.where(removable, current - violation(totals - per_step), -np.inf)
+            add_gain = np.where(addable, current - violation(totals + per_step), -np.inf)
+            if remove_gain.max() > 1e-12:
+                i, direction = int(np.argmax(remove_gain)), -1
+            elif add_gain.max() > 1e-12:
+                i, direction = int(np.argmax(add_gain / cost_step)), 1
+            else:
+                return None
+            eat[i] += direction * step[i]
+            totals = totals + direction * per_step[i]
+            current = violation(totals)
+
+        # Drop the most expensive steps that keep every bound satisfied
+        for _ in range(self.max_moves):
+            removable = (eat - step >= -1e-9) & (violation(totals - per_step) <= 1e-9)
+            if not removable.any():
+                break
+            i = int(np.argmax(np.where(removable, cost_step, -np.inf)))
+            eat[i] -= step[i]
+            totals = totals - per_step[i]
+        return eat